@@ -4,6 +4,7 @@
 
 import os
 import json
+import hashlib
 import time
 import shutil
 import zipfile
@@ -318,6 +319,145 @@ class TestDataSyncClient(unittest.TestCase):
         success = self.client._extract_package(invalid_zip_path, target_dir)
         self.assertFalse(success)
     
+    def test_apply_delta(self):
+        """测试应用增量包（更新、新增、删除）"""
+        target_dir = self.data_dir / 'stock-trading-data-pro'
+        target_dir.mkdir(parents=True, exist_ok=True)
+        (target_dir / 'old.csv').write_text('old')
+        (target_dir / 'changed.csv').write_text('v1')
+        
+        delta_path = self.cache_dir / 'delta.zip'
+        with zipfile.ZipFile(delta_path, 'w') as zf:
+            zf.writestr('changed.csv', 'v2')
+            zf.writestr('sub/new.csv', 'new')
+            zf.writestr('__delta__.json', json.dumps({
+                'base_version': '20250203_160000',
+                'version': '20250204_160000',
+                'deleted': ['old.csv', '../outside.csv']
+            }))
+        
+        self.assertTrue(self.client._apply_delta(delta_path, target_dir))
+        
+        self.assertEqual((target_dir / 'changed.csv').read_text(), 'v2')
+        self.assertEqual((target_dir / 'sub' / 'new.csv').read_text(), 'new')
+        self.assertFalse((target_dir / 'old.csv').exists())
+        self.assertFalse((target_dir / '__delta__.json').exists())
+    
+    def _write_append_delta(self, base: bytes, tail: bytes) -> Path:
+        """构造一个对 data.csv 追加 tail 的增量包"""
+        delta_path = self.cache_dir / 'append.zip'
+        with zipfile.ZipFile(delta_path, 'w') as zf:
+            zf.writestr('__append__/data.csv', tail)
+            zf.writestr('__delta__.json', json.dumps({
+                'deleted': [],
+                'appends': {
+                    'data.csv': {
+                        'offset': len(base),
+                        'prefix_sha256': hashlib.sha256(base).hexdigest(),
+                        'sha256': hashlib.sha256(base + tail).hexdigest()
+                    }
+                }
+            }))
+        return delta_path
+    
+    def test_apply_delta_append(self):
+        """测试追加补丁在本地文件尾部就地追加"""
+        target_dir = self.data_dir / 'stock-trading-data-pro'
+        target_dir.mkdir(parents=True, exist_ok=True)
+        base = b'date,close\n2025-02-03,1\n'
+        tail = b'2025-02-04,2\n'
+        (target_dir / 'data.csv').write_bytes(base)
+        
+        delta_path = self._write_append_delta(base, tail)
+        
+        self.assertTrue(self.client._apply_delta(delta_path, target_dir))
+        self.assertEqual((target_dir / 'data.csv').read_bytes(), base + tail)
+        self.assertFalse((target_dir / '__append__').exists())
+    
+    def test_apply_delta_append_prefix_mismatch(self):
+        """测试本地文件与追加基准不一致时不应用增量包"""
+        target_dir = self.data_dir / 'stock-trading-data-pro'
+        target_dir.mkdir(parents=True, exist_ok=True)
+        base = b'date,close\n2025-02-03,1\n'
+        local = b'date,close\n2025-02-03,9\n'
+        (target_dir / 'data.csv').write_bytes(local)
+        
+        delta_path = self._write_append_delta(base, b'2025-02-04,2\n')
+        
+        self.assertFalse(self.client._apply_delta(delta_path, target_dir))
+        self.assertEqual((target_dir / 'data.csv').read_bytes(), local)
+    
+    def test_apply_delta_failure_leaves_dataset_untouched(self):
+        """测试增量包应用到一半失败时数据目录保持原样（修改只发生在暂存目录）"""
+        target_dir = self.data_dir / 'stock-trading-data-pro'
+        target_dir.mkdir(parents=True, exist_ok=True)
+        base = b'date,close\n2025-02-03,1\n'
+        (target_dir / 'data.csv').write_bytes(base)
+        (target_dir / 'changed.csv').write_text('v1')
+        
+        delta_path = self._write_append_delta(base, b'2025-02-04,2\n')
+        with zipfile.ZipFile(delta_path, 'a') as zf:
+            zf.writestr('changed.csv', 'v2')
+        
+        # 成员已解压到暂存目录之后、追加补丁写入之前失败
+        with patch.object(DataSyncClient, '_detach', side_effect=OSError('disk full')):
+            self.assertFalse(self.client._apply_delta(delta_path, target_dir))
+        
+        self.assertEqual((target_dir / 'changed.csv').read_text(), 'v1')
+        self.assertEqual((target_dir / 'data.csv').read_bytes(), base)
+        self.assertEqual(sorted(p.name for p in self.data_dir.iterdir()), ['stock-trading-data-pro'])
+    
+    @patch('sync_client.http.client.HTTPSConnection')
+    def test_download_delta_404_is_not_an_error(self, mock_https_connection):
+        """测试服务端没有增量包（404）时只记录 info 日志"""
+        mock_response = Mock()
+        mock_response.status = 404
+        mock_conn = Mock()
+        mock_conn.getresponse.return_value = mock_response
+        mock_https_connection.return_value = mock_conn
+        
+        output_path = self.cache_dir / 'delta.zip'
+        with self.assertLogs(self.client.logger, 'INFO') as logs:
+            self.assertFalse(self.client._download_delta('stock-trading-data-pro', '20250203_160000', output_path))
+        self.assertFalse(any(record.levelname == 'ERROR' for record in logs.records))
+        self.assertFalse(output_path.exists())
+    
+    @patch.object(DataSyncClient, '_fetch_datasets')
+    @patch.object(DataSyncClient, '_download_delta')
+    @patch.object(DataSyncClient, '_download_package')
+    def test_sync_dataset_uses_delta(self, mock_download, mock_download_delta, mock_fetch):
+        """测试本地已有上一版本时优先下载增量包"""
+        mock_fetch.return_value = [
+            {
+                'name': 'stock-trading-data-pro',
+                'last_updated': '2025-02-04T20:15:00Z',
+                'version': '20250204_160000',
+                'package_ready': True
+            }
+        ]
+        self.client.sync_state = {
+            'stock-trading-data-pro': '2025-02-03T20:15:00Z',
+            '_versions': {'stock-trading-data-pro': '20250203_160000'}
+        }
+        (self.data_dir / 'stock-trading-data-pro').mkdir(parents=True, exist_ok=True)
+        
+        def fake_delta(dataset_name, base_version, output_path):
+            with zipfile.ZipFile(output_path, 'w') as zf:
+                zf.writestr('new.csv', 'new')
+                zf.writestr('__delta__.json', json.dumps({'deleted': []}))
+            return True
+        mock_download_delta.side_effect = fake_delta
+        
+        result = self.client.sync_dataset('stock-trading-data-pro')
+        
+        self.assertTrue(result.success)
+        mock_download_delta.assert_called_once()
+        self.assertEqual(mock_download_delta.call_args[0][1], '20250203_160000')
+        mock_download.assert_not_called()
+        
+        state = self.client._load_sync_state()
+        self.assertEqual(state['_versions']['stock-trading-data-pro'], '20250204_160000')
+    
     @patch.object(DataSyncClient, '_fetch_datasets')
     @patch.object(DataSyncClient, '_download_package')
     @patch.object(DataSyncClient, '_extract_package')
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+基准测试 - 打包期间的 API 延迟：进程内打包 vs 工作进程打包
+
+当前进程运行 DataHubServer（threaded 模式），同时在后台反复打包一批模拟 CSV：
+- thread: 与调度器默认行为相同，在服务进程的线程中调用 Packager.package
+- process: 通过 WorkerPool 在独立的工作进程中打包（server.worker_processes）
+另起一个客户端进程持续请求 /api/datasets，统计打包期间的延迟分位数。
+多核机器上差异最明显；单核时两者都要与打包争抢 CPU。
+
+运行:
+    python benchmarks/bench_api_latency.py
+    python benchmarks/bench_api_latency.py --files 1000 --rows 2000 --seconds 10
+"""
+
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import http.client
+import multiprocessing
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from http_server import DataHubServer
+from packager import Packager
+from worker_pool import WorkerPool
+from bench_packager_workers import _make_dataset
+
+
+def _client(port, stop, result):
+    """客户端进程：持续请求 /api/datasets，回报每次请求的耗时（毫秒）"""
+    latencies = []
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.request('GET', '/api/datasets')
+        conn.getresponse().read()
+        latencies.append((time.perf_counter() - start) * 1000)
+    conn.close()
+    result.put(latencies)
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)] if ordered else 0.0
+
+
+def run(mode, config, data_dir, port, seconds):
+    """打包 seconds 秒，返回 (打包次数, 请求数, p50, p99, max)"""
+    ctx = multiprocessing.get_context('spawn')
+    stop = ctx.Event()
+    result = ctx.Queue()
+    cache_dir = config['server']['cache_dir']
+
+    if mode == 'process':
+        pool = WorkerPool({'data_root': str(data_dir.parent), 'datasets': [], 'cache_dir': cache_dir, 'keep_versions': 1})
+        package = lambda: pool.package('bench', str(data_dir))
+        package()  # 预热：启动工作进程
+    else:
+        pool = None
+        packager = Packager(cache_dir, keep_versions=1)
+        package = lambda: packager.package('bench', str(data_dir))
+
+    packages = 0
+    done = threading.Event()
+
+    def packaging_loop():
+        nonlocal packages
+        while not done.is_set():
+            if not package()['success']:
+                raise RuntimeError('packaging failed')
+            packages += 1
+
+    client = ctx.Process(target=_client, args=(port, stop, result))
+    client.start()
+    time.sleep(0.5)
+    worker = threading.Thread(target=packaging_loop, daemon=True)
+    worker.start()
+    time.sleep(seconds)
+    stop.set()
+    latencies = result.get(timeout=60)
+    client.join(10)
+    done.set()
+    worker.join()
+    if pool is not None:
+        pool.shutdown()
+
+    return (
+        packages, len(latencies),
+        _percentile(latencies, 0.5), _percentile(latencies, 0.99), max(latencies, default=0.0)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='打包期间 API 延迟基准测试')
+    parser.add_argument('--files', type=int, default=300, help='CSV 文件数量')
+    parser.add_argument('--rows', type=int, default=2000, help='每个文件的行数')
+    parser.add_argument('--seconds', type=float, default=5.0, help='每种模式的测量时长')
+    parser.add_argument('--port', type=int, default=18181, help='监听端口')
+    args = parser.parse_args()
+
+    temp_dir = Path(tempfile.mkdtemp(prefix='bench_api_latency_'))
+    try:
+        data_dir = temp_dir / 'data' / 'bench'
+        data_dir.mkdir(parents=True)
+        total = _make_dataset(data_dir, args.files, args.rows)
+        cache_dir = temp_dir / 'cache'
+        cache_dir.mkdir()
+
+        config = {
+            'server': {
+                'host': '127.0.0.1',
+                'port': args.port,
+                'cache_dir': str(cache_dir),
+                'data_root': str(temp_dir / 'data'),
+                'mode': 'threaded'
+            },
+            'datasets': [{'name': 'bench', 'path': 'bench'}]
+        }
+        server = DataHubServer(config, {})
+        threading.Thread(target=server.server.serve_forever, daemon=True).start()
+
+        print(f"files={args.files} raw={total / 1024 ** 2:.1f}MB seconds={args.seconds}")
+        print(f"{'mode':<8} {'packages':>9} {'requests':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for mode in ('thread', 'process'):
+            packages, requests, p50, p99, worst = run(mode, config, data_dir, args.port, args.seconds)
+            print(f"{mode:<8} {packages:>9} {requests:>9} {p50:>8.2f} {p99:>8.2f} {worst:>8.2f}")
+        server.stop()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
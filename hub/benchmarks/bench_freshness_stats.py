@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+基准测试 - 新鲜度统计：逐文件 Python 循环 + 每个分位数一次排序 vs mtime_stats 向量化统计
+
+在随机生成的 mtime/大小数组（默认 100 万个文件）上计算新鲜比例、3 个分位数、
+按分钟直方图和总大小。安装了 NumPy 时 mtime_stats 使用 np.partition 等向量化实现，
+否则为标准库实现（此时主要节省的是重复排序）。
+
+运行:
+    python benchmarks/bench_freshness_stats.py
+    python benchmarks/bench_freshness_stats.py --files 5000000 --rounds 5
+"""
+
+import sys
+import time
+import random
+import argparse
+from array import array
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import mtime_stats
+
+PERCENTILES = (0.5, 0.85, 0.95)
+
+
+def legacy_stats(mtimes, sizes, cutoff):
+    """旧实现：逐个比较计数，每个分位数单独排序一次"""
+    fresh = sum(1 for mtime in mtimes if mtime > cutoff)
+    values = []
+    for q in PERCENTILES:
+        ordered = sorted(mtimes)
+        values.append(ordered[min(int(len(ordered) * q), len(ordered) - 1)])
+    histogram = Counter(int(m // 60) * 60 for m in mtimes if m > cutoff)
+    return fresh, values, len(histogram), sum(sizes)
+
+
+def vector_stats(mtimes, sizes, cutoff):
+    """新实现：mtime_stats"""
+    vector = mtime_stats.as_vector(mtimes)
+    fresh = mtime_stats.count_above(vector, cutoff)
+    values = mtime_stats.percentiles(vector, PERCENTILES)
+    histogram = mtime_stats.minute_histogram(vector, since=cutoff)
+    return fresh, values, len(histogram), mtime_stats.total(sizes)
+
+
+def _best_of(func, args, rounds):
+    best = None
+    result = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新鲜度统计基准测试')
+    parser.add_argument('--files', type=int, default=1000000, help='文件数量')
+    parser.add_argument('--rounds', type=int, default=3, help='每种实现的运行次数（取最快一次）')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    now = time.time()
+    mtimes = array('d', (now - rng.uniform(0, 3 * 86400) for _ in range(args.files)))
+    sizes = array('q', (rng.randint(1000, 10 ** 6) for _ in range(args.files)))
+    cutoff = now - 86400
+
+    legacy, legacy_result = _best_of(legacy_stats, (mtimes, sizes, cutoff), args.rounds)
+    fast, fast_result = _best_of(vector_stats, (mtimes, sizes, cutoff), args.rounds)
+    assert legacy_result == fast_result
+
+    print(f"files={args.files} numpy={mtime_stats.HAS_NUMPY}")
+    print(f"{'impl':<8} {'seconds':>10}")
+    print(f"{'legacy':<8} {legacy:>10.3f}")
+    print(f"{'vector':<8} {fast:>10.3f}")
+    print(f"speedup: {legacy / fast:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+基准测试 - 新鲜度检查的目录扫描：rglob + stat vs os.scandir 扫描器
+
+生成一个合成的数据目录树（默认 50 个子目录共 50k 个 CSV 文件），对比:
+- legacy: 旧实现，rglob("*.csv") 生成 Path 列表后逐个 stat()
+- scandir: fs_scanner.scan_tree，复用 DirEntry 的 stat，结果存为数组
+
+运行:
+    python benchmarks/bench_fs_scanner.py
+    python benchmarks/bench_fs_scanner.py --files 200000 --dirs 100 --rounds 5
+"""
+
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from fs_scanner import scan_tree
+
+
+def _make_tree(root: Path, files: int, dirs: int) -> None:
+    """生成 dirs 个子目录、共 files 个小 CSV 文件"""
+    per_dir = max(1, files // dirs)
+    for d in range(dirs):
+        sub = root / f'period_{d:03d}'
+        sub.mkdir(parents=True)
+        for i in range(per_dir):
+            (sub / f'sh{600000 + i}.csv').write_bytes(b'date,close\n2024-01-15,1\n')
+
+
+def legacy_scan(root: Path):
+    """旧实现：rglob 收集 Path 后逐个 stat"""
+    files = list(root.rglob('*.csv'))
+    mtimes = []
+    for file_path in files:
+        try:
+            mtimes.append(file_path.stat().st_mtime)
+        except OSError:
+            continue
+    return len(files), mtimes
+
+
+def scandir_scan(root: Path):
+    """新实现：fs_scanner.scan_tree"""
+    result = scan_tree(str(root))
+    return len(result), result.mtimes
+
+
+def _best_of(func, root: Path, rounds: int):
+    best = None
+    count = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        count, _ = func(root)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='目录扫描基准测试')
+    parser.add_argument('--files', type=int, default=50000, help='CSV 文件总数')
+    parser.add_argument('--dirs', type=int, default=50, help='子目录数量')
+    parser.add_argument('--rounds', type=int, default=3, help='每种实现的运行次数（取最快一次）')
+    args = parser.parse_args()
+
+    temp_dir = Path(tempfile.mkdtemp(prefix='bench_fs_scanner_'))
+    try:
+        root = temp_dir / 'data'
+        _make_tree(root, args.files, args.dirs)
+
+        # 预热目录缓存，避免第一次运行吃亏
+        scan_tree(str(root))
+
+        legacy, legacy_count = _best_of(legacy_scan, root, args.rounds)
+        fast, fast_count = _best_of(scandir_scan, root, args.rounds)
+        assert legacy_count == fast_count
+
+        print(f"files={fast_count} dirs={args.dirs}")
+        print(f"{'impl':<10} {'seconds':>10} {'files/s':>12}")
+        print(f"{'legacy':<10} {legacy:>10.3f} {legacy_count / legacy:>12.0f}")
+        print(f"{'scandir':<10} {fast:>10.3f} {fast_count / fast:>12.0f}")
+        print(f"speedup: {legacy / fast:.2f}x")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
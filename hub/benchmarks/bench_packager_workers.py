@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+基准测试 - 打包：不同并行压缩线程数的耗时对比
+
+生成一批模拟日线行情的 CSV 文件，分别以 1/2/4/8 个压缩线程打包，
+统计墙钟时间和相对单线程的加速比。--large-mb 额外生成一个大文件，
+用于观察超过 --block-threshold-mb 后的切块并行压缩。
+
+运行:
+    python benchmarks/bench_packager_workers.py
+    python benchmarks/bench_packager_workers.py --files 2000 --rows 2000 --workers 1 4 8
+    python benchmarks/bench_packager_workers.py --files 0 --large-mb 512 --block-threshold-mb 64
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from packager import Packager
+
+
+def _make_dataset(data_dir: Path, files: int, rows: int) -> int:
+    """生成 files 个各 rows 行的 CSV 文件，返回总字节数"""
+    rng = random.Random(42)
+    total = 0
+    for i in range(files):
+        price = 10.0
+        lines = ['candle_end_time,open,high,low,close,volume']
+        for day in range(rows):
+            price *= 1 + rng.uniform(-0.05, 0.05)
+            lines.append(
+                f'2015-01-01+{day},{price:.2f},{price * 1.02:.2f},'
+                f'{price * 0.98:.2f},{price:.2f},{rng.randint(1000, 10 ** 7)}'
+            )
+        path = data_dir / f'sh{600000 + i}.csv'
+        path.write_text('\n'.join(lines) + '\n')
+        total += path.stat().st_size
+    return total
+
+
+def _make_large_file(data_dir: Path, size_mb: int) -> int:
+    """生成一个约 size_mb MB 的大 CSV 文件，返回字节数"""
+    rng = random.Random(7)
+    path = data_dir / 'large_fin_data.csv'
+    with open(path, 'w') as f:
+        f.write('report_date,code,revenue,net_profit,total_assets\n')
+        while f.tell() < size_mb * 1024 * 1024:
+            f.write(''.join(
+                f'2015-03-31,{rng.randint(600000, 605000)},{rng.uniform(1e6, 1e10):.2f},'
+                f'{rng.uniform(-1e8, 1e9):.2f},{rng.uniform(1e7, 1e11):.2f}\n'
+                for _ in range(1000)
+            ))
+    return path.stat().st_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='并行压缩打包基准测试')
+    parser.add_argument('--files', type=int, default=500, help='CSV 文件数量')
+    parser.add_argument('--rows', type=int, default=2000, help='每个文件的行数')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='压缩线程数列表')
+    parser.add_argument('--large-mb', type=int, default=0, help='额外生成的大文件大小 (MB)，0 表示不生成')
+    parser.add_argument('--block-threshold-mb', type=int, default=64, help='切块并行压缩的文件大小阈值 (MB)')
+    parser.add_argument('--rounds', type=int, default=3, help='每种线程数的打包次数（取最快一次）')
+    args = parser.parse_args()
+
+    temp_dir = Path(tempfile.mkdtemp(prefix='bench_packager_'))
+    try:
+        data_dir = temp_dir / 'data'
+        data_dir.mkdir()
+        total = _make_dataset(data_dir, args.files, args.rows)
+        if args.large_mb:
+            total += _make_large_file(data_dir, args.large_mb)
+
+        print(f"files={args.files} raw={total / 1024 ** 2:.1f}MB cpus={os.cpu_count()}")
+        print(f"{'workers':<8} {'seconds':>10} {'MB/s':>10} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            best = None
+            for round_index in range(args.rounds):
+                cache_dir = temp_dir / f'cache_{workers}_{round_index}'
+                packager = Packager(
+                    str(cache_dir), keep_versions=1, workers=workers,
+                    block_threshold=args.block_threshold_mb * 1024 * 1024
+                )
+                start = time.perf_counter()
+                result = packager.package('bench', str(data_dir))
+                elapsed = time.perf_counter() - start
+                if not result['success']:
+                    raise RuntimeError(result['error'])
+                shutil.rmtree(cache_dir, ignore_errors=True)
+                best = elapsed if best is None else min(best, elapsed)
+
+            baseline = baseline or best
+            print(f"{workers:<8} {best:>10.2f} {total / best / 1024 ** 2:>10.1f} {baseline / best:>7.2f}x")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
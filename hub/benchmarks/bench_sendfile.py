@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+基准测试 - 数据包下载：sendfile 零拷贝 vs 64KB 分块复制
+
+在子进程中启动 DataHubServer，由当前进程反复下载同一个数据包，
+统计吞吐量以及服务端进程每 GB 消耗的 CPU 时间。
+
+运行:
+    python benchmarks/bench_sendfile.py
+    python benchmarks/bench_sendfile.py --size-mb 512 --rounds 4
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import http.client
+import multiprocessing
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from http_server import DataHubServer
+
+
+def _serve(config, use_sendfile, requests, ready, result):
+    """子进程：处理固定数量的请求后回报服务端 CPU 时间"""
+    config = dict(config)
+    config['server'] = dict(config['server'], sendfile=use_sendfile, mode='single')
+    server = DataHubServer(config, {})
+    ready.set()
+
+    start = os.times()
+    for _ in range(requests):
+        server.run_once()
+    end = os.times()
+    server.server.server_close()
+
+    result.put((end.user - start.user) + (end.system - start.system))
+
+
+def _download(port, path):
+    """下载一次数据包并丢弃内容，返回字节数"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    conn.request('GET', path)
+    response = conn.getresponse()
+    buf = bytearray(1024 * 1024)
+    view = memoryview(buf)
+    received = 0
+    while True:
+        n = response.readinto(view)
+        if not n:
+            break
+        received += n
+    conn.close()
+    return received
+
+
+def run(use_sendfile, config, port, rounds):
+    """运行一组下载，返回 (吞吐量 MB/s, 服务端 CPU 秒/GB)"""
+    ctx = multiprocessing.get_context('spawn')
+    ready = ctx.Event()
+    result = ctx.Queue()
+    proc = ctx.Process(target=_serve, args=(config, use_sendfile, rounds, ready, result))
+    proc.start()
+    ready.wait(30)
+    time.sleep(0.2)
+
+    total = 0
+    wall_start = time.perf_counter()
+    for _ in range(rounds):
+        total += _download(port, '/package/bench.zip')
+    wall = time.perf_counter() - wall_start
+
+    cpu = result.get(timeout=60)
+    proc.join(10)
+
+    gb = total / (1024 ** 3)
+    return total / wall / (1024 ** 2), cpu / gb
+
+
+def main():
+    parser = argparse.ArgumentParser(description='sendfile 下载基准测试')
+    parser.add_argument('--size-mb', type=int, default=256, help='数据包大小 (MB)')
+    parser.add_argument('--rounds', type=int, default=4, help='每种模式的下载次数')
+    parser.add_argument('--port', type=int, default=18180, help='监听端口')
+    args = parser.parse_args()
+
+    temp_dir = Path(tempfile.mkdtemp(prefix='bench_sendfile_'))
+    try:
+        cache_dir = temp_dir / 'cache'
+        cache_dir.mkdir()
+        with open(cache_dir / 'bench_20240101_000000.zip', 'wb') as f:
+            block = os.urandom(1024 * 1024)
+            for _ in range(args.size_mb):
+                f.write(block)
+
+        config = {
+            'server': {
+                'host': '127.0.0.1',
+                'port': args.port,
+                'cache_dir': str(cache_dir),
+                'data_root': str(temp_dir)
+            },
+            'datasets': []
+        }
+
+        print(f"package={args.size_mb}MB rounds={args.rounds}")
+        print(f"{'mode':<10} {'MB/s':>10} {'CPU s/GB':>10}")
+        for label, use_sendfile in (('copy', False), ('sendfile', True)):
+            throughput, cpu_per_gb = run(use_sendfile, config, args.port, args.rounds)
+            print(f"{label:<10} {throughput:>10.1f} {cpu_per_gb:>10.3f}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
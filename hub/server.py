@@ -223,7 +223,7 @@ def main() -> int:
         
         # 启动 HTTP 服务器（主线程，阻塞）
         # 传递状态管理器的所有状态
-        server = DataHubServer(config, state_manager.get_all())
+        server = DataHubServer(config, state_manager.get_all(), catalog=scheduler.catalog, jobs=scheduler.jobs, packager=scheduler.packager)
         
         # 更新服务器的状态引用（调度器会持续更新状态）
         # 使用一个定时更新机制保持状态同步
@@ -8,6 +8,11 @@ from .state_manager import StateManager
 from .scheduler import Scheduler
 from .freshness_checker import FreshnessChecker
 from .calendar_reader import CalendarReader
+from .dataset_catalog import DatasetCatalog
+from .async_server import AsyncHTTPEngine
+from .fs_scanner import ScanResult, scan_tree
+from .file_catalog import FileCatalog
+from .fs_watcher import InotifyWatcher
 
 __version__ = "1.0.0"
 __all__ = [
@@ -17,5 +22,11 @@ __all__ = [
     "StateManager", 
     "Scheduler", 
     "FreshnessChecker",
-    "CalendarReader"
+    "CalendarReader",
+    "DatasetCatalog",
+    "AsyncHTTPEngine",
+    "ScanResult",
+    "scan_tree",
+    "FileCatalog",
+    "InotifyWatcher"
 ]
\ No newline at end of file
@@ -0,0 +1,458 @@
+"""
+AsyncHTTPEngine - 基于 asyncio 的 DataHub HTTP 引擎
+与 DataHubHandler 提供相同的端点，使用 loop.sendfile 发送数据包，支持 keep-alive 和空闲超时
+"""
+
+import json
+import socket
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from http import HTTPStatus
+from typing import Optional, Dict, Any, Tuple
+
+from dataset_catalog import DatasetCatalog
+from http_server import locate_package, locate_package_version, locate_delta, locate_manifest, parse_range, guess_content_type
+
+logger = logging.getLogger(__name__)
+
+# 发送数据包时每次 sendfile 的字节数：每一段都要在 idle_timeout 内写完
+SEND_CHUNK_SIZE = 256 * 1024
+
+
+class AsyncHTTPEngine:
+    """
+    asyncio HTTP 引擎
+
+    端点与 DataHubHandler 相同: /health, /api/datasets, /api/jobs, /api/datasets/{dataset}/manifest,
+    /package/{dataset}.zip, /package/{dataset}/{version}.zip, /delta/{dataset}/{base_version}.zip
+
+    - 每个连接是一个协程，空闲的轮询连接只占用一个 socket 和少量内存
+    - 读取请求头和写出响应都有空闲超时（写出按段计时），超时后关闭连接
+    - 数据包通过 loop.sendfile 发送（不支持时 asyncio 自动回退到分块读写）
+
+    对外接口与 socketserver.BaseServer 保持一致（serve_forever / shutdown /
+    server_close / handle_request / server_address），由 DataHubServer 按
+    server.mode: asyncio 选用。配置、状态和元数据目录从处理器类属性读取，
+    与线程模式共享同一份。
+    """
+
+    # 请求头最大长度
+    max_header_size = 64 * 1024
+
+    def __init__(
+        self,
+        server_address: Tuple[str, int],
+        handler_class,
+        idle_timeout: float = 15.0,
+        max_connections: int = 1024
+    ):
+        """
+        初始化引擎并绑定监听端口
+
+        Args:
+            server_address: (host, port)
+            handler_class: 提供 config / dataset_states / catalog / jobs / use_sendfile 的处理器类
+            idle_timeout: 连接空闲超时（秒），等待下一个请求头、或写出一段响应的最长时间
+            max_connections: 最大并发连接数，超出时返回 503
+        """
+        self.handler_class = handler_class
+        self.idle_timeout = idle_timeout
+        self.max_connections = max_connections
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            self.socket.bind(server_address)
+            self.socket.listen(128)
+        except OSError:
+            self.socket.close()
+            raise
+        self.socket.setblocking(False)
+        self.server_address = self.socket.getsockname()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._shutdown_request = threading.Event()
+        self._stopped = threading.Event()
+        self._stopped.set()
+        self._connections = 0
+        self._requests_handled = 0
+
+    # ------------------------------------------------------------------
+    # BaseServer 兼容接口
+    # ------------------------------------------------------------------
+
+    def serve_forever(self) -> None:
+        """在当前线程运行事件循环，直到 shutdown() 被调用"""
+        self._run(max_requests=None)
+
+    def handle_request(self) -> None:
+        """处理单个请求后返回（用于测试）"""
+        self._run(max_requests=1)
+
+    def shutdown(self) -> None:
+        """停止事件循环并等待 serve_forever 返回"""
+        self._shutdown_request.set()
+        loop, stop = self._loop, self._stop
+        if loop is not None and stop is not None:
+            try:
+                loop.call_soon_threadsafe(stop.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+        self._stopped.wait()
+
+    def server_close(self) -> None:
+        """关闭监听 socket"""
+        self.socket.close()
+
+    # ------------------------------------------------------------------
+    # 事件循环
+    # ------------------------------------------------------------------
+
+    def _run(self, max_requests: Optional[int]) -> None:
+        """创建事件循环并运行服务"""
+        self._stopped.clear()
+        loop = asyncio.new_event_loop()
+        try:
+            self._loop = loop
+            loop.run_until_complete(self._serve(max_requests))
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            self._loop = None
+            self._stop = None
+            loop.close()
+            self._shutdown_request.clear()
+            self._stopped.set()
+
+    async def _serve(self, max_requests: Optional[int]) -> None:
+        """接受连接直到收到停止信号或处理完指定数量的请求"""
+        self._stop = asyncio.Event()
+        if self._shutdown_request.is_set():
+            self._stop.set()
+        self._max_requests = max_requests
+        self._requests_handled = 0
+
+        # 使用监听 socket 的副本：server.close() 会关闭传入的 socket，
+        # 而原始 socket 需要保留到 server_close()，以便多次调用 handle_request
+        server = await asyncio.start_server(
+            self._handle_connection,
+            sock=self.socket.dup(),
+            limit=self.max_header_size
+        )
+        try:
+            await self._stop.wait()
+        finally:
+            server.close()
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    # 连接处理
+    # ------------------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """处理一个连接上的所有请求（keep-alive）"""
+        peer = writer.get_extra_info('peername')
+        client = peer[0] if peer else '-'
+
+        self._connections += 1
+        try:
+            if self._connections > self.max_connections:
+                logger.warning(f"Too many connections, rejecting {client}")
+                await self._send_json(writer, 503, {'error': 'Too many connections'}, keep_alive=False)
+                return
+
+            while True:
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b'\r\n\r\n'), timeout=self.idle_timeout
+                    )
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._send_json(writer, 431, {'error': 'Request header too large'}, keep_alive=False)
+                    break
+
+                request = self._parse_request(head)
+                if request is None:
+                    await self._send_json(writer, 400, {'error': 'Bad request'}, keep_alive=False)
+                    break
+
+                method, path, version, headers = request
+                keep_alive = self._wants_keep_alive(version, headers)
+
+                try:
+                    status = await self._dispatch(writer, method, path, headers, keep_alive)
+                except (ConnectionError, asyncio.CancelledError):
+                    raise
+                except Exception as e:
+                    logger.exception("处理请求时发生错误")
+                    status = 500
+                    await self._send_json(
+                        writer, 500, {'error': 'Internal server error', 'message': str(e)}, keep_alive=False
+                    )
+                    keep_alive = False
+
+                logger.info(f'{client} - "{method} {path} {version}" {status}')
+                self._request_done()
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections -= 1
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    def _request_done(self) -> None:
+        """记录已处理的请求数，达到 handle_request 的上限时停止"""
+        self._requests_handled += 1
+        if self._max_requests is not None and self._requests_handled >= self._max_requests:
+            self._stop.set()
+
+    @staticmethod
+    def _parse_request(head: bytes) -> Optional[Tuple[str, str, str, Dict[str, str]]]:
+        """解析请求行和请求头"""
+        try:
+            lines = head.decode('iso-8859-1').split('\r\n')
+            method, path, version = lines[0].split(' ', 2)
+        except ValueError:
+            return None
+
+        if not version.startswith('HTTP/'):
+            return None
+
+        headers = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, sep, value = line.partition(':')
+            if not sep:
+                return None
+            headers[name.strip().lower()] = value.strip()
+
+        return method, path, version, headers
+
+    @staticmethod
+    def _wants_keep_alive(version: str, headers: Dict[str, str]) -> bool:
+        """根据协议版本和 Connection 头判断是否保持连接"""
+        connection = headers.get('connection', '').lower()
+        if version == 'HTTP/1.1':
+            return connection != 'close'
+        return connection == 'keep-alive'
+
+    async def _dispatch(
+        self,
+        writer: asyncio.StreamWriter,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        keep_alive: bool
+    ) -> int:
+        """路由分发，返回响应状态码"""
+        if method != 'GET':
+            return await self._send_json(
+                writer, 501, {'error': f'Unsupported method ({method!r})'}, keep_alive
+            )
+
+        if path == '/health':
+            return await self._send_json(writer, 200, {'status': 'ok'}, keep_alive)
+
+        if path == '/api/datasets':
+            return await self._handle_datasets(writer, keep_alive)
+
+        if path == '/api/jobs':
+            jobs = self.handler_class.jobs
+            return await self._send_json(writer, 200, {'jobs': jobs.jobs() if jobs is not None else []}, keep_alive)
+
+        loop = asyncio.get_running_loop()
+        if path.startswith('/api/datasets/') and path.endswith('/manifest'):
+            dataset_name = path[14:-9]
+            return await self._handle_manifest(writer, dataset_name, keep_alive)
+
+        if path.startswith('/package/') and path.endswith('.zip'):
+            dataset_name, _, version = path[9:-4].partition('/')
+            if version:
+                located = await loop.run_in_executor(
+                    None, locate_package_version, self.handler_class.config, dataset_name, version,
+                    self.handler_class.packager
+                )
+            else:
+                located = await loop.run_in_executor(
+                    None, locate_package, self.handler_class.config, dataset_name
+                )
+            return await self._handle_package(writer, located, headers, keep_alive)
+
+        if path.startswith('/delta/') and path.endswith('.zip'):
+            dataset_name, _, base_version = path[7:-4].partition('/')
+            located = await loop.run_in_executor(
+                None, locate_delta, self.handler_class.config, dataset_name, base_version
+            )
+            return await self._handle_package(writer, located, headers, keep_alive)
+
+        return await self._send_json(writer, 404, {'error': 'Not found', 'path': path}, keep_alive)
+
+    async def _handle_datasets(self, writer: asyncio.StreamWriter, keep_alive: bool) -> int:
+        """处理数据集列表请求（直接发送元数据目录缓存的响应体）"""
+        handler = self.handler_class
+        catalog = handler.catalog
+        if catalog is None:
+            catalog = handler.catalog = DatasetCatalog(handler.config)
+
+        # 首次请求时 get_payload 可能要扫描数据目录，放到线程池中执行，不阻塞事件循环
+        loop = asyncio.get_running_loop()
+        body = await loop.run_in_executor(None, catalog.get_payload, handler.dataset_states)
+        return await self._send_response(writer, 200, [
+            ('Content-Type', 'application/json; charset=utf-8'),
+            ('Access-Control-Allow-Origin', '*'),
+        ], body, keep_alive)
+
+    async def _handle_manifest(self, writer: asyncio.StreamWriter, dataset_name: str, keep_alive: bool) -> int:
+        """处理清单请求（返回最新包的清单文件内容）"""
+        loop = asyncio.get_running_loop()
+        status, path, error = await loop.run_in_executor(
+            None, locate_manifest, self.handler_class.config, dataset_name
+        )
+        if status != 200:
+            return await self._send_json(writer, status, {'error': error}, keep_alive)
+
+        body = await loop.run_in_executor(None, path.read_bytes)
+        return await self._send_response(writer, 200, [
+            ('Content-Type', 'application/json; charset=utf-8'),
+            ('Access-Control-Allow-Origin', '*'),
+        ], body, keep_alive)
+
+    async def _handle_package(
+        self,
+        writer: asyncio.StreamWriter,
+        located: Tuple[int, Optional[Path], Optional[str]],
+        headers: Dict[str, str],
+        keep_alive: bool
+    ) -> int:
+        """处理数据包/增量包下载请求，支持 Range"""
+        loop = asyncio.get_running_loop()
+        status, zip_path, error = located
+        if status != 200:
+            return await self._send_json(writer, status, {'error': error}, keep_alive)
+
+        f = await loop.run_in_executor(None, open, zip_path, 'rb')
+        try:
+            file_size = await loop.run_in_executor(None, lambda: Path(zip_path).stat().st_size)
+            response_headers = [
+                ('Content-Type', guess_content_type(str(zip_path))),
+                ('Accept-Ranges', 'bytes'),
+                ('Content-Disposition', f'attachment; filename="{zip_path.name}"'),
+                ('Access-Control-Allow-Origin', '*'),
+            ]
+
+            range_header = headers.get('range')
+            if range_header:
+                range_status, start, end = parse_range(range_header, file_size)
+                if range_status == 400:
+                    return await self._send_json(writer, 400, {'error': 'Invalid Range header'}, keep_alive)
+                if range_status == 416:
+                    return await self._send_response(writer, 416, [
+                        ('Content-Range', f'bytes */{file_size}'),
+                    ], b'', keep_alive)
+                status = 206
+                response_headers.append(('Content-Range', f'bytes {start}-{end}/{file_size}'))
+            else:
+                status, start, end = 200, 0, file_size - 1
+
+            count = end - start + 1
+            await self._send_response(writer, status, response_headers, None, keep_alive, content_length=count)
+            await self._send_file_range(writer, f, start, count)
+        finally:
+            f.close()
+
+        logger.info(f"文件发送完成: {zip_path}, bytes={start}-{end}")
+        return status
+
+    async def _drain(self, writer: asyncio.StreamWriter, awaitable=None) -> None:
+        """
+        等待写出完成，超过 idle_timeout 时中止连接
+        
+        Raises:
+            ConnectionAbortedError: 客户端在 idle_timeout 内没有读走数据
+        """
+        try:
+            await asyncio.wait_for(awaitable if awaitable is not None else writer.drain(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            writer.transport.abort()
+            raise ConnectionAbortedError(f"Write timed out after {self.idle_timeout}s")
+
+    async def _send_file_range(self, writer: asyncio.StreamWriter, f, offset: int, count: int) -> None:
+        """发送文件区间，优先使用 loop.sendfile（按 SEND_CHUNK_SIZE 分段，每段受写超时约束）"""
+        if count <= 0:
+            return
+
+        await self._drain(writer)
+        loop = asyncio.get_running_loop()
+
+        if self.handler_class.use_sendfile and writer.get_extra_info('sslcontext') is None:
+            end = offset + count
+            while offset < end:
+                size = min(SEND_CHUNK_SIZE, end - offset)
+                await self._drain(writer, loop.sendfile(writer.transport, f, offset, size))
+                offset += size
+            return
+
+        f.seek(offset)
+        remaining = count
+        while remaining > 0:
+            chunk = await loop.run_in_executor(None, f.read, min(64 * 1024, remaining))
+            if not chunk:
+                break
+            writer.write(chunk)
+            await self._drain(writer)
+            remaining -= len(chunk)
+
+    async def _send_json(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        data: Dict[str, Any],
+        keep_alive: bool
+    ) -> int:
+        """发送 JSON 响应"""
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        return await self._send_response(writer, status, [
+            ('Content-Type', 'application/json; charset=utf-8'),
+            ('Access-Control-Allow-Origin', '*'),
+        ], body, keep_alive)
+
+    async def _send_response(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        headers,
+        body: Optional[bytes],
+        keep_alive: bool,
+        content_length: Optional[int] = None
+    ) -> int:
+        """写出状态行、响应头和（可选的）响应体"""
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ''
+
+        if content_length is None:
+            content_length = len(body) if body else 0
+
+        lines = [f'HTTP/1.1 {status} {reason}']
+        lines.extend(f'{name}: {value}' for name, value in headers)
+        lines.append(f'Content-Length: {content_length}')
+        lines.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+        head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1', 'strict')
+
+        writer.write(head + body if body else head)
+        await self._drain(writer)
+        return status
@@ -0,0 +1,96 @@
+"""
+CsvTail - 从 CSV 文件末尾读取最后一行的日期
+只从文件末尾 seek 读取几 KB，不解析整个文件；批量读取由线程池并行执行
+"""
+
+import os
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+# 默认从文件末尾读取的字节数
+TAIL_BYTES = 4096
+
+# 最后一行超过 TAIL_BYTES 时逐步加倍读取，直到该上限
+MAX_TAIL_BYTES = 64 * 1024
+
+# 每个线程任务处理的文件数，减少任务调度开销
+BATCH_SIZE = 256
+
+# 日期：2024-01-15 / 2024/01/15 / 20240115（字节匹配，GBK 和 UTF-8 文件都适用）
+_DATE_PATTERN = re.compile(rb'(?<!\d)(\d{4})[-/]?(\d{2})[-/]?(\d{2})(?!\d)')
+
+
+def normalize_date(value: str) -> Optional[str]:
+    """把 YYYY-MM-DD / YYYYMMDD / YYYY/MM/DD 规范为 YYYY-MM-DD，无法识别时返回 None"""
+    match = _DATE_PATTERN.search(value.encode('ascii', 'ignore'))
+    if match is None:
+        return None
+    return b'-'.join(match.groups()).decode('ascii')
+
+
+def _last_line(f, size: int) -> bytes:
+    """读取文件最后一个非空行"""
+    tail = TAIL_BYTES
+    while True:
+        start = max(0, size - tail)
+        f.seek(start)
+        data = f.read(size - start).rstrip(b'\r\n')
+        newline = data.rfind(b'\n')
+        if newline >= 0 or start == 0 or tail >= MAX_TAIL_BYTES:
+            return data[newline + 1:]
+        tail *= 2
+
+
+def read_last_date(path: str) -> Optional[str]:
+    """
+    读取 CSV 最后一行中的第一个日期
+
+    Args:
+        path: CSV 文件路径
+
+    Returns:
+        YYYY-MM-DD 格式的日期，文件为空、无法读取或最后一行没有日期时返回 None
+    """
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return None
+            line = _last_line(f, size)
+    except OSError as e:
+        logger.debug(f"无法读取文件末尾 {path}: {e}")
+        return None
+
+    match = _DATE_PATTERN.search(line)
+    if match is None:
+        return None
+    return b'-'.join(match.groups()).decode('ascii')
+
+
+def _read_batch(paths: Sequence[str]) -> List[Optional[str]]:
+    return [read_last_date(path) for path in paths]
+
+
+def read_last_dates(paths: Sequence[str], workers: int = 8) -> List[Optional[str]]:
+    """
+    批量读取多个 CSV 最后一行的日期
+
+    文件按 BATCH_SIZE 分批交给线程池（读文件时释放 GIL），结果顺序与 paths 一致
+
+    Args:
+        paths: CSV 文件路径列表
+        workers: 线程数，1 表示在当前线程逐个读取
+    """
+    if workers <= 1 or len(paths) <= BATCH_SIZE:
+        return _read_batch(paths)
+
+    batches = [paths[i:i + BATCH_SIZE] for i in range(0, len(paths), BATCH_SIZE)]
+    dates: List[Optional[str]] = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='csv-tail') as executor:
+        for batch_dates in executor.map(_read_batch, batches):
+            dates.extend(batch_dates)
+    return dates
@@ -0,0 +1,239 @@
+"""
+DatasetCatalog - 数据集元数据目录
+在内存中维护每个数据集的文件统计和包信息，并缓存预序列化的 /api/datasets 响应
+"""
+
+import copy
+import json
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, Dict, List, Any
+
+from fs_scanner import ScanResult, scan_tree
+from file_catalog import FileCatalog
+from packager import package_version
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetCatalog:
+    """
+    数据集元数据目录
+
+    功能:
+    1. 由 Scheduler 扫描或 Packager 发布时更新数据集元数据
+    2. HTTP 处理器直接从内存读取，不再每次请求遍历数据目录
+    3. 缓存序列化后的 JSON 响应体，只在元数据或状态变化时重建
+    4. 可选接入持久化的 FileCatalog，与新鲜度检查和打包共享文件记录
+    """
+
+    def __init__(self, config: Dict[str, Any], file_catalog: Optional[FileCatalog] = None):
+        """
+        初始化元数据目录
+
+        Args:
+            config: 配置字典，使用 datasets 和 server.data_root / server.cache_dir
+            file_catalog: 共享的文件目录，None 表示直接扫描磁盘
+        """
+        server_config = config.get('server', {})
+        self.datasets_config: List[Dict[str, Any]] = config.get('datasets', [])
+        self.data_root = server_config.get('data_root', '')
+        self.cache_dir = server_config.get('cache_dir', '.cache')
+        self.file_catalog = file_catalog
+
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._payload: Optional[bytes] = None
+        self._payload_states: Optional[Dict[str, Any]] = None
+
+    def _dataset_path(self, path: str) -> Path:
+        """获取数据集目录的完整路径"""
+        return Path(self.data_root) / path if self.data_root else Path(path)
+
+    def _dataset_config(self, name: str) -> Optional[Dict[str, Any]]:
+        """按名称查找数据集配置"""
+        for dataset_config in self.datasets_config:
+            if dataset_config.get('name') == name:
+                return dataset_config
+        return None
+
+    @staticmethod
+    def _scan_directory(data_path: Path) -> Dict[str, Any]:
+        """
+        遍历数据目录，统计文件数量、总大小和最新修改时间
+
+        使用 fs_scanner 复用目录项中的 stat 信息
+        """
+        return DatasetCatalog._summarize(scan_tree(str(data_path), suffix=None))
+
+    @staticmethod
+    def _summarize(scan: ScanResult) -> Dict[str, Any]:
+        """由扫描结果生成文件数量、总大小和最新修改时间"""
+        latest_mtime = scan.latest_mtime
+
+        return {
+            'file_count': len(scan),
+            'total_size': scan.total_size,
+            'last_updated': datetime.fromtimestamp(latest_mtime).isoformat() if latest_mtime else None
+        }
+
+    def _find_latest_package(self, dataset_name: str) -> Optional[Path]:
+        """查找缓存目录中最新的数据包"""
+        cache_path = Path(self.cache_dir)
+        if not cache_path.exists():
+            return None
+
+        try:
+            zip_files = sorted(
+                cache_path.glob(f"{dataset_name}_*.zip"),
+                key=lambda p: p.stat().st_mtime,
+                reverse=True
+            )
+        except OSError:
+            return None
+
+        return zip_files[0] if zip_files else None
+
+    def refresh(self, name: str, summary: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        重新扫描单个数据集的数据目录和缓存目录
+
+        Args:
+            name: 数据集名称
+            summary: 已在别处（工作进程）算好的文件统计（file_count / total_size / last_updated），
+                提供时不再扫描数据目录
+
+        Returns:
+            更新后的元数据字典
+        """
+        dataset_config = self._dataset_config(name) or {}
+        data_path = self._dataset_path(dataset_config.get('path', name))
+
+        if summary is not None:
+            entry = dict(summary)
+        elif data_path.exists() and data_path.is_dir():
+            if self.file_catalog is not None and dataset_config:
+                self.file_catalog.refresh(name)
+                entry = self._summarize(self.file_catalog.scan(name, suffix=None))
+            else:
+                entry = self._scan_directory(data_path)
+        else:
+            entry = {'file_count': 0, 'total_size': 0, 'last_updated': None}
+
+        package_path = self._find_latest_package(name)
+        package_size = 0
+        if package_path is not None:
+            try:
+                package_size = package_path.stat().st_size
+            except OSError:
+                package_path = None
+
+        entry['package_path'] = str(package_path) if package_path else None
+        entry['package_size'] = package_size
+        entry['version'] = package_version(name, package_path) if package_path else None
+
+        with self._lock:
+            self._entries[name] = entry
+            self._payload = None
+
+        logger.debug(f"Catalog refreshed for {name}: {entry}")
+        return dict(entry)
+
+    def refresh_all(self) -> None:
+        """重新扫描所有配置的数据集"""
+        for dataset_config in self.datasets_config:
+            name = dataset_config.get('name', '')
+            if name:
+                self.refresh(name)
+
+    def record_package(
+        self,
+        name: str,
+        zip_path: str,
+        zip_size: int,
+        file_count: Optional[int] = None,
+        total_size: Optional[int] = None,
+        last_updated: Optional[str] = None
+    ) -> None:
+        """
+        记录新发布的数据包（由 Packager 在打包完成后调用）
+
+        Args:
+            name: 数据集名称
+            zip_path: zip 文件路径
+            zip_size: zip 文件大小
+            file_count: 打包的文件数量
+            total_size: 打包文件的原始总大小
+            last_updated: 打包文件中最新的 mtime (ISO 格式)
+        """
+        with self._lock:
+            entry = self._entries.setdefault(
+                name, {'file_count': 0, 'total_size': 0, 'last_updated': None}
+            )
+            entry['package_path'] = zip_path
+            entry['package_size'] = zip_size
+            entry['version'] = package_version(name, zip_path)
+            if file_count is not None:
+                entry['file_count'] = file_count
+            if total_size is not None:
+                entry['total_size'] = total_size
+            if last_updated is not None:
+                entry['last_updated'] = last_updated
+            self._payload = None
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """获取单个数据集的元数据副本，未扫描过时立即扫描"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                return dict(entry)
+        return self.refresh(name)
+
+    def get_payload(self, states: Any) -> bytes:
+        """
+        获取 /api/datasets 的响应体
+
+        只有元数据或数据集状态变化时才重新序列化，否则直接返回缓存的字节串
+
+        Args:
+            states: 数据集状态（dict 或 StateManager，需支持 get(name)）
+
+        Returns:
+            UTF-8 编码的 JSON 字节串
+        """
+        names = [d.get('name', '') for d in self.datasets_config]
+        current_states = {name: states.get(name) or {} for name in names}
+
+        with self._lock:
+            if self._payload is not None and self._payload_states == current_states:
+                return self._payload
+
+        # 未扫描过的数据集先补扫（只发生在启动后的第一次请求）
+        for name in names:
+            with self._lock:
+                missing = name not in self._entries
+            if missing:
+                self.refresh(name)
+
+        with self._lock:
+            datasets_info = []
+            for name in names:
+                entry = self._entries.get(name, {})
+                state = current_states[name]
+                datasets_info.append({
+                    'name': name,
+                    'last_updated': entry.get('last_updated'),
+                    'file_count': entry.get('file_count', 0),
+                    'total_size': entry.get('total_size', 0),
+                    'package_ready': entry.get('package_path') is not None,
+                    'package_size': entry.get('package_size', 0),
+                    'version': entry.get('version'),
+                    'freshness': state.get('freshness', {}),
+                    'status': state.get('status', 'unknown')
+                })
+
+            self._payload = json.dumps({'datasets': datasets_info}, ensure_ascii=False).encode('utf-8')
+            self._payload_states = copy.deepcopy(current_states)
+            return self._payload
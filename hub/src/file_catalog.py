@@ -0,0 +1,254 @@
+"""
+FileCatalog - 持久化的增量文件目录
+按数据集记录每个目录下文件的 (大小, mtime, mode)，保存到磁盘并在启动时重新加载；
+刷新时只重新列出 mtime 变化的目录，供 FreshnessChecker、DatasetCatalog 和 Packager 共享
+"""
+
+import os
+import json
+import logging
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional, Dict, List, Any, Tuple
+
+from fs_scanner import ScanResult
+
+logger = logging.getLogger(__name__)
+
+# 持久化格式版本，格式不兼容时丢弃旧文件重新扫描
+CATALOG_FORMAT_VERSION = 1
+
+
+class FileCatalog:
+    """
+    持久化的增量文件目录
+
+    每个目录一条记录（列式存储，便于紧凑序列化）:
+        {'mtime_ns': 目录自身的 mtime, 'subdirs': [...],
+         'names': [...], 'sizes': [...], 'mtimes': [...], 'modes': [...]}
+
+    刷新策略:
+    - 每个目录先 stat 一次；trust_dir_mtime 为 True 且目录 mtime 未变时直接沿用上次的记录
+    - 否则用 os.scandir 重新列出该目录，复用 DirEntry 的 stat 信息
+    - 目录 mtime 只在新增/删除/重命名条目时变化，原地追加写入不会改变它；
+      因此 trust_dir_mtime 只适用于以"写临时文件再重命名"方式更新数据的场景，默认关闭。
+      Packager 打包前总是完整刷新（full=True），保证包内容与磁盘一致
+    """
+
+    def __init__(
+        self,
+        data_root: str,
+        datasets_config: List[Dict[str, Any]],
+        catalog_dir: str,
+        trust_dir_mtime: bool = False
+    ):
+        """
+        初始化文件目录
+
+        Args:
+            data_root: 数据根目录
+            datasets_config: 数据集配置列表（name, path）
+            catalog_dir: 持久化目录，每个数据集一个 {name}.json
+            trust_dir_mtime: 目录 mtime 未变时是否跳过重新列出
+        """
+        self.data_root = Path(data_root)
+        self.datasets_config = datasets_config
+        self.catalog_dir = Path(catalog_dir)
+        self.trust_dir_mtime = trust_dir_mtime
+
+        self._dirs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+
+    def dataset_root(self, name: str) -> Optional[Path]:
+        """获取数据集的根目录，未配置时返回 None"""
+        for dataset_config in self.datasets_config:
+            if dataset_config.get('name') == name:
+                return self.data_root / dataset_config.get('path', name)
+        return None
+
+    def _catalog_file(self, name: str) -> Path:
+        return self.catalog_dir / f"{name}.json"
+
+    def _load(self, name: str) -> Dict[str, Dict[str, Any]]:
+        """加载数据集的持久化记录，不存在或损坏时返回空记录"""
+        if name in self._dirs:
+            return self._dirs[name]
+
+        dirs: Dict[str, Dict[str, Any]] = {}
+        path = self._catalog_file(name)
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if (
+                    data.get('version') == CATALOG_FORMAT_VERSION
+                    and data.get('root') == str(self.dataset_root(name))
+                ):
+                    dirs = data.get('dirs', {})
+                    logger.debug(f"File catalog loaded for {name}: {len(dirs)} dirs")
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Failed to load file catalog {path}, rescanning: {e}")
+
+        self._dirs[name] = dirs
+        return dirs
+
+    def _save(self, name: str, dirs: Dict[str, Dict[str, Any]]) -> None:
+        """原子保存数据集的记录（临时文件 + 原子重命名）"""
+        path = self._catalog_file(name)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 调度进程和工作进程可能同时保存同一数据集，各自使用自己的临时文件
+            temp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': CATALOG_FORMAT_VERSION,
+                    'root': str(self.dataset_root(name)),
+                    'dirs': dirs
+                }, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to save file catalog {path}: {e}")
+
+    @staticmethod
+    def _list_dir(path: str, mtime_ns: int) -> Dict[str, Any]:
+        """用 os.scandir 列出一个目录，返回列式记录"""
+        record = {'mtime_ns': mtime_ns, 'subdirs': [], 'names': [], 'sizes': [], 'mtimes': [], 'modes': []}
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        record['subdirs'].append(entry.name)
+                        continue
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError as e:
+                    logger.warning(f"无法获取文件状态 {entry.path}: {e}")
+                    continue
+                record['names'].append(entry.name)
+                record['sizes'].append(stat.st_size)
+                record['mtimes'].append(stat.st_mtime)
+                record['modes'].append(stat.st_mode & 0xFFFF)
+        return record
+
+    def refresh(self, name: str, full: bool = False) -> int:
+        """
+        增量刷新数据集的文件记录
+
+        Args:
+            name: 数据集名称
+            full: 忽略 trust_dir_mtime，重新列出所有目录
+
+        Returns:
+            本次重新列出的目录数量
+        """
+        root = self.dataset_root(name)
+        if root is None:
+            logger.warning(f"未找到数据集: {name}")
+            return 0
+
+        with self._locks[name]:
+            old_dirs = self._load(name)
+            new_dirs: Dict[str, Dict[str, Any]] = {}
+            relisted = 0
+            changed = False
+
+            stack = ['']
+            while stack:
+                rel = stack.pop()
+                full_path = os.path.join(root, rel) if rel else str(root)
+                old = old_dirs.get(rel)
+                try:
+                    mtime_ns = os.stat(full_path).st_mtime_ns
+                    if self.trust_dir_mtime and not full and old is not None and old['mtime_ns'] == mtime_ns:
+                        record = old
+                    else:
+                        record = self._list_dir(full_path, mtime_ns)
+                        relisted += 1
+                        changed = changed or record != old
+                except OSError as e:
+                    if rel:
+                        logger.warning(f"Failed to scan {full_path}: {e}")
+                    changed = changed or old is not None
+                    continue
+
+                new_dirs[rel] = record
+                stack.extend(os.path.join(rel, sub) for sub in record['subdirs'])
+
+            changed = changed or new_dirs.keys() != old_dirs.keys()
+            self._dirs[name] = new_dirs
+            if changed:
+                self._save(name, new_dirs)
+
+        logger.debug(f"File catalog refreshed for {name}: dirs={len(new_dirs)}, relisted={relisted}")
+        return relisted
+
+    def _snapshot(self, name: str) -> Dict[str, Dict[str, Any]]:
+        """获取数据集当前的记录，从未加载或刷新过时先刷新"""
+        with self._locks[name]:
+            dirs = self._load(name)
+        if not dirs:
+            self.refresh(name)
+            dirs = self._dirs.get(name, {})
+        return dirs
+
+    def scan(
+        self,
+        name: str,
+        suffix: Optional[str] = '.csv',
+        with_paths: bool = False,
+        result: Optional[ScanResult] = None
+    ) -> ScanResult:
+        """
+        以 ScanResult 形式返回数据集当前记录的文件（不访问磁盘）
+
+        Args:
+            name: 数据集名称
+            suffix: 只包含以该后缀结尾的文件，None 表示全部文件
+            with_paths: 是否同时返回完整路径
+            result: 追加到已有的扫描结果
+
+        Returns:
+            ScanResult
+        """
+        if result is None:
+            result = ScanResult(paths=[] if with_paths else None)
+        elif with_paths and result.paths is None:
+            result.paths = []
+
+        root = self.dataset_root(name)
+        if root is None:
+            return result
+
+        suffix = os.path.normcase(suffix) if suffix else None
+        for rel, record in self._snapshot(name).items():
+            dir_path = os.path.join(root, rel) if rel else str(root)
+            if suffix is None:
+                result.mtimes.extend(record['mtimes'])
+                result.sizes.extend(record['sizes'])
+                if with_paths:
+                    result.paths.extend(os.path.join(dir_path, n) for n in record['names'])
+                continue
+            for i, file_name in enumerate(record['names']):
+                if os.path.normcase(file_name).endswith(suffix):
+                    result.mtimes.append(record['mtimes'][i])
+                    result.sizes.append(record['sizes'][i])
+                    if with_paths:
+                        result.paths.append(os.path.join(dir_path, file_name))
+        return result
+
+    def entries(self, name: str) -> List[Tuple[str, int, float, int]]:
+        """
+        返回数据集当前记录的所有文件
+
+        Returns:
+            (相对路径, 大小, mtime, mode) 列表，相对路径使用 os.sep 分隔
+        """
+        files = []
+        for rel, record in self._snapshot(name).items():
+            for file_name, size, mtime, mode in zip(
+                record['names'], record['sizes'], record['mtimes'], record['modes']
+            ):
+                files.append((os.path.join(rel, file_name) if rel else file_name, size, mtime, mode))
+        return files
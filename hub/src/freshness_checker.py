@@ -4,35 +4,59 @@ FreshnessChecker - 数据目录新鲜度检测器
 """
 
 import os
+import json
 import time
+import heapq
 import logging
-from dataclasses import dataclass
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Sequence, Tuple
+
+import mtime_stats
+from fs_scanner import ScanResult, scan_trees, count_files, list_by_directory
+from freshness_sampling import DEFAULT_SAMPLE_SIZE, DEFAULT_CONFIDENCE_Z, SampleEstimate, stratified_sample, wilson_interval
+from stability_tracker import StabilityTracker
+from freshness_rules import FRESH_WINDOW_SECONDS, DEFAULT_RULE, FreshnessRule, RecentWindowRule, get_rule
+from file_catalog import FileCatalog
 
 logger = logging.getLogger(__name__)
 
+# 防抖时最多等待 debounce_seconds 的这么多倍，仍有文件在写入则放弃，等下一轮
+STABILITY_MAX_WAIT_FACTOR = 4
+
+# 每次检查一并计算的 mtime 分位数；0.85 分位数同时作为 last_updated
+DEFAULT_PERCENTILES = (0.5, 0.85, 0.95)
+
 
 @dataclass
 class FreshnessResult:
     """新鲜度检测结果"""
     total_count: int          # 总文件数
-    fresh_count: int          # 新鲜文件数
+    fresh_count: int          # 新鲜文件数（按规则命中的文件数）
     fresh_ratio: float        # 新鲜比例 (0.0-1.0)
     last_updated: str         # 85%分位数文件的mtime (ISO格式)
+    percentiles: Dict[str, Optional[str]] = field(default_factory=dict)  # 各分位数的mtime，如 {'p50': ...}
+    rule: str = DEFAULT_RULE  # 判定规则名称
+    threshold: float = 0.85   # 该规则下的新鲜度阈值
+    majority_minute: Optional[str] = None  # 多数分钟（仅 majority_minute 规则，ISO格式）
+    histogram: Optional[Dict[int, int]] = field(default=None, repr=False, compare=False)  # 按分钟的 mtime 直方图
+    sample_size: Optional[int] = None  # 抽样检查的样本量，精确检查时为 None
+    ratio_interval: Optional[Tuple[float, float]] = None  # 抽样估计的新鲜比例置信区间
     
-    def is_fresh(self, threshold: float = 0.85) -> bool:
+    def is_fresh(self, threshold: Optional[float] = None) -> bool:
         """
         检查是否达到新鲜度阈值
         
         Args:
-            threshold: 新鲜度阈值 (默认0.85)
+            threshold: 新鲜度阈值，None 表示使用结果自带的阈值 (默认0.85)
             
         Returns:
             bool: 是否达到阈值
         """
-        return self.fresh_ratio >= threshold
+        return self.fresh_ratio >= (self.threshold if threshold is None else threshold)
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
@@ -41,10 +65,104 @@ class FreshnessResult:
             'fresh_count': self.fresh_count,
             'fresh_ratio': round(self.fresh_ratio, 4),
             'last_updated': self.last_updated,
+            'percentiles': dict(self.percentiles),
+            'rule': self.rule,
+            'majority_minute': self.majority_minute,
+            'sample_size': self.sample_size,
+            'ratio_interval': [round(v, 4) for v in self.ratio_interval] if self.ratio_interval else None,
             'is_fresh': self.is_fresh()
         }
 
 
+@dataclass
+class CompletionMarker:
+    """写入完成标记（由上游下载任务在写完数据集后生成）"""
+    path: str                             # 标记文件路径
+    mtime: float                          # 标记文件的 mtime
+    expected_count: Optional[int] = None  # 标记中声明的文件数（不含标记本身）
+    actual_count: Optional[int] = None    # 实际文件数，仅在声明了文件数时统计
+    
+    @property
+    def is_complete(self) -> bool:
+        """没有声明文件数，或实际文件数与声明一致"""
+        return self.expected_count is None or self.actual_count == self.expected_count
+
+
+class FreshnessCounter:
+    """
+    增量维护的新鲜度计数（事件驱动模式使用）
+    
+    按路径记录 CSV 文件的 mtime，文件变化时只更新单个条目；
+    计入新鲜的条目同时放入按 mtime 排序的堆，时间推移时只弹出过期的条目，
+    新鲜比例的计算不需要遍历所有文件
+    """
+    
+    def __init__(self, window: float = FRESH_WINDOW_SECONDS):
+        self.window = window
+        self._mtimes: Dict[str, float] = {}
+        # 当前计入新鲜的条目（路径 -> 计入时的 mtime）及其过期堆
+        self._fresh: Dict[str, float] = {}
+        self._heap: List[tuple] = []
+    
+    def __len__(self) -> int:
+        return len(self._mtimes)
+    
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window
+        heap = self._heap
+        while heap and heap[0][0] <= cutoff:
+            mtime, path = heapq.heappop(heap)
+            # 堆中可能残留已被更新或删除的旧条目
+            if self._fresh.get(path) == mtime:
+                del self._fresh[path]
+    
+    def update(self, path: str, mtime: float, now: Optional[float] = None) -> None:
+        """记录文件的新 mtime"""
+        now = time.time() if now is None else now
+        self._mtimes[path] = mtime
+        self._fresh.pop(path, None)
+        if mtime > now - self.window:
+            self._fresh[path] = mtime
+            heapq.heappush(self._heap, (mtime, path))
+    
+    def remove(self, path: str) -> None:
+        """移除文件"""
+        self._mtimes.pop(path, None)
+        self._fresh.pop(path, None)
+    
+    def remove_tree(self, root: str) -> None:
+        """移除目录下的所有文件"""
+        prefix = root + os.sep
+        for path in [p for p in self._mtimes if p.startswith(prefix)]:
+            self.remove(path)
+    
+    def reset(self, scan: ScanResult, now: Optional[float] = None) -> bool:
+        """
+        用一次完整扫描（需要包含路径）重建计数
+        
+        Returns:
+            扫描结果与当前记录是否不同
+        """
+        now = time.time() if now is None else now
+        mtimes = dict(zip(scan.paths or [], scan.mtimes))
+        changed = mtimes != self._mtimes
+        self._mtimes = {}
+        self._fresh = {}
+        self._heap = []
+        for path, mtime in mtimes.items():
+            self.update(path, mtime, now)
+        return changed
+    
+    def fresh_ratio(self, now: Optional[float] = None) -> float:
+        """当前的新鲜比例"""
+        self._expire(time.time() if now is None else now)
+        return len(self._fresh) / len(self._mtimes) if self._mtimes else 0.0
+    
+    def to_scan(self) -> ScanResult:
+        """转换为扫描结果，用于生成完整的 FreshnessResult"""
+        return ScanResult(mtimes=array('d', self._mtimes.values()), paths=list(self._mtimes))
+
+
 class FreshnessChecker:
     """
     数据目录新鲜度检测器
@@ -54,59 +172,214 @@ class FreshnessChecker:
     2. 计算新鲜度比例（基于文件mtime）
     3. 获取85%分位数文件的mtime作为last_updated
     4. 支持防抖检查，确保数据稳定
+    5. 支持按数据集检查，只扫描该数据集的目录；调度周期内同一数据集只扫描一次
+    6. 可选接入持久化的 FileCatalog，只重新列出有变化的目录
+    7. 统计在 mtime/大小数组上向量化计算（见 mtime_stats），一次得到多个分位数
+    8. 判定规则可按数据集配置（freshness_rule，见 freshness_rules），默认为最近24小时规则
+    9. 抽样检查（check_sampled）：只对分层样本获取文件状态，置信区间跨越阈值时才精确扫描
     """
     
-    def __init__(self, data_root: str, datasets_config: List[Dict[str, Any]]):
+    def __init__(
+        self,
+        data_root: str,
+        datasets_config: List[Dict[str, Any]],
+        file_catalog: Optional[FileCatalog] = None,
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES
+    ):
         """
         初始化新鲜度检测器
         
         Args:
             data_root: 数据根目录路径
             datasets_config: 数据集配置列表，每项包含name, path, freshness_threshold
+            file_catalog: 共享的文件目录，None 表示每次直接扫描磁盘
+            percentiles: 每次检查一并计算的 mtime 分位数（0.85 总会计算，用作 last_updated）
+            
+        Raises:
+            ValueError: 数据集配置了未知的 freshness_rule
         """
         self.data_root = Path(data_root)
         self.datasets_config = datasets_config
+        self.file_catalog = file_catalog
+        self.percentiles = tuple(sorted(set(percentiles) | {0.85}))
+        # 每个数据集的判定规则，合并检查所有数据集时使用默认规则
+        self._default_rule = get_rule(DEFAULT_RULE)
+        self._rules: Dict[str, FreshnessRule] = {
+            d['name']: get_rule(d.get('freshness_rule')) for d in datasets_config if d.get('name')
+        }
+        # 每个数据集最近一次检查的按分钟直方图（仅计算直方图的规则），防抖比较时直接使用
+        self._last_histograms: Dict[str, Dict[int, int]] = {}
         self._last_check_time = 0
         self._last_result: Optional[FreshnessResult] = None
+        # 调度周期内共享的扫描结果（数据集名称 -> ScanResult），不在周期内时为 None
+        self._scan_cache: Optional[Dict[str, ScanResult]] = None
+    
+    @contextmanager
+    def scan_cycle(self):
+        """
+        调度周期上下文：周期内按数据集的检查复用同一份扫描结果
         
-    def _get_dataset_paths(self) -> List[Path]:
-        """获取所有数据集的路径列表"""
+        防抖检查的第二次检查总是重新扫描，并用新结果更新缓存
+        """
+        self._scan_cache = {}
+        try:
+            yield self
+        finally:
+            self._scan_cache = None
+        
+    def rule_for(self, dataset: Optional[str] = None) -> FreshnessRule:
+        """获取数据集的判定规则，None 或未配置时返回默认规则"""
+        return self._rules.get(dataset, self._default_rule) if dataset else self._default_rule
+    
+    def threshold_for(self, dataset: Optional[str] = None) -> float:
+        """
+        获取数据集的新鲜度阈值
+        
+        依次使用 freshness_threshold、newer_ratio_threshold（requirements 中多数分钟规则的写法）
+        和规则自身的默认阈值
+        """
+        for dataset_config in self.datasets_config:
+            if dataset and dataset_config.get('name') == dataset:
+                for key in ('freshness_threshold', 'newer_ratio_threshold'):
+                    if dataset_config.get(key) is not None:
+                        return float(dataset_config[key])
+        return self.rule_for(dataset).default_threshold
+    
+    def debounce_for(self, dataset: Optional[str] = None, default: float = 30) -> float:
+        """
+        获取数据集的防抖静默期（秒）
+        
+        依次使用数据集配置的 debounce_seconds、规则自身的默认值（多数分钟规则为 60 秒）
+        和全局的 check.debounce_seconds（default）
+        """
+        for dataset_config in self.datasets_config:
+            if dataset and dataset_config.get('name') == dataset:
+                if dataset_config.get('debounce_seconds') is not None:
+                    return float(dataset_config['debounce_seconds'])
+        rule_default = self.rule_for(dataset).default_debounce_seconds
+        return float(rule_default) if rule_default is not None else default
+    
+    def read_completion_marker(self, dataset: str, newer_than: float = 0.0) -> Optional[CompletionMarker]:
+        """
+        读取数据集的写入完成标记（配置项 completion_marker，相对数据集目录的路径）
+        
+        标记文件可以为空（仅作为哨兵），也可以是包含 file_count 的 JSON，
+        此时统计数据集目录中的文件数（只列目录，不获取文件状态）进行核对
+        
+        Args:
+            dataset: 数据集名称
+            newer_than: 只返回 mtime 比它新的标记（通常是上次打包时标记的 mtime）
+            
+        Returns:
+            CompletionMarker；未配置、标记不存在或不够新时返回 None
+        """
+        dataset_config = next((d for d in self.datasets_config if d.get('name') == dataset), None)
+        if not dataset_config or not dataset_config.get('completion_marker'):
+            return None
+        
+        dataset_path = self.data_root / dataset_config['path']
+        marker_path = dataset_path / dataset_config['completion_marker']
+        try:
+            mtime = marker_path.stat().st_mtime
+            if mtime <= newer_than:
+                return None
+            content = marker_path.read_text(encoding='utf-8').strip()
+        except OSError:
+            return None
+        
+        marker = CompletionMarker(path=str(marker_path), mtime=mtime)
+        if content:
+            try:
+                expected = json.loads(content).get('file_count')
+            except (ValueError, AttributeError):
+                logger.warning(f"无法解析完成标记 {marker_path}，按哨兵文件处理")
+                expected = None
+            if expected is not None:
+                marker.expected_count = int(expected)
+                # 标记文件本身位于数据集目录内时不计入
+                inside = marker_path.resolve().is_relative_to(dataset_path.resolve())
+                marker.actual_count = count_files(str(dataset_path)) - (1 if inside else 0)
+        return marker
+    
+    def last_histogram(self, dataset: str) -> Optional[Dict[int, int]]:
+        """数据集最近一次检查得到的按分钟直方图（规则不计算直方图时为 None）"""
+        return self._last_histograms.get(dataset)
+    
+    def _get_dataset_paths(self, dataset: Optional[str] = None) -> List[Path]:
+        """
+        获取数据集的路径列表
+        
+        Args:
+            dataset: 数据集名称，None 表示所有数据集
+        """
         paths = []
-        for dataset in self.datasets_config:
-            path = self.data_root / dataset['path']
+        for dataset_config in self.datasets_config:
+            if dataset is not None and dataset_config.get('name') != dataset:
+                continue
+            path = self.data_root / dataset_config['path']
             if path.exists():
                 paths.append(path)
             else:
                 logger.warning(f"数据集路径不存在: {path}")
+        if dataset is not None and not paths:
+            logger.warning(f"未找到数据集或其路径: {dataset}")
         return paths
     
-    def _get_files_for_trade_date(self, trade_date: str) -> List[Path]:
+    def _scan_files(
+        self,
+        trade_date: str,
+        with_paths: bool = False,
+        dataset: Optional[str] = None,
+        refresh: bool = False
+    ) -> ScanResult:
         """
-        获取数据目录中的所有CSV文件
+        扫描数据目录中的所有CSV文件，一次遍历收集 mtime 和大小
         
         注意：文件名是股票代码（如 sh600018.csv），不是日期命名。
         新鲜度通过文件的 mtime（修改时间）判断，不是文件名。
         
         Args:
             trade_date: 交易日期 (格式: YYYY-MM-DD)，仅用于日志记录
+            with_paths: 是否同时收集文件路径（get_stats 需要）
+            dataset: 只扫描该数据集，None 表示所有数据集
+            refresh: 忽略调度周期内的缓存，重新扫描
             
         Returns:
-            文件路径列表
+            ScanResult: mtime/大小数组（以及可选的路径列表）
         """
-        files = []
-        dataset_paths = self._get_dataset_paths()
+        cache = self._scan_cache
+        use_cache = cache is not None and dataset is not None
+        if use_cache and not refresh and dataset in cache:
+            logger.debug(f"复用本周期的扫描结果: {dataset}")
+            return cache[dataset]
+        # 周期内的扫描总是带上路径，防抖跟踪文件时可以直接复用
+        with_paths = with_paths or use_cache
+        
+        if self.file_catalog is not None:
+            result = self._scan_catalog(dataset, with_paths)
+        else:
+            dataset_paths = self._get_dataset_paths(dataset)
+            result = scan_trees((str(p) for p in dataset_paths), suffix='.csv', with_paths=with_paths)
         
-        for dataset_path in dataset_paths:
-            if not dataset_path.exists():
+        if use_cache:
+            cache[dataset] = result
+        return result
+    
+    def _scan_catalog(self, dataset: Optional[str], with_paths: bool) -> ScanResult:
+        """通过 FileCatalog 增量刷新后读取 CSV 文件记录"""
+        result = ScanResult(paths=[] if with_paths else None)
+        for dataset_config in self.datasets_config:
+            name = dataset_config.get('name')
+            if dataset is not None and name != dataset:
+                continue
+            if not (self.data_root / dataset_config['path']).exists():
+                logger.warning(f"数据集路径不存在: {self.data_root / dataset_config['path']}")
                 continue
-                
-            # 遍历目录中的所有CSV文件
-            for csv_file in dataset_path.rglob("*.csv"):
-                files.append(csv_file)
-                    
-        return files
+            self.file_catalog.refresh(name)
+            self.file_catalog.scan(name, suffix='.csv', with_paths=with_paths, result=result)
+        return result
     
-    def _calculate_percentile_mtime(self, mtimes: List[float], percentile: float = 0.85) -> Optional[float]:
+    def _calculate_percentile_mtime(self, mtimes: Sequence[float], percentile: float = 0.85) -> Optional[float]:
         """
         计算分位数的mtime
         
@@ -117,29 +390,160 @@ class FreshnessChecker:
         Returns:
             分位数对应的mtime，如果列表为空返回None
         """
-        if not mtimes:
-            return None
-        
-        sorted_mtimes = sorted(mtimes)
-        index = int(len(sorted_mtimes) * percentile)
-        # 确保索引在有效范围内
-        index = min(index, len(sorted_mtimes) - 1)
-        return sorted_mtimes[index]
+        return mtime_stats.percentiles(mtimes, [percentile])[0]
     
-    def check(self, trade_date: str) -> FreshnessResult:
+    def check(self, trade_date: str, dataset: Optional[str] = None, refresh: bool = False) -> FreshnessResult:
         """
         检查指定交易日期的数据新鲜度
         
         Args:
             trade_date: 交易日期 (格式: YYYY-MM-DD 或 YYYYMMDD)
+            dataset: 只检查该数据集（按名称），None 表示合并检查所有数据集
+            refresh: 在调度周期内也强制重新扫描
             
         Returns:
             FreshnessResult: 新鲜度检测结果
         """
-        logger.info(f"检查数据新鲜度: trade_date={trade_date}")
+        logger.info(f"检查数据新鲜度: trade_date={trade_date}, dataset={dataset or '*'}")
+        
+        with_paths = self.rule_for(dataset).needs_paths
+        scan = self._scan_files(trade_date, with_paths=with_paths, dataset=dataset, refresh=refresh)
+        return self._evaluate(trade_date, scan, dataset)
+    
+    def check_sampled(
+        self,
+        trade_date: str,
+        dataset: str,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        z: float = DEFAULT_CONFIDENCE_Z,
+        rng=None
+    ) -> FreshnessResult:
+        """
+        抽样检查数据集的新鲜度
+        
+        按目录分层列出文件（不获取文件状态），只对样本 stat 后交给数据集的规则判定，
+        得到新鲜比例的估计值和置信区间。区间完全在阈值一侧时直接返回估计结果，
+        跨越阈值（或文件数不多于样本量）时改为精确检查
+        
+        Args:
+            trade_date: 交易日期
+            dataset: 数据集名称
+            sample_size: 样本量
+            z: 置信区间的 z 值
+            rng: 随机数生成器（测试时固定种子）
+            
+        Returns:
+            FreshnessResult: 抽样结果带有 sample_size 和 ratio_interval
+        """
+        strata: Dict[str, List[str]] = {}
+        for path in self._get_dataset_paths(dataset):
+            strata.update(list_by_directory(str(path), suffix='.csv'))
+        population = sum(len(files) for files in strata.values())
+        if population <= sample_size:
+            return self.check(trade_date, dataset=dataset, refresh=True)
+        
+        scan = ScanResult(paths=[], sampled=True)
+        for path in stratified_sample(strata, sample_size, rng):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            scan.mtimes.append(stat.st_mtime)
+            scan.sizes.append(stat.st_size)
+            scan.paths.append(path)
+        
+        result = self._evaluate(trade_date, scan, dataset)
+        low, high = wilson_interval(result.fresh_count, len(scan), population, z)
+        estimate = SampleEstimate(population, len(scan), result.fresh_count, low, high)
+        threshold = self.threshold_for(dataset)
+        if estimate.straddles(threshold):
+            logger.info(
+                f"抽样置信区间 [{low:.4f}, {high:.4f}] 跨越阈值 {threshold}，改为精确检查: {dataset}"
+            )
+            return self.check(trade_date, dataset=dataset, refresh=True)
+        
+        logger.info(
+            f"抽样检查结果: dataset={dataset}, sample={estimate.sample_size}/{population}, "
+            f"ratio={estimate.ratio:.2%} [{low:.2%}, {high:.2%}]"
+        )
+        result.total_count = population
+        result.fresh_count = round(estimate.ratio * population)
+        result.sample_size = estimate.sample_size
+        result.ratio_interval = (low, high)
+        return result
+    
+    def build_counter(self, dataset: str) -> FreshnessCounter:
+        """
+        完整扫描一次数据集，建立增量新鲜度计数
+        
+        Args:
+            dataset: 数据集名称
+        """
+        counter = FreshnessCounter()
+        self.sync_counter(dataset, counter)
+        return counter
+    
+    def sync_counter(self, dataset: str, counter: FreshnessCounter) -> bool:
+        """
+        用一次完整扫描校正增量计数（事件丢失或队列溢出后使用）
         
-        files = self._get_files_for_trade_date(trade_date)
-        total_count = len(files)
+        Returns:
+            扫描结果与计数中的记录是否不同
+        """
+        return counter.reset(self._scan_files('', with_paths=True, dataset=dataset, refresh=True))
+    
+    def check_counter(
+        self,
+        trade_date: str,
+        counter: FreshnessCounter,
+        dataset: Optional[str] = None
+    ) -> FreshnessResult:
+        """
+        根据增量计数生成新鲜度检测结果（不访问磁盘）
+        
+        Args:
+            trade_date: 交易日期，用于日志记录及按内容判定的规则
+            counter: 增量新鲜度计数
+            dataset: 数据集名称，决定判定规则
+        """
+        return self._evaluate(trade_date, counter.to_scan(), dataset)
+    
+    def counter_ratio(
+        self,
+        counter: FreshnessCounter,
+        dataset: Optional[str] = None,
+        trade_date: Optional[str] = None
+    ) -> float:
+        """
+        增量计数当前的新鲜比例（不记录日志、不更新最近结果）
+        
+        最近窗口规则直接使用计数维护的结果，其他规则在内存中的 mtime 上重新判定；
+        按内容判定的规则需要 trade_date，未提供时比例为 0
+        """
+        rule = self.rule_for(dataset)
+        if isinstance(rule, RecentWindowRule) and rule.window == counter.window:
+            return counter.fresh_ratio()
+        if not len(counter):
+            return 0.0
+        scan = counter.to_scan()
+        outcome = rule.evaluate(scan.mtime_vector, time.time(), scan=scan, trade_date=trade_date)
+        return outcome.matched_count / len(counter)
+    
+    def _evaluate(self, trade_date: str, scan: ScanResult, dataset: Optional[str] = None) -> FreshnessResult:
+        """
+        根据扫描结果计算新鲜度
+        
+        Args:
+            trade_date: 交易日期，用于日志记录及按内容判定的规则
+            scan: 目录扫描结果
+            dataset: 数据集名称，决定判定规则和阈值
+            
+        Returns:
+            FreshnessResult: 新鲜度检测结果
+        """
+        total_count = len(scan)
+        rule = self.rule_for(dataset)
+        threshold = self.threshold_for(dataset)
         
         if total_count == 0:
             logger.warning(f"未找到交易日期的文件: {trade_date}")
@@ -147,35 +551,31 @@ class FreshnessChecker:
                 total_count=0,
                 fresh_count=0,
                 fresh_ratio=0.0,
-                last_updated=datetime.now().isoformat()
+                last_updated=datetime.now().isoformat(),
+                rule=rule.name,
+                threshold=threshold
             )
         
         # 获取当前时间
         now = time.time()
         
-        # 获取所有文件的mtime并计算新鲜度
-        mtimes = []
-        fresh_count = 0
-        
-        for file_path in files:
-            try:
-                stat = file_path.stat()
-                mtime = stat.st_mtime
-                mtimes.append(mtime)
-                
-                # 文件在24小时内更新视为新鲜
-                if now - mtime < 86400:  # 24小时 = 86400秒
-                    fresh_count += 1
-                    
-            except (OSError, IOError) as e:
-                logger.warning(f"无法获取文件状态 {file_path}: {e}")
-                continue
+        # 按数据集的规则判定（默认：文件在24小时内更新视为新鲜）
+        mtimes = scan.mtime_vector
+        outcome = rule.evaluate(mtimes, now, scan=scan, trade_date=trade_date)
+        fresh_count = outcome.matched_count
+        if dataset and outcome.histogram is not None:
+            self._last_histograms[dataset] = outcome.histogram
         
         # 计算新鲜度比例
         fresh_ratio = fresh_count / total_count if total_count > 0 else 0.0
         
-        # 计算85%分位数的mtime
-        percentile_mtime = self._calculate_percentile_mtime(mtimes, percentile=0.85)
+        # 一次划分得到所有分位数，85%分位数作为 last_updated
+        values = dict(zip(self.percentiles, mtime_stats.percentiles(mtimes, self.percentiles)))
+        percentiles = {
+            f"p{q * 100:g}": datetime.fromtimestamp(value).isoformat() if value else None
+            for q, value in values.items()
+        }
+        percentile_mtime = values[0.85]
         
         if percentile_mtime:
             last_updated = datetime.fromtimestamp(percentile_mtime).isoformat()
@@ -186,11 +586,19 @@ class FreshnessChecker:
             total_count=total_count,
             fresh_count=fresh_count,
             fresh_ratio=fresh_ratio,
-            last_updated=last_updated
+            last_updated=last_updated,
+            percentiles=percentiles,
+            rule=rule.name,
+            threshold=threshold,
+            majority_minute=(
+                datetime.fromtimestamp(outcome.majority_minute).isoformat()
+                if outcome.majority_minute is not None else None
+            ),
+            histogram=outcome.histogram
         )
         
         logger.info(
-            f"新鲜度检查结果: total={total_count}, fresh={fresh_count}, "
+            f"新鲜度检查结果: rule={rule.name}, total={total_count}, fresh={fresh_count}, "
             f"ratio={fresh_ratio:.2%}, last_updated={last_updated}"
         )
         
@@ -203,21 +611,26 @@ class FreshnessChecker:
         self, 
         trade_date: str, 
         debounce_seconds: int = 30,
-        stop_event = None
+        stop_event = None,
+        dataset: Optional[str] = None
     ) -> Optional[FreshnessResult]:
         """
-        防抖检查，等待指定时间后再次确认数据稳定性
+        防抖检查，确认最近修改过的文件都已写完后再次确认数据稳定性
         
         原理:
         1. 第一次检查获取结果
-        2. 等待debounce_seconds秒（分段睡眠，支持停止信号）
-        3. 第二次检查获取结果
-        4. 如果两次新鲜度比例差异小于1%，认为数据已稳定
+        2. 用 StabilityTracker 跟踪最近修改过的文件，只对它们重新 stat，
+           所有跟踪的文件静默 debounce_seconds 秒后即继续（写入早已结束时不等待）；
+           超过 debounce_seconds 的 STABILITY_MAX_WAIT_FACTOR 倍仍有文件在变化则视为不稳定
+        3. 第二次检查获取结果（发现静默期间新增的文件）
+        4. 由数据集的规则比较两次结果（默认新鲜度比例差异小于1%），认为数据已稳定
         
         Args:
             trade_date: 交易日期
-            debounce_seconds: 防抖等待时间（秒），默认30秒
+            debounce_seconds: 静默期（秒），默认30秒
             stop_event: threading.Event，如果设置则提前返回 None
+            dataset: 只检查该数据集，None 表示合并检查所有数据集；
+                第一次检查可复用调度周期内的扫描结果，第二次检查总是重新扫描
             
         Returns:
             FreshnessResult: 如果数据稳定返回结果，否则返回None
@@ -228,22 +641,31 @@ class FreshnessChecker:
         )
         
         # 第一次检查
-        result1 = self.check(trade_date)
+        if dataset is None:
+            result1 = self.check(trade_date)
+        else:
+            result1 = self.check(trade_date, dataset=dataset)
         logger.info(
             f"第一次检查: fresh_ratio={result1.fresh_ratio:.4f}, "
             f"total={result1.total_count}"
         )
         
-        # 分段睡眠，检查停止信号
-        logger.debug(f"等待 {debounce_seconds} 秒（分段睡眠，可中断）...")
-        for _ in range(int(debounce_seconds)):
+        # 跟踪最近修改过的文件直到静默（可中断）
+        tracker = StabilityTracker(debounce_seconds)
+        tracker.track(self._scan_files(trade_date, with_paths=True, dataset=dataset))
+        logger.debug(f"跟踪 {len(tracker)} 个最近修改的文件")
+        if not tracker.wait(stop_event, max_wait=debounce_seconds * STABILITY_MAX_WAIT_FACTOR):
             if stop_event and stop_event.is_set():
                 logger.info("收到停止信号，中断防抖检查")
-                return None
-            time.sleep(1)
+            else:
+                logger.warning("数据仍在写入中，建议稍后重试")
+            return None
         
         # 第二次检查
-        result2 = self.check(trade_date)
+        if dataset is None:
+            result2 = self.check(trade_date)
+        else:
+            result2 = self.check(trade_date, dataset=dataset, refresh=True)
         logger.info(
             f"第二次检查: fresh_ratio={result2.fresh_ratio:.4f}, "
             f"total={result2.total_count}"
@@ -253,13 +675,13 @@ class FreshnessChecker:
         ratio_diff = abs(result2.fresh_ratio - result1.fresh_ratio)
         logger.info(f"新鲜度比例差异: {ratio_diff:.4f}")
         
-        # 如果差异小于1%（0.01），认为数据已稳定
-        if ratio_diff < 0.01:
+        # 由规则判定是否稳定：默认差异小于1%（0.01）；多数分钟规则直接比较两次的直方图
+        if self.rule_for(dataset).is_stable(result1, result2):
             logger.info("数据已稳定，返回检查结果")
             return result2
         else:
             logger.warning(
-                f"数据仍在变化中 (diff={ratio_diff:.4f}>0.01), "
+                f"数据仍在变化中 (diff={ratio_diff:.4f}), "
                 f"建议稍后重试"
             )
             return None
@@ -288,31 +710,37 @@ class FreshnessChecker:
         Returns:
             统计信息字典
         """
-        result = self.check(trade_date)
+        # 一次扫描同时得到汇总和文件详情
+        logger.info(f"检查数据新鲜度: trade_date={trade_date}")
+        scan = self._scan_files(trade_date, with_paths=True)
+        result = self._evaluate(trade_date, scan)
         
-        # 获取文件详情
-        files = self._get_files_for_trade_date(trade_date)
-        file_details = []
+        # 按mtime排序
+        mtimes = scan.mtimes
+        order = sorted(range(len(scan)), key=mtimes.__getitem__)
         
         now = time.time()
-        for file_path in files:
-            try:
-                stat = file_path.stat()
-                file_details.append({
-                    'path': str(file_path),
-                    'mtime': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                    'size': stat.st_size,
-                    'is_fresh': (now - stat.st_mtime) < 86400
-                })
-            except (OSError, IOError):
-                continue
-        
-        # 按mtime排序
-        file_details.sort(key=lambda x: x['mtime'])
+        file_details = [
+            {
+                'path': scan.paths[i],
+                'mtime': datetime.fromtimestamp(mtimes[i]).isoformat(),
+                'size': scan.sizes[i],
+                'is_fresh': (now - mtimes[i]) < FRESH_WINDOW_SECONDS
+            }
+            for i in order
+        ]
+        
+        # 新鲜文件按分钟的更新分布，用于观察数据写入的时间段
+        histogram = mtime_stats.minute_histogram(scan.mtime_vector, since=now - FRESH_WINDOW_SECONDS)
         
         return {
             'trade_date': trade_date,
             'summary': result.to_dict(),
+            'total_size': scan.total_size,
+            'update_histogram': {
+                datetime.fromtimestamp(minute).isoformat(): count
+                for minute, count in histogram.items()
+            },
             'datasets': [d['name'] for d in self.datasets_config],
             'files': file_details
         }
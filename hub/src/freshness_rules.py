@@ -0,0 +1,173 @@
+"""
+FreshnessRules - 可插拔的新鲜度判定规则
+每个数据集通过配置项 freshness_rule 选择规则，阈值由 freshness_threshold 给出（未配置时使用规则的默认值）
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Tuple, Type
+
+import mtime_stats
+from csv_tail import normalize_date, read_last_dates
+
+# 文件在该时间窗口（秒）内更新视为新鲜
+FRESH_WINDOW_SECONDS = 86400
+
+
+@dataclass
+class RuleOutcome:
+    """规则的判定结果：命中的文件数，以及可供防抖比较的附加信息"""
+    matched_count: int
+    majority_minute: Optional[float] = None
+    histogram: Optional[Dict[int, int]] = field(default=None, repr=False)
+
+
+class FreshnessRule(ABC):
+    """
+    新鲜度规则基类
+
+    子类实现 evaluate（命中了多少文件），可以覆盖 is_stable（防抖前后两次结果是否一致）；
+    needs_paths 为 True 的规则需要带路径的扫描结果；
+    default_debounce_seconds 不为 None 时覆盖全局的 check.debounce_seconds
+    """
+
+    name = ''
+    default_threshold = 0.85
+    default_debounce_seconds: Optional[int] = None
+    needs_paths = False
+
+    @abstractmethod
+    def evaluate(self, mtimes, now: float, scan=None, trade_date: Optional[str] = None) -> RuleOutcome:
+        """
+        判定新鲜度
+
+        Args:
+            mtimes: mtime 向量（见 mtime_stats.as_vector）
+            now: 当前时间戳
+            scan: 完整的扫描结果（needs_paths 的规则使用其中的路径）
+            trade_date: 期望的交易日期
+
+        Returns:
+            RuleOutcome
+        """
+
+    def is_stable(self, before, after, tolerance: float = 0.01) -> bool:
+        """
+        防抖判定：两次检查的新鲜比例差异小于 tolerance
+
+        Args:
+            before: 第一次检查的 FreshnessResult
+            after: 第二次检查的 FreshnessResult
+        """
+        return abs(after.fresh_ratio - before.fresh_ratio) < tolerance
+
+
+class RecentWindowRule(FreshnessRule):
+    """最近 24 小时内修改过的文件视为新鲜（默认规则）"""
+
+    name = 'recent_window'
+    default_threshold = 0.85
+
+    def __init__(self, window: float = FRESH_WINDOW_SECONDS):
+        self.window = window
+
+    def evaluate(self, mtimes, now: float, scan=None, trade_date: Optional[str] = None) -> RuleOutcome:
+        return RuleOutcome(matched_count=mtime_stats.count_above(mtimes, now - self.window))
+
+
+class MajorityMinuteRule(FreshnessRule):
+    """
+    多数分钟规则（requirements/TODO.md 任务 1.1）
+
+    按分钟统计 mtime（一次遍历得到直方图），文件最多的分钟视为当前数据版本（并列时取最新的分钟），
+    newer_ratio = 该分钟的文件数 / 总文件数。防抖时直接比较两次的直方图：
+    多数分钟不变且比例变化小于 tolerance 才算稳定。默认阈值 0.30、防抖 60 秒
+    """
+
+    name = 'majority_minute'
+    default_threshold = 0.30
+    default_debounce_seconds = 60
+
+    def evaluate(self, mtimes, now: float, scan=None, trade_date: Optional[str] = None) -> RuleOutcome:
+        histogram = mtime_stats.minute_histogram(mtimes)
+        if not histogram:
+            return RuleOutcome(matched_count=0, histogram=histogram)
+        # 直方图按时间升序，max 返回第一个最大值，因此反向遍历以便并列时取最新分钟
+        minute = max(reversed(list(histogram)), key=histogram.__getitem__)
+        return RuleOutcome(matched_count=histogram[minute], majority_minute=float(minute), histogram=histogram)
+
+    def is_stable(self, before, after, tolerance: float = 0.01) -> bool:
+        if before.histogram is not None and before.histogram == after.histogram:
+            return True
+        return (
+            before.majority_minute == after.majority_minute
+            and super().is_stable(before, after, tolerance)
+        )
+
+
+class TradeDateRule(FreshnessRule):
+    """
+    按内容判定：CSV 最后一行的日期等于期望的交易日即视为新鲜
+
+    不依赖 mtime，还原备份或复制文件改变了 mtime 也不会误判。
+    只从文件末尾读取几 KB（见 csv_tail），由线程池批量读取；
+    按 (大小, mtime) 缓存每个文件的结果，未变化的文件不再读取。
+    完整扫描时缓存裁剪为扫描到的文件；抽样扫描只补充缓存，不淘汰未被抽到的文件
+    """
+
+    name = 'trade_date'
+    default_threshold = 0.85
+    needs_paths = True
+
+    def __init__(self, workers: int = 8):
+        self.workers = workers
+        self._cache: Dict[str, Tuple[int, float, Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def evaluate(self, mtimes, now: float, scan=None, trade_date: Optional[str] = None) -> RuleOutcome:
+        expected = normalize_date(trade_date or '')
+        paths = scan.paths if scan is not None else None
+        if expected is None or not paths:
+            return RuleOutcome(matched_count=0)
+
+        sizes = scan.sizes if len(scan.sizes) == len(paths) else None
+        keys = [
+            (sizes[i] if sizes is not None else -1, scan.mtimes[i])
+            for i in range(len(paths))
+        ]
+
+        with self._lock:
+            cache = self._cache
+            stale = [i for i, path in enumerate(paths) if cache.get(path, (None, None))[:2] != keys[i]]
+            for i, last_date in zip(stale, read_last_dates([paths[i] for i in stale], self.workers)):
+                cache[paths[i]] = keys[i] + (last_date,)
+            dates = [cache[path][2] for path in paths]
+            if not scan.sampled:
+                # 只保留本次扫描到的文件（已删除的文件不再占用缓存）
+                self._cache = {path: cache[path] for path in paths}
+
+        matched = sum(1 for last_date in dates if last_date == expected)
+        return RuleOutcome(matched_count=matched)
+
+
+RULES: Dict[str, Type[FreshnessRule]] = {
+    RecentWindowRule.name: RecentWindowRule,
+    MajorityMinuteRule.name: MajorityMinuteRule,
+    TradeDateRule.name: TradeDateRule,
+}
+
+DEFAULT_RULE = RecentWindowRule.name
+
+
+def get_rule(name: Optional[str]) -> FreshnessRule:
+    """
+    按名称创建规则
+
+    Raises:
+        ValueError: 未知的规则名称
+    """
+    rule_class = RULES.get(name or DEFAULT_RULE)
+    if rule_class is None:
+        raise ValueError(f"Unknown freshness rule: {name} (available: {', '.join(sorted(RULES))})")
+    return rule_class()
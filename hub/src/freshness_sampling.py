@@ -0,0 +1,93 @@
+"""
+FreshnessSampling - 抽样估计新鲜比例
+按目录分层抽取文件样本，只对样本获取文件状态，给出新鲜比例的估计值和置信区间
+"""
+
+import math
+import random
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Sequence, Tuple
+
+# 默认样本量：比例在 0.5 附近时 99% 置信区间的半宽约为 ±3%
+DEFAULT_SAMPLE_SIZE = 2000
+
+# 置信区间使用的 z 值（99%）
+DEFAULT_CONFIDENCE_Z = 2.576
+
+
+@dataclass
+class SampleEstimate:
+    """抽样估计结果"""
+    population: int   # 总文件数
+    sample_size: int  # 样本量
+    matched: int      # 样本中命中的文件数
+    low: float        # 置信区间下限
+    high: float       # 置信区间上限
+
+    @property
+    def ratio(self) -> float:
+        """估计的新鲜比例"""
+        return self.matched / self.sample_size if self.sample_size else 0.0
+
+    def straddles(self, threshold: float) -> bool:
+        """置信区间是否跨越阈值（此时抽样无法判定是否新鲜）"""
+        return self.low < threshold <= self.high
+
+
+def stratified_sample(
+    strata: Dict[str, Sequence[str]],
+    size: int,
+    rng: Optional[random.Random] = None
+) -> List[str]:
+    """
+    按比例分层抽样
+
+    每层分到的样本量与该层文件数成正比（最大余数法取整），
+    因此样本中的命中比例就是分层估计值；样本量不小于总数时返回全部文件
+
+    Args:
+        strata: 层（通常是目录）-> 文件列表
+        size: 样本量
+        rng: 随机数生成器，None 表示使用模块级的 random
+    """
+    rng = rng or random
+    population = sum(len(files) for files in strata.values())
+    if size >= population:
+        return [path for files in strata.values() for path in files]
+
+    quotas = {key: len(files) * size / population for key, files in strata.items()}
+    counts = {key: int(quota) for key, quota in quotas.items()}
+    remaining = size - sum(counts.values())
+    for key in sorted(quotas, key=lambda k: quotas[k] - counts[k], reverse=True)[:remaining]:
+        counts[key] += 1
+
+    sample: List[str] = []
+    for key, files in strata.items():
+        if counts[key]:
+            sample.extend(rng.sample(files, counts[key]))
+    return sample
+
+
+def wilson_interval(
+    matched: int,
+    sample_size: int,
+    population: int,
+    z: float = DEFAULT_CONFIDENCE_Z
+) -> Tuple[float, float]:
+    """
+    比例的 Wilson 置信区间（带有限总体校正）
+
+    比例接近 0 或 1 时（例如数据尚未开始更新）仍给出合理的区间宽度，
+    样本覆盖全部文件时区间收缩为估计值本身
+    """
+    if sample_size == 0:
+        return 0.0, 1.0
+    p = matched / sample_size
+    fpc = (population - sample_size) / (population - 1) if population > 1 else 0.0
+    z2 = z * z * max(fpc, 0.0)
+    if z2 == 0.0:
+        return p, p
+    denominator = 1 + z2 / sample_size
+    center = (p + z2 / (2 * sample_size)) / denominator
+    margin = math.sqrt(z2 * (p * (1 - p) / sample_size + z2 / (4 * sample_size * sample_size))) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
@@ -0,0 +1,178 @@
+"""
+FsScanner - 基于 os.scandir 的目录扫描
+一次遍历收集文件的 mtime 和大小，复用 DirEntry 自带的 stat 信息，结果存为紧凑数组
+"""
+
+import os
+import logging
+from array import array
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Iterable
+
+import mtime_stats
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScanResult:
+    """
+    扫描结果：mtimes/sizes 按扫描顺序一一对应，paths 只在需要时收集
+
+    mtime_vector/size_vector 在安装了 NumPy 时是共享缓冲区的 ndarray，否则就是数组本身
+    """
+    mtimes: array = field(default_factory=lambda: array('d'))
+    sizes: array = field(default_factory=lambda: array('q'))
+    paths: Optional[List[str]] = None
+    # 只是部分文件的样本（抽样检查），不代表数据集的完整文件列表
+    sampled: bool = False
+
+    def __len__(self) -> int:
+        return len(self.mtimes)
+
+    @property
+    def mtime_vector(self):
+        """mtime 向量"""
+        return mtime_stats.as_vector(self.mtimes)
+
+    @property
+    def size_vector(self):
+        """大小向量"""
+        return mtime_stats.as_vector(self.sizes)
+
+    @property
+    def total_size(self) -> int:
+        """文件总大小"""
+        return mtime_stats.total(self.sizes)
+
+    @property
+    def latest_mtime(self) -> Optional[float]:
+        """最新的 mtime，没有文件时返回 None"""
+        return mtime_stats.latest(self.mtimes)
+
+
+def scan_tree(
+    root: str,
+    suffix: Optional[str] = '.csv',
+    with_paths: bool = False,
+    result: Optional[ScanResult] = None
+) -> ScanResult:
+    """
+    迭代遍历目录树，收集匹配文件的 (mtime, size)
+
+    - 用显式栈代替递归，不为每个文件创建 Path 对象
+    - DirEntry.stat() 在 Windows 上直接来自目录列表，不产生额外的系统调用
+    - 不进入符号链接指向的目录（与 Path.rglob 一致）
+
+    Args:
+        root: 根目录
+        suffix: 只收集以该后缀结尾的文件（按平台规则比较大小写），None 表示全部文件
+        with_paths: 是否同时收集文件路径
+        result: 追加到已有的扫描结果（用于合并多个根目录）
+
+    Returns:
+        ScanResult
+    """
+    if result is None:
+        result = ScanResult(paths=[] if with_paths else None)
+    elif with_paths and result.paths is None:
+        result.paths = []
+
+    suffix = os.path.normcase(suffix) if suffix else None
+    mtimes_append = result.mtimes.append
+    sizes_append = result.sizes.append
+    paths_append = result.paths.append if with_paths else None
+
+    stack = [os.fspath(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        if suffix is not None and not os.path.normcase(entry.name).endswith(suffix):
+                            continue
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError as e:
+                        logger.warning(f"无法获取文件状态 {entry.path}: {e}")
+                        continue
+                    mtimes_append(stat.st_mtime)
+                    sizes_append(stat.st_size)
+                    if paths_append is not None:
+                        paths_append(entry.path)
+        except OSError as e:
+            logger.warning(f"Failed to scan {current}: {e}")
+
+    return result
+
+
+def scan_trees(roots: Iterable[str], suffix: Optional[str] = '.csv', with_paths: bool = False) -> ScanResult:
+    """扫描多个根目录并合并结果"""
+    result = ScanResult(paths=[] if with_paths else None)
+    for root in roots:
+        scan_tree(root, suffix, with_paths, result)
+    return result
+
+
+def list_by_directory(root: str, suffix: Optional[str] = '.csv') -> Dict[str, List[str]]:
+    """
+    按目录分组列出匹配的文件路径，不获取文件状态（抽样时作为分层）
+
+    Returns:
+        目录路径 -> 该目录下（不含子目录）的文件路径列表，没有匹配文件的目录不出现
+    """
+    suffix = os.path.normcase(suffix) if suffix else None
+    groups: Dict[str, List[str]] = {}
+    stack = [os.fspath(root)]
+    while stack:
+        current = stack.pop()
+        files = []
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        if suffix is not None and not os.path.normcase(entry.name).endswith(suffix):
+                            continue
+                        if entry.is_file():
+                            files.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.warning(f"Failed to scan {current}: {e}")
+        if files:
+            groups[current] = files
+    return groups
+
+
+def count_files(root: str) -> int:
+    """
+    统计目录树中的文件数量，不获取文件状态
+
+    DirEntry.is_file/is_dir 在 Linux 和 Windows 上直接使用目录项中的类型信息，
+    除个别文件系统外不产生额外的 stat 调用
+    """
+    count = 0
+    stack = [os.fspath(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            count += 1
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.warning(f"Failed to scan {current}: {e}")
+    return count
@@ -0,0 +1,255 @@
+"""
+FsWatcher - 基于 inotify 的目录树变更监听（Linux）
+通过 ctypes 直接调用 libc 的 inotify 接口，递归监听数据集目录，非 Linux 平台不可用
+"""
+
+import os
+import sys
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+from collections import namedtuple
+from typing import Optional, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+
+# 监听的事件：文件内容/属性变化，以及目录项的增删和移动
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+
+# 文件内容或存在性发生变化的事件
+CHANGE_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# 文件从目录中消失的事件
+REMOVE_MASK = IN_DELETE | IN_MOVED_FROM
+
+# struct inotify_event 的固定部分: int wd; uint32 mask; uint32 cookie; uint32 len
+_EVENT_HEADER = struct.Struct('iIII')
+
+# 单次读取的缓冲区大小
+READ_BUFFER_SIZE = 64 * 1024
+
+# 监听事件：tag 为 add_tree 时给出的标签（如数据集名称），path 为完整路径；
+# 队列溢出时 path 为 None、mask 为 IN_Q_OVERFLOW，调用方需要重新全量扫描
+WatchEvent = namedtuple('WatchEvent', ['tag', 'path', 'mask'])
+
+_libc = None
+
+
+def _load_libc():
+    """加载 libc 并声明 inotify 函数签名，不支持时返回 None"""
+    global _libc
+    if _libc is not None:
+        return _libc or None
+    _libc = False
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, 'inotify_init1'):
+        return None
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_init1.restype = ctypes.c_int
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc.inotify_add_watch.restype = ctypes.c_int
+    libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    libc.inotify_rm_watch.restype = ctypes.c_int
+    _libc = libc
+    return libc
+
+
+def inotify_available() -> bool:
+    """当前平台是否支持 inotify"""
+    return _load_libc() is not None
+
+
+class InotifyWatcher:
+    """
+    递归监听目录树的 inotify 封装
+
+    - inotify 只监听单个目录，add_tree 为树中每个目录添加监听
+    - 新建（或移入）的子目录自动加入监听，并为其中已有的文件补发变更事件，
+      避免在添加监听之前写入的文件被遗漏
+    - 目录被删除后内核自动移除监听（IN_IGNORED），这里同步清理映射
+    """
+
+    def __init__(self):
+        """
+        创建 inotify 实例
+
+        Raises:
+            OSError: 平台不支持或 inotify 初始化失败
+        """
+        libc = _load_libc()
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        self._libc = libc
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self.fd = fd
+        # 监听描述符 -> (目录路径, 标签)
+        self._watches: Dict[int, Tuple[str, str]] = {}
+
+    def close(self) -> None:
+        """关闭 inotify 实例（所有监听随之移除）"""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+            self._watches.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def watch_count(self) -> int:
+        """当前监听的目录数量"""
+        return len(self._watches)
+
+    def _add_watch(self, path: str, tag: str) -> bool:
+        """为单个目录添加监听，目录已消失时返回 False"""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return False
+            # ENOSPC 表示超出 fs.inotify.max_user_watches，交给调用方回退到轮询
+            raise OSError(err, f"inotify_add_watch failed for {path}: {os.strerror(err)}")
+        self._watches[wd] = (path, tag)
+        return True
+
+    def add_tree(self, root: str, tag: str) -> List[str]:
+        """
+        递归监听目录树（不进入符号链接指向的目录）
+
+        先添加监听再列目录，列目录期间的写入不会丢失
+
+        Args:
+            root: 根目录
+            tag: 该目录树产生的事件所带的标签
+
+        Returns:
+            树中已有文件的完整路径列表
+
+        Raises:
+            OSError: 添加监听失败（例如超出监听数量上限）
+        """
+        files = []
+        stack = [os.fspath(root)]
+        while stack:
+            current = stack.pop()
+            if not self._add_watch(current, tag):
+                continue
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file():
+                                files.append(entry.path)
+                        except OSError:
+                            continue
+            except OSError as e:
+                logger.warning(f"Failed to scan {current}: {e}")
+        return files
+
+    def _remove_tree(self, root: str) -> None:
+        """移除 root 及其子目录的监听"""
+        prefix = root + os.sep
+        for wd, (path, _) in list(self._watches.items()):
+            if path == root or path.startswith(prefix):
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self._watches[wd]
+
+    def read(self, timeout: Optional[float] = None) -> List[WatchEvent]:
+        """
+        等待并读取事件
+
+        Args:
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            事件列表，超时返回空列表
+        """
+        if self.fd < 0:
+            return []
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        events: List[WatchEvent] = []
+        while True:
+            try:
+                data = os.read(self.fd, READ_BUFFER_SIZE)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            self._parse(data, events)
+        return events
+
+    def _parse(self, data: bytes, events: List[WatchEvent]) -> None:
+        """解析一段 inotify_event 序列"""
+        offset = 0
+        header_size = _EVENT_HEADER.size
+        while offset + header_size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + header_size:offset + header_size + name_len].rstrip(b'\0')
+            offset += header_size + name_len
+
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("inotify event queue overflowed")
+                events.append(WatchEvent(None, None, IN_Q_OVERFLOW))
+                continue
+
+            watch = self._watches.get(wd)
+            if watch is None:
+                continue
+            dir_path, tag = watch
+
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                continue
+
+            path = os.path.join(dir_path, os.fsdecode(name)) if name else dir_path
+            events.append(WatchEvent(tag, path, mask))
+
+            # 移出的目录：其中的监听路径已失效，停止监听
+            if mask & IN_ISDIR and mask & IN_MOVED_FROM:
+                self._remove_tree(path)
+            # 新目录：加入监听，并为其中已有的文件补发事件
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                for file_path in self.add_tree(path, tag):
+                    events.append(WatchEvent(tag, file_path, IN_CLOSE_WRITE))
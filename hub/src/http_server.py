@@ -6,16 +6,196 @@ HTTP Server - DataHub HTTP 服务器
 import os
 import re
 import json
+import socket
 import logging
+import threading
 import mimetypes
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
+
+from dataset_catalog import DatasetCatalog
+from packager import Packager, VERSION_PATTERN, package_version, delta_path, manifest_path
 
 logger = logging.getLogger(__name__)
 
 
+def locate_package(config: Dict[str, Any], dataset_name: str) -> Tuple[int, Optional[Path], Optional[str]]:
+    """
+    查找数据集最新的 zip 包
+    
+    Args:
+        config: 配置字典
+        dataset_name: 数据集名称
+        
+    Returns:
+        (状态码, 包路径, 错误信息)，状态码为 200 时包路径有效
+    """
+    # 验证数据集名称格式
+    if not dataset_name or '/' in dataset_name or '\\' in dataset_name:
+        return 400, None, 'Invalid dataset name'
+    
+    # 查找最新的 zip 包
+    cache_dir = Path(config.get('server', {}).get('cache_dir', '.cache')).resolve()
+    
+    # 安全地构建路径模式
+    try:
+        pattern = f"{dataset_name}_*.zip"
+        zip_files = sorted(cache_dir.glob(pattern), key=os.path.getmtime, reverse=True)
+    except Exception:
+        return 500, None, 'Internal error'
+    
+    if not zip_files:
+        return 404, None, 'Package not found'
+    
+    zip_path = zip_files[0]
+    
+    # 最终安全检查：确保文件在缓存目录内
+    try:
+        zip_path_resolved = zip_path.resolve()
+        if not str(zip_path_resolved).startswith(str(cache_dir)):
+            return 403, None, 'Forbidden'
+    except Exception:
+        return 500, None, 'Internal error'
+    
+    return 200, zip_path, None
+
+
+def locate_package_version(
+    config: Dict[str, Any],
+    dataset_name: str,
+    version: str,
+    packager: Optional[Packager] = None
+) -> Tuple[int, Optional[Path], Optional[str]]:
+    """
+    查找数据集指定版本的 zip 包
+    
+    blob 模式下旧版本只保留清单，zip 按需从 blob 库重建；重建的 zip 留在缓存目录中
+    供后续下载复用，由下次打包时的旧版本清理删除
+    
+    Args:
+        config: 配置字典
+        dataset_name: 数据集名称
+        version: 版本号
+        packager: 用于重建旧版本的 Packager（未开启 blob 库时为 None，只返回已有的 zip）
+        
+    Returns:
+        (状态码, 包路径, 错误信息)，状态码为 200 时包路径有效
+    """
+    if not VERSION_PATTERN.match(version):
+        return 400, None, 'Invalid version'
+    
+    status, latest, error = locate_package(config, dataset_name)
+    if status != 200:
+        return status, None, error
+    
+    zip_path = latest.parent / f"{dataset_name}_{version}.zip"
+    if zip_path.is_file():
+        return 200, zip_path, None
+    if not manifest_path(zip_path).is_file():
+        return 404, None, 'Package version not found'
+    
+    if packager is None or not packager.blob_store:
+        return 404, None, 'Package version not available'
+    materialized = packager.materialize(dataset_name, version)
+    if materialized is None:
+        return 404, None, 'Package version not available'
+    
+    return 200, Path(materialized), None
+
+
+def locate_delta(
+    config: Dict[str, Any],
+    dataset_name: str,
+    base_version: str
+) -> Tuple[int, Optional[Path], Optional[str]]:
+    """
+    查找从 base_version 到最新版本的增量包
+    
+    Args:
+        config: 配置字典
+        dataset_name: 数据集名称
+        base_version: 客户端当前持有的版本号
+        
+    Returns:
+        (状态码, 增量包路径, 错误信息)，状态码为 200 时路径有效
+    """
+    if not VERSION_PATTERN.match(base_version):
+        return 400, None, 'Invalid base version'
+    
+    status, zip_path, error = locate_package(config, dataset_name)
+    if status != 200:
+        return status, None, error
+    
+    version = package_version(dataset_name, zip_path)
+    if version is None:
+        return 404, None, 'Delta package not found'
+    
+    cache_dir = Path(config.get('server', {}).get('cache_dir', '.cache')).resolve()
+    path = delta_path(cache_dir, dataset_name, base_version, version)
+    if not path.is_file():
+        return 404, None, 'Delta package not found'
+    
+    return 200, path, None
+
+
+def locate_manifest(config: Dict[str, Any], dataset_name: str) -> Tuple[int, Optional[Path], Optional[str]]:
+    """
+    查找数据集最新包的清单文件
+    
+    Args:
+        config: 配置字典
+        dataset_name: 数据集名称
+        
+    Returns:
+        (状态码, 清单路径, 错误信息)，状态码为 200 时路径有效
+    """
+    status, zip_path, error = locate_package(config, dataset_name)
+    if status != 200:
+        return status, None, error
+    
+    path = manifest_path(zip_path)
+    if not path.is_file():
+        return 404, None, 'Manifest not found'
+    
+    return 200, path, None
+
+
+def parse_range(range_header: str, file_size: int) -> Tuple[int, int, int]:
+    """
+    解析 Range 请求头（格式: bytes=start-end）
+    
+    Args:
+        range_header: Range 请求头值
+        file_size: 文件大小
+        
+    Returns:
+        (状态码, start, end)，状态码为 206 表示范围有效，
+        400 表示格式错误，416 表示范围不可满足
+    """
+    range_match = re.match(r'bytes=(\d+)-(\d*)', range_header)
+    if not range_match:
+        return 400, 0, 0
+    
+    start_str, end_str = range_match.groups()
+    start = int(start_str)
+    end = int(end_str) if end_str else file_size - 1
+    
+    # 验证范围
+    if start >= file_size or start < 0 or end >= file_size or start > end:
+        return 416, start, end
+    
+    return 206, start, end
+
+
+def guess_content_type(file_path: str) -> str:
+    """根据文件名猜测 Content-Type"""
+    content_type, _ = mimetypes.guess_type(file_path)
+    return content_type or 'application/octet-stream'
+
+
 class DataHubHandler(BaseHTTPRequestHandler):
     """
     HTTP 请求处理器
@@ -23,12 +203,28 @@ class DataHubHandler(BaseHTTPRequestHandler):
     端点:
     - GET /api/datasets - 返回所有数据集列表
     - GET /package/{dataset}.zip - 下载数据包（支持 Range 断点续传）
+    - GET /package/{dataset}/{version}.zip - 下载指定版本的数据包（blob 模式下按需重建）
+    - GET /delta/{dataset}/{base_version}.zip - 下载相对 base_version 的增量包
+    - GET /api/datasets/{dataset}/manifest - 返回最新包的文件清单
+    - GET /api/jobs - 返回调度器任务队列中排队、运行中和最近结束的任务
     - GET /health - 健康检查
+    
+    并发说明:
+    dataset_states 只会被整体替换（server.py 定期赋值 state_manager.get_all() 返回的新字典），
+    处理请求时只读取一次引用，因此多个工作线程并发读取是安全的
     """
     
     # 类级别配置和状态
     config = None
     dataset_states = {}
+    catalog: Optional[DatasetCatalog] = None
+    # 调度器的任务队列（JobQueue），未接入调度器时为 None
+    jobs = None
+    # 按需重建旧版本 zip 的 Packager（仅 blob 模式），未开启 blob 库时为 None
+    packager: Optional[Packager] = None
+    
+    # 是否使用 sendfile 零拷贝发送数据包（由 server.sendfile 配置）
+    use_sendfile = True
     
     def log_message(self, format: str, *args) -> None:
         """使用 logging 模块记录请求日志"""
@@ -48,10 +244,23 @@ class DataHubHandler(BaseHTTPRequestHandler):
                 self._handle_health()
             elif path == '/api/datasets':
                 self._handle_datasets()
+            elif path == '/api/jobs':
+                self._handle_jobs()
+            elif path.startswith('/api/datasets/') and path.endswith('/manifest'):
+                # 提取数据集名称 /api/datasets/{dataset}/manifest
+                dataset_name = path[14:-9]
+                self._handle_manifest(dataset_name)
             elif path.startswith('/package/') and path.endswith('.zip'):
-                # 提取数据集名称 /package/{dataset}.zip
-                dataset_name = path[9:-4]  # 去掉 '/package/' 和 '.zip'
-                self._handle_package(dataset_name)
+                # 提取数据集名称 /package/{dataset}.zip 或 /package/{dataset}/{version}.zip
+                dataset_name, _, version = path[9:-4].partition('/')  # 去掉 '/package/' 和 '.zip'
+                if version:
+                    self._handle_package_version(dataset_name, version)
+                else:
+                    self._handle_package(dataset_name)
+            elif path.startswith('/delta/') and path.endswith('.zip'):
+                # 提取数据集名称和基准版本 /delta/{dataset}/{base_version}.zip
+                dataset_name, _, base_version = path[7:-4].partition('/')
+                self._handle_delta(dataset_name, base_version)
             else:
                 self._send_json(404, {'error': 'Not found', 'path': path})
                 
@@ -74,115 +283,34 @@ class DataHubHandler(BaseHTTPRequestHandler):
         - total_size: 总大小
         - package_ready: 包是否就绪
         - package_size: 包大小
-        """
-        datasets_info = []
-        
-        # 从配置中获取数据集列表
-        datasets_config = self.config.get('datasets', [])
-        cache_dir = self.config.get('server', {}).get('cache_dir', '.cache')
-        data_root = self.config.get('server', {}).get('data_root', '')
         
-        for dataset_config in datasets_config:
-            name = dataset_config.get('name', '')
-            path = dataset_config.get('path', '')
-            
-            # 获取数据集状态
-            state = self.dataset_states.get(name, {})
-            
-            # 计算数据集信息
-            dataset_info = self._get_dataset_info(name, path, data_root, cache_dir, state)
-            datasets_info.append(dataset_info)
-        
-        self._send_json(200, {'datasets': datasets_info})
-    
-    def _get_dataset_info(
-        self, 
-        name: str, 
-        path: str, 
-        data_root: str, 
-        cache_dir: str,
-        state: Dict[str, Any]
-    ) -> Dict[str, Any]:
+        元数据由 DatasetCatalog 在扫描/打包时维护，这里直接发送缓存的 JSON 响应体，
+        请求耗时与数据集文件数量无关
         """
-        获取单个数据集的信息
+        catalog = self.catalog
+        if catalog is None:
+            catalog = DataHubHandler.catalog = DatasetCatalog(self.config)
         
-        Args:
-            name: 数据集名称
-            path: 数据集路径
-            data_root: 数据根目录
-            cache_dir: 缓存目录
-            state: 数据集状态
-            
-        Returns:
-            数据集信息字典
-        """
-        # 获取数据目录信息
-        data_path = Path(data_root) / path if data_root else Path(path)
-        file_count = 0
-        total_size = 0
-        last_updated = None
-        
-        if data_path.exists() and data_path.is_dir():
-            for file_path in data_path.rglob('*'):
-                if file_path.is_file():
-                    file_count += 1
-                    try:
-                        stat = file_path.stat()
-                        total_size += stat.st_size
-                        mtime = datetime.fromtimestamp(stat.st_mtime)
-                        if last_updated is None or mtime > last_updated:
-                            last_updated = mtime
-                    except (OSError, IOError):
-                        pass
-        
-        # 获取包信息
-        package_path = self._find_latest_package(name, cache_dir)
-        package_ready = package_path is not None
-        package_size = 0
-        
-        if package_path and Path(package_path).exists():
-            try:
-                package_size = Path(package_path).stat().st_size
-            except (OSError, IOError):
-                pass
-        
-        return {
-            'name': name,
-            'last_updated': last_updated.isoformat() if last_updated else None,
-            'file_count': file_count,
-            'total_size': total_size,
-            'package_ready': package_ready,
-            'package_size': package_size,
-            'freshness': state.get('freshness', {}),
-            'status': state.get('status', 'unknown')
-        }
-    
-    def _find_latest_package(self, dataset_name: str, cache_dir: str) -> Optional[str]:
+        self._send_json_bytes(200, catalog.get_payload(self.dataset_states))
+    
+    def _handle_jobs(self) -> None:
+        """处理任务列表请求：每个任务的数据集、阶段、状态以及排队/开始/结束时间"""
+        jobs = self.jobs
+        self._send_json(200, {'jobs': jobs.jobs() if jobs is not None else []})
+    
+    def _handle_manifest(self, dataset_name: str) -> None:
         """
-        查找最新的数据包
+        处理清单请求
         
-        Args:
-            dataset_name: 数据集名称
-            cache_dir: 缓存目录
-            
-        Returns:
-            最新包的路径，如果不存在返回 None
+        返回最新包的清单：每个文件的 size、mtime、crc32、sha256，
+        以及 version、package_size、package_sha256、file_count
         """
-        cache_path = Path(cache_dir)
-        if not cache_path.exists():
-            return None
-        
-        # 查找匹配的 zip 文件
-        pattern = f"{dataset_name}_*.zip"
-        zip_files = sorted(
-            cache_path.glob(pattern),
-            key=lambda p: p.stat().st_mtime,
-            reverse=True
-        )
+        status, path, error = locate_manifest(self.config, dataset_name)
+        if status != 200:
+            self._send_json(status, {'error': error})
+            return
         
-        if zip_files:
-            return str(zip_files[0])
-        return None
+        self._send_json_bytes(200, path.read_bytes())
     
     def _handle_package(self, dataset_name: str) -> None:
         """
@@ -190,38 +318,41 @@ class DataHubHandler(BaseHTTPRequestHandler):
         
         支持 Range 请求实现断点续传
         """
-        # 验证数据集名称格式
-        if not dataset_name or '/' in dataset_name or '\\' in dataset_name:
-            self._send_json(400, {'error': 'Invalid dataset name'})
+        status, zip_path, error = locate_package(self.config, dataset_name)
+        if status != 200:
+            self._send_json(status, {'error': error})
             return
         
-        # 查找最新的 zip 包
-        cache_dir = Path(self.config.get('server', {}).get('cache_dir', '.cache')).resolve()
-        
-        # 安全地构建路径模式
-        try:
-            pattern = f"{dataset_name}_*.zip"
-            zip_files = sorted(cache_dir.glob(pattern), key=os.path.getmtime, reverse=True)
-        except Exception:
-            self._send_json(500, {'error': 'Internal error'})
-            return
+        self._send_package(zip_path)
+    
+    def _handle_package_version(self, dataset_name: str, version: str) -> None:
+        """
+        处理指定版本的数据包下载请求
         
-        if not zip_files:
-            self._send_json(404, {'error': 'Package not found'})
+        blob 模式下旧版本的 zip 按需从 blob 库重建后发送
+        """
+        status, zip_path, error = locate_package_version(self.config, dataset_name, version, self.packager)
+        if status != 200:
+            self._send_json(status, {'error': error})
             return
         
-        zip_path = zip_files[0]
+        self._send_package(zip_path)
+    
+    def _handle_delta(self, dataset_name: str, base_version: str) -> None:
+        """
+        处理增量包下载请求
         
-        # 最终安全检查：确保文件在缓存目录内
-        try:
-            zip_path_resolved = zip_path.resolve()
-            if not str(zip_path_resolved).startswith(str(cache_dir)):
-                self._send_json(403, {'error': 'Forbidden'})
-                return
-        except Exception:
-            self._send_json(500, {'error': 'Internal error'})
+        返回从 base_version 到最新版本的增量包，不存在时返回 404，客户端应回退到完整包
+        """
+        status, zip_path, error = locate_delta(self.config, dataset_name, base_version)
+        if status != 200:
+            self._send_json(status, {'error': error})
             return
         
+        self._send_package(zip_path)
+    
+    def _send_package(self, zip_path: Path) -> None:
+        """发送 zip 包，支持 Range 请求"""
         # 检查 Range 请求头
         range_header = self.headers.get('Range')
         if range_header:
@@ -238,7 +369,16 @@ class DataHubHandler(BaseHTTPRequestHandler):
             data: 响应数据字典
         """
         response_body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self._send_json_bytes(status, response_body)
+    
+    def _send_json_bytes(self, status: int, response_body: bytes) -> None:
+        """
+        发送已序列化的 JSON 响应
         
+        Args:
+            status: HTTP 状态码
+            response_body: UTF-8 编码的 JSON 响应体
+        """
         self.send_response(status)
         self.send_header('Content-Type', 'application/json; charset=utf-8')
         self.send_header('Content-Length', len(response_body))
@@ -256,9 +396,7 @@ class DataHubHandler(BaseHTTPRequestHandler):
         path = Path(file_path)
         
         # 获取文件类型
-        content_type, _ = mimetypes.guess_type(file_path)
-        if content_type is None:
-            content_type = 'application/octet-stream'
+        content_type = guess_content_type(file_path)
         
         # 获取文件大小
         file_size = path.stat().st_size
@@ -274,11 +412,7 @@ class DataHubHandler(BaseHTTPRequestHandler):
         
         # 发送文件内容
         with open(path, 'rb') as f:
-            while True:
-                chunk = f.read(64 * 1024)  # 64KB 块
-                if not chunk:
-                    break
-                self.wfile.write(chunk)
+            self._copy_file(f, 0, file_size)
         
         logger.info(f"文件发送完成: {file_path}")
     
@@ -294,18 +428,12 @@ class DataHubHandler(BaseHTTPRequestHandler):
         file_size = path.stat().st_size
         
         # 解析 Range 头
-        # 格式: bytes=start-end
-        range_match = re.match(r'bytes=(\d+)-(\d*)', range_header)
-        if not range_match:
+        status, start, end = parse_range(range_header, file_size)
+        if status == 400:
             self._send_json(400, {'error': 'Invalid Range header'})
             return
         
-        start_str, end_str = range_match.groups()
-        start = int(start_str)
-        end = int(end_str) if end_str else file_size - 1
-        
-        # 验证范围
-        if start >= file_size or start < 0 or end >= file_size or start > end:
+        if status == 416:
             self.send_response(416)  # Range Not Satisfiable
             self.send_header('Content-Range', f'bytes */{file_size}')
             self.end_headers()
@@ -315,9 +443,7 @@ class DataHubHandler(BaseHTTPRequestHandler):
         content_length = end - start + 1
         
         # 获取文件类型
-        content_type, _ = mimetypes.guess_type(file_path)
-        if content_type is None:
-            content_type = 'application/octet-stream'
+        content_type = guess_content_type(file_path)
         
         # 发送 206 Partial Content 响应
         self.send_response(206)
@@ -331,17 +457,131 @@ class DataHubHandler(BaseHTTPRequestHandler):
         
         # 发送文件内容
         with open(path, 'rb') as f:
-            f.seek(start)
-            remaining = content_length
-            while remaining > 0:
-                chunk_size = min(64 * 1024, remaining)
-                chunk = f.read(chunk_size)
-                if not chunk:
-                    break
-                self.wfile.write(chunk)
-                remaining -= len(chunk)
+            self._copy_file(f, start, content_length)
         
         logger.info(f"Range 文件发送完成: {file_path}, bytes={start}-{end}")
+    
+    def _can_sendfile(self) -> bool:
+        """
+        判断当前连接能否使用 sendfile
+        
+        TLS 连接（ssl.SSLSocket 是 socket.socket 的子类）必须在用户态加密，
+        平台不支持 os.sendfile 时同样回退到分块复制
+        """
+        return (
+            self.use_sendfile
+            and hasattr(os, 'sendfile')
+            and type(self.connection) is socket.socket
+        )
+    
+    def _copy_file(self, f, offset: int, length: int) -> None:
+        """
+        将文件的 [offset, offset+length) 区间发送给客户端
+        
+        优先使用 sendfile 在内核中直接复制，不经过 Python 缓冲区、不持有 GIL；
+        不可用时回退到 64KB 分块读写
+        
+        Args:
+            f: 以二进制模式打开的文件对象
+            offset: 起始偏移
+            length: 发送字节数
+        """
+        if length <= 0:
+            return
+        
+        if self._can_sendfile():
+            self.wfile.flush()
+            self.connection.sendfile(f, offset, length)
+            return
+        
+        f.seek(offset)
+        remaining = length
+        while remaining > 0:
+            chunk_size = min(64 * 1024, remaining)
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            remaining -= len(chunk)
+
+
+class BoundedThreadingHTTPServer(HTTPServer):
+    """
+    带有界工作线程池的 HTTP 服务器
+    
+    - 请求交给固定大小的线程池处理，慢速下载不会阻塞 /health 和 /api/datasets
+    - 同时处理和排队的连接总数不超过 max_connections，超出时直接返回 503
+    """
+    
+    def __init__(
+        self,
+        server_address,
+        handler_class,
+        max_workers: int = 16,
+        max_connections: int = 64
+    ):
+        """
+        初始化服务器
+        
+        Args:
+            server_address: (host, port)
+            handler_class: 请求处理器类
+            max_workers: 工作线程数
+            max_connections: 最大并发连接数（处理中 + 排队中）
+        """
+        super().__init__(server_address, handler_class)
+        self.max_workers = max_workers
+        self.max_connections = max(max_connections, max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='datahub-http'
+        )
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+    
+    def process_request(self, request, client_address) -> None:
+        """将请求提交到线程池，连接数已满时拒绝"""
+        if not self._slots.acquire(blocking=False):
+            logger.warning(f"Too many connections, rejecting {client_address[0]}")
+            self._reject_request(request)
+            return
+        
+        try:
+            self._executor.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            # 线程池已关闭（服务器正在停止）
+            self._slots.release()
+            self.shutdown_request(request)
+    
+    def _process_request_worker(self, request, client_address) -> None:
+        """在工作线程中处理请求"""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+    
+    def _reject_request(self, request) -> None:
+        """返回 503 并关闭连接"""
+        body = json.dumps({'error': 'Too many connections'}).encode('utf-8')
+        response = (
+            b'HTTP/1.0 503 Service Unavailable\r\n'
+            b'Content-Type: application/json; charset=utf-8\r\n'
+            b'Content-Length: ' + str(len(body)).encode('ascii') + b'\r\n'
+            b'Retry-After: 5\r\n'
+            b'Connection: close\r\n\r\n' + body
+        )
+        try:
+            request.sendall(response)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+    
+    def server_close(self) -> None:
+        """关闭监听 socket 并停止线程池"""
+        super().server_close()
+        self._executor.shutdown(wait=False)
 
 
 class DataHubServer:
@@ -351,30 +591,83 @@ class DataHubServer:
     提供数据集查询和数据包下载服务
     """
     
-    def __init__(self, config: Dict[str, Any], dataset_states: Dict[str, Any]):
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        dataset_states: Dict[str, Any],
+        catalog: Optional[DatasetCatalog] = None,
+        jobs=None,
+        packager: Optional[Packager] = None
+    ):
         """
         初始化服务器
         
         Args:
             config: 配置字典
             dataset_states: 数据集状态字典（共享状态）
+            catalog: 数据集元数据目录（通常与 Scheduler 共享），为空时自动创建并扫描一次
+            jobs: 调度器的任务队列（Scheduler.jobs），用于 /api/jobs
+            packager: 调度器的 Packager（Scheduler.packager），用于按需重建旧版本；
+                为空且开启 packaging.blob_store 时自动创建一个
         """
         self.config = config
         self.dataset_states = dataset_states
         
+        if catalog is None:
+            catalog = DatasetCatalog(config)
+            catalog.refresh_all()
+        self.catalog = catalog
+        
+        packaging_config = config.get('packaging', {})
+        if packager is None and packaging_config.get('blob_store', False):
+            packager = Packager(
+                str(Path(config.get('server', {}).get('cache_dir', '.cache')).resolve()),
+                keep_versions=packaging_config.get('keep_versions', 5),
+                blob_store=True
+            )
+        self.packager = packager
+        
         # 获取服务器配置
         server_config = config.get('server', {})
         self.host = server_config.get('host', '0.0.0.0')
         self.port = server_config.get('port', 8080)
+        self.use_sendfile = server_config.get('sendfile', True)
+        self.mode = server_config.get('mode', 'threaded')
+        self.max_workers = server_config.get('max_workers', 16)
+        self.max_connections = server_config.get('max_connections', 64)
+        self.request_timeout = server_config.get('request_timeout')
         
         # 设置处理器类级别的配置和状态
         DataHubHandler.config = config
         DataHubHandler.dataset_states = dataset_states
+        DataHubHandler.catalog = catalog
+        DataHubHandler.jobs = jobs
+        DataHubHandler.packager = packager
+        DataHubHandler.use_sendfile = self.use_sendfile
+        DataHubHandler.timeout = self.request_timeout
         
         # 创建 HTTP 服务器
-        self.server = HTTPServer((self.host, self.port), DataHubHandler)
+        if self.mode == 'single':
+            self.server = HTTPServer((self.host, self.port), DataHubHandler)
+        elif self.mode == 'asyncio':
+            from async_server import AsyncHTTPEngine
+            self.server = AsyncHTTPEngine(
+                (self.host, self.port),
+                DataHubHandler,
+                idle_timeout=server_config.get('idle_timeout', 15),
+                max_connections=server_config.get('max_connections', 1024)
+            )
+        elif self.mode == 'threaded':
+            self.server = BoundedThreadingHTTPServer(
+                (self.host, self.port),
+                DataHubHandler,
+                max_workers=self.max_workers,
+                max_connections=self.max_connections
+            )
+        else:
+            raise ValueError(f"Unknown server mode: {self.mode}")
         
-        logger.info(f"DataHubServer initialized: {self.host}:{self.port}")
+        logger.info(f"DataHubServer initialized: {self.host}:{self.port}, mode={self.mode}")
     
     def start(self) -> None:
         """启动服务器"""
@@ -383,7 +676,10 @@ class DataHubServer:
         print(f"API endpoints:")
         print(f"  - GET /health")
         print(f"  - GET /api/datasets")
+        print(f"  - GET /api/jobs")
         print(f"  - GET /package/{{dataset}}.zip")
+        print(f"  - GET /package/{{dataset}}/{{version}}.zip")
+        print(f"  - GET /delta/{{dataset}}/{{base_version}}.zip")
         print("Press Ctrl+C to stop")
         
         try:
@@ -0,0 +1,251 @@
+"""
+JobQueue - 调度器内部的任务队列
+任务按 (数据集, 阶段) 去重，手动触发优先于定时检查，由固定数量的工作线程执行；
+最近的任务及其排队/开始/结束时间可通过 /api/jobs 查看
+"""
+
+import heapq
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Dict, List, Any, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 优先级：数值越大越先执行
+PRIORITY_PERIODIC = 0
+PRIORITY_MANUAL = 10
+
+# 保留的已结束任务数量
+FINISHED_JOBS_LIMIT = 100
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat(timespec='seconds') if timestamp else None
+
+
+@dataclass
+class Job:
+    """队列中的一个任务"""
+    dataset: str
+    stage: str                 # 阶段，如 check（检查→防抖→打包）、package
+    priority: int
+    trigger: str               # 触发来源：periodic / manual / inline
+    func: Optional[Callable[[], Any]] = field(default=None, repr=False)
+    state: str = 'queued'      # queued / running / finished / failed / cancelled
+    queued_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    merged: int = 0            # 被合并进来的重复提交次数
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.dataset, self.stage
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待任务结束"""
+        return self.done.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式（/api/jobs）"""
+        end = self.finished_at or time.time()
+        return {
+            'dataset': self.dataset,
+            'stage': self.stage,
+            'state': self.state,
+            'trigger': self.trigger,
+            'priority': self.priority,
+            'queued_at': _isoformat(self.queued_at),
+            'started_at': _isoformat(self.started_at),
+            'finished_at': _isoformat(self.finished_at),
+            'wait_seconds': round((self.started_at or end) - self.queued_at, 3),
+            'run_seconds': round(end - self.started_at, 3) if self.started_at else None,
+            'merged': self.merged,
+            'error': self.error
+        }
+
+
+class JobQueue:
+    """
+    带去重和优先级的任务队列
+
+    - 同一 (数据集, 阶段) 同时最多有一个排队中的任务：重复提交合并到已有任务，
+      优先级取较高者；任务正在执行时提交的新任务排在它之后，执行完才开始
+    - 同一 (数据集, 阶段) 不会同时执行两次（run_exclusive 也遵守这一点）
+    - 优先级高的先执行，同优先级按提交顺序
+    """
+
+    def __init__(self, workers: int = 1, finished_limit: int = FINISHED_JOBS_LIMIT):
+        """
+        初始化任务队列
+
+        Args:
+            workers: 工作线程数
+            finished_limit: 保留的已结束任务数量
+        """
+        self.workers = max(1, int(workers))
+        self._cond = threading.Condition()
+        self._heap: List[tuple] = []
+        self._queued: Dict[Tuple[str, str], Job] = {}
+        self._running: Dict[Tuple[str, str], Job] = {}
+        self._finished: deque = deque(maxlen=finished_limit)
+        self._sequence = 0
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+        # 每次 close() 加一，上一代的工作线程据此退出，reopen() 后启动新一代
+        self._generation = 0
+
+    def submit(
+        self,
+        dataset: str,
+        stage: str,
+        func: Callable[[], Any],
+        priority: int = PRIORITY_PERIODIC,
+        trigger: str = 'periodic'
+    ) -> Job:
+        """
+        提交任务，已有相同 (数据集, 阶段) 的排队任务时合并
+
+        Returns:
+            实际会执行的任务（可能是之前提交的）
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('Job queue is closed')
+            job = self._queued.get((dataset, stage))
+            if job is not None:
+                job.merged += 1
+                if priority > job.priority:
+                    job.priority = priority
+                    job.trigger = trigger
+                    self._push(job)
+                logger.debug(f"Merged duplicate job {dataset}/{stage} ({trigger})")
+                return job
+
+            job = Job(dataset, stage, priority, trigger, func)
+            self._queued[job.key] = job
+            self._push(job)
+            self._start_workers()
+            self._cond.notify_all()
+            return job
+
+    def _push(self, job: Job) -> None:
+        # 提升优先级时旧的堆条目保留，出队时按当前优先级识别并丢弃
+        self._sequence += 1
+        heapq.heappush(self._heap, (-job.priority, self._sequence, job))
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._worker, args=(self._generation,),
+                name=f'job-worker-{len(self._threads)}', daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _next_job(self, generation: int) -> Optional[Job]:
+        """取出优先级最高、且同一 (数据集, 阶段) 没有在执行的任务；队列关闭时返回 None"""
+        with self._cond:
+            while True:
+                if self._closed or generation != self._generation:
+                    return None
+                deferred = []
+                job = None
+                while self._heap:
+                    entry = heapq.heappop(self._heap)
+                    candidate = entry[2]
+                    if self._queued.get(candidate.key) is not candidate or -entry[0] != candidate.priority:
+                        continue
+                    if candidate.key in self._running:
+                        deferred.append(entry)
+                        continue
+                    job = candidate
+                    break
+                for entry in deferred:
+                    heapq.heappush(self._heap, entry)
+                if job is not None:
+                    del self._queued[job.key]
+                    self._mark_running(job)
+                    return job
+                self._cond.wait()
+
+    def _mark_running(self, job: Job) -> None:
+        job.state = 'running'
+        job.started_at = time.time()
+        self._running[job.key] = job
+
+    def _finish(self, job: Job, error: Optional[BaseException]) -> None:
+        with self._cond:
+            job.finished_at = time.time()
+            job.state = 'failed' if error is not None else 'finished'
+            job.error = str(error) if error is not None else None
+            del self._running[job.key]
+            self._finished.append(job)
+            self._cond.notify_all()
+        job.done.set()
+
+    def _worker(self, generation: int) -> None:
+        while True:
+            job = self._next_job(generation)
+            if job is None:
+                return
+            error = None
+            try:
+                job.func()
+            except Exception as e:
+                logger.exception(f"Job {job.dataset}/{job.stage} failed")
+                error = e
+            self._finish(job, error)
+
+    @contextmanager
+    def run_exclusive(self, dataset: str, stage: str, trigger: str = 'inline'):
+        """
+        在当前线程中执行一个阶段，并登记为运行中的任务
+
+        同一 (数据集, 阶段) 正在执行时先等待它结束，避免例如同一数据集被同时打包两次
+        """
+        job = Job(dataset, stage, PRIORITY_MANUAL, trigger)
+        with self._cond:
+            while job.key in self._running:
+                self._cond.wait()
+            self._mark_running(job)
+        error = None
+        try:
+            yield job
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(job, error)
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """排队中、运行中和最近结束的任务（/api/jobs）"""
+        with self._cond:
+            queued = sorted(self._queued.values(), key=lambda j: (-j.priority, j.queued_at))
+            jobs = list(self._running.values()) + queued + list(reversed(self._finished))
+            return [job.to_dict() for job in jobs]
+
+    def close(self) -> None:
+        """关闭队列：丢弃排队中的任务，工作线程在当前任务结束后退出"""
+        with self._cond:
+            self._closed = True
+            self._generation += 1
+            self._threads = []
+            dropped = list(self._queued.values())
+            self._queued.clear()
+            self._heap.clear()
+            self._cond.notify_all()
+        for job in dropped:
+            job.state = 'cancelled'
+            job.done.set()
+
+    def reopen(self) -> None:
+        """重新接受任务（调度器停止后再次启动时调用），工作线程在下次提交时启动"""
+        with self._cond:
+            self._closed = False
@@ -77,7 +77,7 @@ def main():
         )
         
         # 初始化HTTP服务器
-        server = DataHubServer(config, state_manager)
+        server = DataHubServer(config, state_manager, catalog=scheduler.catalog, jobs=scheduler.jobs, packager=scheduler.packager)
         
         logger.info("All components initialized successfully")
         
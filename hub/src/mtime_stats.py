@@ -0,0 +1,108 @@
+"""
+MtimeStats - mtime/大小数组上的向量化统计
+安装了 NumPy 时把扫描得到的 array 零拷贝包装为 ndarray，一次遍历完成计数、求和、分位数和直方图；
+没有 NumPy 时退回到标准库实现，结果一致
+"""
+
+from array import array
+from collections import Counter
+from typing import Optional, Dict, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 是可选依赖
+    np = None
+
+HAS_NUMPY = np is not None
+
+
+def as_vector(values: Sequence[float]):
+    """
+    把 mtime/大小序列转换为向量
+
+    NumPy 可用时返回 ndarray（array('d')/array('q') 直接共享缓冲区，不复制），
+    否则原样返回
+    """
+    if np is None or isinstance(values, np.ndarray):
+        return values
+    if isinstance(values, array):
+        return np.frombuffer(values, dtype=values.typecode) if len(values) else np.empty(0, dtype=values.typecode)
+    return np.asarray(values, dtype=float)
+
+
+def count_above(values: Sequence[float], cutoff: float) -> int:
+    """统计大于 cutoff 的元素个数"""
+    if np is None:
+        return sum(1 for value in values if value > cutoff)
+    return int(np.count_nonzero(as_vector(values) > cutoff))
+
+
+def total(values: Sequence[float]):
+    """求和（大小数组返回 int）"""
+    if np is None or not len(values):
+        return sum(values)
+    result = as_vector(values).sum()
+    return int(result) if result.dtype.kind in 'iu' else float(result)
+
+
+def latest(values: Sequence[float]) -> Optional[float]:
+    """最大值，空序列返回 None"""
+    if not len(values):
+        return None
+    if np is None:
+        return max(values)
+    return float(as_vector(values).max())
+
+
+def percentile_index(count: int, percentile: float) -> int:
+    """分位数对应的下标：排序后第 int(n * p) 个元素（不插值），限制在有效范围内"""
+    return min(int(count * percentile), count - 1)
+
+
+def percentiles(values: Sequence[float], qs: Sequence[float]) -> List[Optional[float]]:
+    """
+    一次计算多个分位数
+
+    NumPy 可用时用 np.partition 一次划分出所有需要的下标（O(n)），
+    否则排序一次后按下标取值
+
+    Args:
+        values: mtime 等数值序列
+        qs: 分位数列表 (0.0-1.0)
+
+    Returns:
+        与 qs 一一对应的值，空序列时全部为 None
+    """
+    count = len(values)
+    if count == 0:
+        return [None for _ in qs]
+
+    indices = [percentile_index(count, q) for q in qs]
+    if np is None:
+        ordered = sorted(values)
+        return [ordered[i] for i in indices]
+
+    partitioned = np.partition(as_vector(values), sorted(set(indices)))
+    return [float(partitioned[i]) for i in indices]
+
+
+def minute_histogram(values: Sequence[float], since: Optional[float] = None) -> Dict[int, int]:
+    """
+    按分钟统计 mtime 分布
+
+    Args:
+        values: mtime 序列（Unix 时间戳）
+        since: 只统计大于该时间的 mtime，None 表示全部
+
+    Returns:
+        {分钟起始时间戳: 文件数}，按时间升序
+    """
+    if np is None:
+        counts = Counter(int(value // 60) * 60 for value in values if since is None or value > since)
+        return dict(sorted(counts.items()))
+
+    vector = as_vector(values)
+    if since is not None:
+        vector = vector[vector > since]
+    minutes, counts = np.unique((vector // 60).astype(np.int64), return_counts=True)
+    return {int(minute) * 60: int(count) for minute, count in zip(minutes, counts)}
@@ -4,14 +4,173 @@ Packager - 异步打包器
 """
 
 import os
+import re
+import json
+import zlib
+import shutil
+import hashlib
 import zipfile
 import logging
+import time
+import tempfile
+import threading
+import itertools
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
 
 logger = logging.getLogger(__name__)
 
+# FileCatalog 记录的文件状态，字段与 os.stat_result 同名，打包流程无需区分来源
+_FileStat = namedtuple('_FileStat', ['st_size', 'st_mtime', 'st_mode'])
+
+# 版本号即包文件名中的时间戳部分
+VERSION_PATTERN = re.compile(r'^\d{8}_\d{6}$')
+
+# 增量包中记录基准版本和删除列表的成员名
+DELTA_INFO_NAME = '__delta__.json'
+
+# 增量包中追加补丁（只含尾部新增字节）的成员名前缀
+APPEND_PREFIX = '__append__/'
+
+# 打包时读取文件的块大小
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# 并行压缩时单个成员的压缩结果超过该大小后落盘暂存
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# blob 库中新写入的 blob 在该时间内不会被回收（可能属于正在打包、尚未写出清单的版本）
+BLOB_GC_GRACE_SECONDS = 24 * 3600
+
+# 分块并行压缩时每个块的大小，以及作为下一块预设字典的窗口大小
+DEFLATE_BLOCK_SIZE = 1024 * 1024
+DEFLATE_WINDOW_SIZE = 32 * 1024
+
+
+def package_version(dataset_name: str, zip_path) -> Optional[str]:
+    """
+    从包文件名 {dataset}_{timestamp}.zip 中取出版本号
+    
+    Args:
+        dataset_name: 数据集名称
+        zip_path: zip 文件路径
+        
+    Returns:
+        版本号（时间戳字符串），文件名不匹配时返回 None
+    """
+    stem = Path(zip_path).stem
+    prefix = f"{dataset_name}_"
+    if not stem.startswith(prefix):
+        return None
+    version = stem[len(prefix):]
+    return version if VERSION_PATTERN.match(version) else None
+
+
+def manifest_path(zip_path) -> Path:
+    """获取包对应的清单文件路径 {dataset}_{timestamp}.manifest.json"""
+    zip_path = Path(zip_path)
+    return zip_path.with_name(f"{zip_path.stem}.manifest.json")
+
+
+def delta_path(cache_dir, dataset_name: str, base_version: str, version: str) -> Path:
+    """获取从 base_version 到 version 的增量包路径"""
+    return Path(cache_dir) / 'deltas' / f"{dataset_name}_{base_version}_to_{version}.zip"
+
+
+def content_fingerprint(files: Dict[str, Dict[str, Any]]) -> str:
+    """数据集内容指纹：按成员名排序的 (成员名, sha256) 的 sha256，与 mtime 无关"""
+    hasher = hashlib.sha256()
+    for name in sorted(files):
+        hasher.update(f"{name}\0{files[name]['sha256']}\n".encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def blob_path(cache_dir, sha256: str) -> Path:
+    """获取内容哈希为 sha256 的 blob 路径 blobs/{sha256[:2]}/{sha256}"""
+    return Path(cache_dir) / 'blobs' / sha256[:2] / sha256
+
+
+def _deflate_block(block: bytes, dictionary: bytes) -> bytes:
+    """
+    压缩一个块：以前一块末尾 32KB 作为预设字典，Z_SYNC_FLUSH 结束于字节边界，
+    这样各块的输出按顺序拼接后就是一个合法的 raw deflate 流
+    """
+    if dictionary:
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    return compressor.compress(block) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class _BlockDeflater:
+    """
+    分块并行 raw deflate 压缩器（pigz 风格），接口与 zlib.compressobj 相同
+    
+    输入按 DEFLATE_BLOCK_SIZE 切块提交到线程池，compress() 按顺序返回已完成的块；
+    在途块数超过 max_pending 时等待最早的块完成，控制内存占用。
+    flush() 在最后追加一个空的结束块，使整个流可被标准 zipfile 解压
+    """
+    
+    def __init__(self, executor: ThreadPoolExecutor, max_pending: int):
+        self._executor = executor
+        self._max_pending = max_pending
+        self._buffer = bytearray()
+        self._dictionary = b''
+        self._pending = deque()
+    
+    def compress(self, data: bytes) -> bytes:
+        self._buffer += data
+        while len(self._buffer) >= DEFLATE_BLOCK_SIZE:
+            block = bytes(self._buffer[:DEFLATE_BLOCK_SIZE])
+            del self._buffer[:DEFLATE_BLOCK_SIZE]
+            self._submit(block)
+        return self._collect(self._max_pending)
+    
+    def flush(self) -> bytes:
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        return self._collect(0) + zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15).flush()
+    
+    def _submit(self, block: bytes) -> None:
+        self._pending.append(self._executor.submit(_deflate_block, block, self._dictionary))
+        self._dictionary = block[-DEFLATE_WINDOW_SIZE:]
+    
+    def _collect(self, keep: int) -> bytes:
+        output = []
+        while len(self._pending) > keep:
+            output.append(self._pending.popleft().result())
+        return b''.join(output)
+
+
+class _HashingWriter:
+    """
+    只写文件包装：写入 zip 的同时计算整个包的 sha256
+    
+    不提供 seek，ZipFile 会以流式模式（数据描述符）写入，保证每个字节只经过一次
+    """
+    
+    def __init__(self, f):
+        self._f = f
+        self._hasher = hashlib.sha256()
+        self._position = 0
+    
+    def write(self, data) -> int:
+        self._hasher.update(data)
+        self._position += len(data)
+        return self._f.write(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def flush(self) -> None:
+        self._f.flush()
+    
+    def hexdigest(self) -> str:
+        return self._hasher.hexdigest()
+
 
 class Packager:
     """
@@ -22,23 +181,56 @@ class Packager:
     2. 自动生成带时间戳的文件名
     3. 清理旧版本，只保留指定数量的版本
     4. 获取最新包的路径
+    5. 为每个版本写入文件清单（每个文件的大小、mtime、CRC32、SHA-256 以及整包摘要），
+       并生成相对上一版本的增量包
+    6. 只在尾部追加了行的文件在增量包中只携带尾部字节（追加补丁）
+    7. workers > 1 时由线程池并行压缩成员（zlib 压缩时释放 GIL），按原顺序写入标准 zip；
+       超过 block_threshold 的大文件再切块并行压缩
+    8. blob_store 模式下每个文件的压缩数据按内容哈希存为 blob，跨版本只存一份；
+       版本即引用 blob 的清单，只保留最新版本的 zip，其余版本按需用 materialize() 重建
+    9. 内容与最新版本一致时不生成新版本：先按 (路径, 大小, mtime) 与清单比较，
+       只有 mtime 变化的文件才计算 sha256；一致时重新发布已有的包（结果中 skipped 为 True）
     """
     
-    def __init__(self, cache_dir: str, keep_versions: int = 5):
+    def __init__(
+        self,
+        cache_dir: str,
+        keep_versions: int = 5,
+        catalog=None,
+        workers: int = 1,
+        block_threshold: int = 64 * 1024 * 1024,
+        blob_store: bool = False,
+        file_catalog=None
+    ):
         """
         初始化打包器
         
         Args:
             cache_dir: zip 文件缓存目录
             keep_versions: 保留的版本数量，默认 5
+            catalog: 可选的 DatasetCatalog，打包完成后同步更新元数据
+            workers: 并行压缩的线程数，默认 1（逐个压缩）
+            block_threshold: 单个文件达到该大小（字节）时切块并行压缩，仅 workers > 1 时生效
+            blob_store: 是否启用内容寻址的 blob 库（未变化的文件不再读取和压缩）
+            file_catalog: 可选的 FileCatalog，打包前完整刷新并由它提供成员列表，与新鲜度检查共享
         """
         self.cache_dir = Path(cache_dir)
         self.keep_versions = keep_versions
+        self.catalog = catalog
+        self.workers = max(1, int(workers))
+        self.block_threshold = block_threshold
+        self.blob_store = blob_store
+        self.file_catalog = file_catalog
+        # 已确认内容未变的文件：数据集 -> (版本, {成员名: (大小, mtime)})，避免每次重新计算哈希
+        self._verified: Dict[str, Tuple[str, Dict[str, Tuple[int, float]]]] = {}
         
         # 确保缓存目录存在
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
-        logger.info(f"Packager initialized: cache_dir={cache_dir}, keep_versions={keep_versions}")
+        logger.info(
+            f"Packager initialized: cache_dir={cache_dir}, keep_versions={keep_versions}, "
+            f"workers={self.workers}, blob_store={self.blob_store}"
+        )
     
     def package(self, dataset_name: str, data_dir: str) -> Dict[str, Any]:
         """
@@ -54,6 +246,10 @@ class Packager:
                 - zip_path (str): zip 文件路径
                 - file_count (int): 打包的文件数量
                 - zip_size (int): zip 文件大小（字节）
+                - version (str): 版本号
+                - delta_path (str): 相对上一版本的增量包路径（没有上一版本时为 None）
+                - fingerprint (str): 数据集内容指纹
+                - skipped (bool): 内容未变化，沿用已有的包
                 - error (str): 错误信息（如果失败）
         """
         data_path = Path(data_dir)
@@ -88,18 +284,64 @@ class Packager:
         
         logger.info(f"Starting package: {dataset_name} -> {zip_path}")
         
+        # 上一版本的清单，用于生成增量包
+        previous_manifest = self._load_previous_manifest(dataset_name, timestamp)
+        base_files = previous_manifest.get('files', {}) if previous_manifest else {}
+        
         try:
+            # 递归遍历数据目录，先收集成员列表
+            entries = []
+            for file_path, arcname, stat in self._list_files(dataset_name, data_path):
+                # 上一版本更短的文件可能是纯追加，写入时顺带计算旧长度前缀的哈希
+                base_size = base_files.get(arcname, {}).get('size')
+                prefix_size = base_size if base_size is not None and base_size < stat.st_size else None
+                entries.append((file_path, arcname, stat, prefix_size))
+            
+            # 内容与最新版本一致（例如上游重跑只改了 mtime）时不生成新版本，重新发布已有的包
+            if previous_manifest is not None and self._matches_manifest(dataset_name, entries, previous_manifest):
+                return self._republish(dataset_name, previous_manifest)
+            
             # 创建 zip 文件
             file_count = 0
-            with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
-                # 递归遍历数据目录
-                for file_path in data_path.rglob('*'):
-                    if file_path.is_file():
-                        # 保留相对于数据目录的相对路径结构
-                        arcname = file_path.relative_to(data_path)
-                        zf.write(file_path, arcname)
-                        file_count += 1
-                        logger.debug(f"Added to zip: {file_path} -> {arcname}")
+            total_size = 0
+            latest_mtime = None
+            files: Dict[str, Dict[str, Any]] = {}
+            prefix_digests: Dict[str, str] = {}
+            # 所有哈希都在压缩这一遍中计算，不再二次读取源文件或 zip
+            with open(zip_path, 'wb') as raw, \
+                    zipfile.ZipFile(_HashingWriter(raw), 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+                if self.blob_store or self.workers > 1:
+                    results = self._write_members_parallel(zf, entries, base_files)
+                else:
+                    results = (
+                        self._write_member(zf, file_path, arcname, prefix_size)
+                        for file_path, arcname, _, prefix_size in entries
+                    )
+                
+                for (file_path, arcname, stat, _), result in zip(entries, results):
+                    size, crc, digest, prefix_digest = result
+                    file_count += 1
+                    
+                    # 顺带统计元数据，供清单和 DatasetCatalog 使用
+                    files[arcname] = {
+                        'size': size,
+                        'mtime': stat.st_mtime,
+                        'mode': stat.st_mode & 0xFFFF,
+                        'crc32': crc,
+                        'sha256': digest
+                    }
+                    if prefix_digest is not None:
+                        prefix_digests[arcname] = prefix_digest
+                    total_size += size
+                    if latest_mtime is None or stat.st_mtime > latest_mtime:
+                        latest_mtime = stat.st_mtime
+                    logger.debug(f"Added to zip: {file_path} -> {arcname}")
+                
+                # 压缩后大小由 zipfile 登记的成员信息给出（blob 模式重建 zip 时需要）
+                for arcname, info in files.items():
+                    info['compress_size'] = zf.NameToInfo[arcname].compress_size
+                
+                package_writer = zf.fp
             
             # 获取 zip 文件大小
             zip_size = zip_path.stat().st_size
@@ -109,14 +351,53 @@ class Packager:
                 f"files={file_count}, size={zip_size} bytes"
             )
             
+            manifest = {
+                'dataset': dataset_name,
+                'version': timestamp,
+                'package_size': zip_size,
+                'package_sha256': package_writer.hexdigest(),
+                'file_count': file_count,
+                'total_size': total_size,
+                'fingerprint': content_fingerprint(files),
+                'files': files
+            }
+            self._write_manifest(zip_path, manifest)
+            
+            # 生成相对上一版本的增量包（失败不影响完整包）
+            delta_zip = None
+            if previous_manifest is not None:
+                try:
+                    delta_zip = self._build_delta(
+                        dataset_name, zip_path, previous_manifest, manifest, prefix_digests
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to build delta package for {dataset_name}: {e}")
+            
             # 清理旧版本
             self._cleanup_old_versions(dataset_name)
             
+            last_updated = datetime.fromtimestamp(latest_mtime).isoformat() if latest_mtime else None
+            if self.catalog is not None:
+                self.catalog.record_package(
+                    dataset_name,
+                    str(zip_path),
+                    zip_size,
+                    file_count=file_count,
+                    total_size=total_size,
+                    last_updated=last_updated
+                )
+            
             return {
                 'success': True,
                 'zip_path': str(zip_path),
                 'file_count': file_count,
+                'total_size': total_size,
+                'last_updated': last_updated,
                 'zip_size': zip_size,
+                'version': timestamp,
+                'delta_path': str(delta_zip) if delta_zip else None,
+                'fingerprint': manifest['fingerprint'],
+                'skipped': False,
                 'error': None
             }
             
@@ -139,6 +420,568 @@ class Packager:
                 'error': error_msg
             }
     
+    def _matches_manifest(self, dataset_name: str, entries: List[tuple], manifest: Dict[str, Any]) -> bool:
+        """
+        判断待打包的文件与清单中的内容是否一致
+        
+        成员集合或任一文件大小不同即不一致；大小和 mtime 都相同的文件视为未变；
+        只有 mtime 变化的文件才读取并计算 sha256 与清单比较
+        """
+        files = manifest.get('files', {})
+        if len(files) != len(entries):
+            return False
+        
+        version = manifest.get('version')
+        verified = self._verified.get(dataset_name)
+        known = verified[1] if verified is not None and verified[0] == version else {}
+        
+        to_hash = []
+        for file_path, arcname, stat, _ in entries:
+            info = files.get(arcname)
+            if info is None or info.get('size') != stat.st_size:
+                return False
+            if info.get('mtime') != stat.st_mtime and known.get(arcname) != (stat.st_size, stat.st_mtime):
+                to_hash.append((file_path, arcname, stat))
+        
+        for file_path, arcname, stat in to_hash:
+            hasher = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+            if hasher.hexdigest() != files[arcname].get('sha256'):
+                return False
+            known[arcname] = (stat.st_size, stat.st_mtime)
+        
+        self._verified[dataset_name] = (version, known)
+        if to_hash:
+            logger.info(f"{len(to_hash)} files of {dataset_name} changed mtime but not content")
+        return True
+    
+    def _republish(self, dataset_name: str, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """内容未变化时重新发布最新版本的包"""
+        zip_path = self.get_latest_package(dataset_name)
+        zip_size = Path(zip_path).stat().st_size
+        logger.info(f"Content of {dataset_name} unchanged since {manifest['version']}, skipping packaging")
+        
+        if self.catalog is not None:
+            self.catalog.record_package(
+                dataset_name,
+                zip_path,
+                zip_size,
+                file_count=manifest.get('file_count'),
+                total_size=manifest.get('total_size')
+            )
+        
+        return {
+            'success': True,
+            'zip_path': zip_path,
+            'file_count': manifest.get('file_count', 0),
+            'total_size': manifest.get('total_size'),
+            'last_updated': None,
+            'zip_size': zip_size,
+            'version': manifest['version'],
+            'delta_path': None,
+            'fingerprint': manifest.get('fingerprint') or content_fingerprint(manifest.get('files', {})),
+            'skipped': True,
+            'error': None
+        }
+    
+    def _list_files(self, dataset_name: str, data_path: Path) -> List[Tuple[Path, str, Any]]:
+        """
+        列出数据目录下要打包的文件
+        
+        配置了 FileCatalog 且数据目录就是该数据集的目录时，先完整刷新（不信任目录 mtime，
+        避免原地追加的文件以旧的大小/mtime 打包或复用 blob），再由它给出成员列表
+        
+        Returns:
+            (源文件路径, 成员名, stat) 列表
+        """
+        if self.file_catalog is not None:
+            root = self.file_catalog.dataset_root(dataset_name)
+            if root is not None and root.resolve() == data_path.resolve():
+                self.file_catalog.refresh(dataset_name, full=True)
+                return [
+                    (data_path / rel, Path(rel).as_posix(), _FileStat(size, mtime, mode))
+                    for rel, size, mtime, mode in self.file_catalog.entries(dataset_name)
+                ]
+        
+        files = []
+        for file_path in data_path.rglob('*'):
+            if file_path.is_file():
+                # 保留相对于数据目录的相对路径结构
+                files.append((file_path, file_path.relative_to(data_path).as_posix(), file_path.stat()))
+        return files
+    
+    @staticmethod
+    def _write_member(
+        zf: zipfile.ZipFile,
+        file_path: Path,
+        arcname: str,
+        prefix_size: Optional[int] = None
+    ) -> Tuple[int, int, str, Optional[str]]:
+        """
+        分块写入单个文件到 zip，同时计算 sha256（CRC32 由 zipfile 在写入时计算）
+        
+        Args:
+            zf: 打开的 ZipFile
+            file_path: 源文件路径
+            arcname: zip 内的成员名
+            prefix_size: 需要额外计算前缀哈希的长度（None 表示不计算）
+            
+        Returns:
+            (写入字节数, CRC32, 全文 sha256, 前 prefix_size 字节的 sha256 或 None)
+        """
+        zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+        zinfo.compress_type = zf.compression
+        hasher = hashlib.sha256()
+        prefix_digest = None
+        written = 0
+        
+        with open(file_path, 'rb') as src, zf.open(zinfo, 'w') as dest:
+            while True:
+                chunk = src.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if prefix_size is not None and prefix_digest is None and written + len(chunk) >= prefix_size:
+                    split = prefix_size - written
+                    hasher.update(chunk[:split])
+                    prefix_digest = hasher.hexdigest()
+                    hasher.update(chunk[split:])
+                else:
+                    hasher.update(chunk)
+                dest.write(chunk)
+                written += len(chunk)
+        
+        return written, zinfo.CRC, hasher.hexdigest(), prefix_digest
+    
+    def _write_members_parallel(
+        self,
+        zf: zipfile.ZipFile,
+        entries: List[tuple],
+        base_files: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        """
+        在线程池中压缩成员并按原顺序写入 zip
+        
+        工作线程完成 raw deflate 和哈希计算，主线程只负责顺序写出；
+        同时在途的成员数限制为 workers * 2，控制内存占用。
+        超过 block_threshold 的成员在独立的块线程池中切块压缩，
+        避免成员线程等待块任务时占满同一个线程池。
+        blob 模式下工作线程改为 _store_blob，未变化的文件直接复用上一版本的 blob
+        
+        Args:
+            zf: 打开的 ZipFile
+            entries: (源文件路径, 成员名, stat, 前缀长度) 列表
+            base_files: 上一版本清单中的文件信息（blob 模式用于复用）
+            
+        Yields:
+            与 _write_member 相同的 (写入字节数, CRC32, 全文 sha256, 前缀 sha256) 元组
+        """
+        has_large = self.workers > 1 and any(stat.st_size >= self.block_threshold for _, _, stat, _ in entries)
+        block_executor = (
+            ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='packager-block')
+            if has_large else None
+        )
+        base_files = base_files or {}
+        
+        entry_iter = iter(entries)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='packager') as executor:
+                def submit(file_path, arcname, stat, prefix_size):
+                    if self.blob_store:
+                        return executor.submit(
+                            self._store_blob, file_path, arcname, stat, prefix_size,
+                            base_files.get(arcname), block_executor
+                        )
+                    return executor.submit(self._compress_member, file_path, arcname, prefix_size, block_executor)
+                
+                pending = deque(
+                    submit(*entry) for entry in itertools.islice(entry_iter, self.workers * 2)
+                )
+                while pending:
+                    zinfo, spool, result = pending.popleft().result()
+                    try:
+                        self._write_compressed(zf, zinfo, spool)
+                    finally:
+                        spool.close()
+                    
+                    for entry in itertools.islice(entry_iter, 1):
+                        pending.append(submit(*entry))
+                    
+                    yield result
+        finally:
+            if block_executor is not None:
+                block_executor.shutdown(wait=True)
+    
+    def _store_blob(
+        self,
+        file_path: Path,
+        arcname: str,
+        stat: os.stat_result,
+        prefix_size: Optional[int] = None,
+        base_info: Optional[Dict[str, Any]] = None,
+        block_executor: Optional[ThreadPoolExecutor] = None
+    ) -> tuple:
+        """
+        blob 模式的工作线程：大小和 mtime 与上一版本相同且 blob 存在时直接复用，
+        否则压缩文件并按内容哈希写入 blob 库（已存在相同内容时不重复写）
+        
+        Returns:
+            (ZipInfo, 打开的 blob 文件, (写入字节数, CRC32, 全文 sha256, 前缀 sha256))
+        """
+        if (
+            base_info is not None
+            and base_info.get('size') == stat.st_size
+            and base_info.get('mtime') == stat.st_mtime
+            and 'compress_size' in base_info
+        ):
+            path = blob_path(self.cache_dir, base_info['sha256'])
+            if path.is_file():
+                zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+                zinfo.file_size = base_info['size']
+                zinfo.compress_size = base_info['compress_size']
+                zinfo.CRC = base_info['crc32']
+                return zinfo, open(path, 'rb'), (
+                    base_info['size'], base_info['crc32'], base_info['sha256'], None
+                )
+        
+        zinfo, spool, result = self._compress_member(file_path, arcname, prefix_size, block_executor)
+        try:
+            path = blob_path(self.cache_dir, result[2])
+            if not path.is_file():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with tempfile.NamedTemporaryFile(dir=path.parent, suffix='.tmp', delete=False) as temp:
+                    spool.seek(0)
+                    shutil.copyfileobj(spool, temp, COPY_CHUNK_SIZE)
+                os.replace(temp.name, path)
+        finally:
+            spool.close()
+        
+        return zinfo, open(path, 'rb'), result
+    
+    def _compress_member(
+        self,
+        file_path: Path,
+        arcname: str,
+        prefix_size: Optional[int] = None,
+        block_executor: Optional[ThreadPoolExecutor] = None
+    ) -> tuple:
+        """
+        在工作线程中压缩单个文件（raw deflate，与 ZIP_DEFLATED 默认级别一致）
+        
+        文件达到 block_threshold 且提供了 block_executor 时切块并行压缩；
+        CRC32 和 sha256 始终在读取时顺序计算
+        
+        Returns:
+            (ZipInfo, 压缩数据暂存文件, (写入字节数, CRC32, 全文 sha256, 前缀 sha256))
+        """
+        zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        if block_executor is not None and zinfo.file_size >= self.block_threshold:
+            compressor = _BlockDeflater(block_executor, self.workers * 2)
+        else:
+            compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        hasher = hashlib.sha256()
+        prefix_digest = None
+        crc = 0
+        written = 0
+        
+        try:
+            with open(file_path, 'rb') as src:
+                while True:
+                    chunk = src.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if prefix_size is not None and prefix_digest is None and written + len(chunk) >= prefix_size:
+                        split = prefix_size - written
+                        hasher.update(chunk[:split])
+                        prefix_digest = hasher.hexdigest()
+                        hasher.update(chunk[split:])
+                    else:
+                        hasher.update(chunk)
+                    crc = zlib.crc32(chunk, crc)
+                    spool.write(compressor.compress(chunk))
+                    written += len(chunk)
+            spool.write(compressor.flush())
+        except BaseException:
+            spool.close()
+            raise
+        
+        zinfo.file_size = written
+        zinfo.compress_size = spool.tell()
+        zinfo.CRC = crc
+        return zinfo, spool, (written, crc, hasher.hexdigest(), prefix_digest)
+    
+    @staticmethod
+    def _write_compressed(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, spool) -> None:
+        """
+        把已压缩好的成员写入 zip：本地文件头 + 压缩数据，
+        并登记到 ZipFile 的成员列表，由 close() 统一写出中央目录
+        """
+        fp = zf.fp
+        zinfo.header_offset = fp.tell()
+        fp.write(zinfo.FileHeader(None))
+        spool.seek(0)
+        shutil.copyfileobj(spool, fp, COPY_CHUNK_SIZE)
+        zf.start_dir = fp.tell()
+        zf.filelist.append(zinfo)
+        zf.NameToInfo[zinfo.filename] = zinfo
+    
+    def _write_manifest(self, zip_path: Path, manifest: Dict[str, Any]) -> Path:
+        """
+        写入包的清单文件（临时文件 + 原子重命名）
+        
+        Args:
+            zip_path: zip 文件路径
+            manifest: 清单内容
+            
+        Returns:
+            清单文件路径
+        """
+        path = manifest_path(zip_path)
+        temp_path = path.with_name(path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return path
+    
+    def load_manifest(self, zip_path: str) -> Optional[Dict[str, Any]]:
+        """
+        读取包的清单文件
+        
+        Args:
+            zip_path: zip 文件路径
+            
+        Returns:
+            清单字典，不存在或损坏时返回 None
+        """
+        path = manifest_path(zip_path)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Failed to load manifest {path}: {e}")
+            return None
+    
+    def _load_previous_manifest(self, dataset_name: str, version: str) -> Optional[Dict[str, Any]]:
+        """获取上一版本（最新的已有包）的清单"""
+        latest = self.get_latest_package(dataset_name)
+        if latest is None or package_version(dataset_name, latest) in (None, version):
+            return None
+        return self.load_manifest(latest)
+    
+    def _build_delta(
+        self,
+        dataset_name: str,
+        zip_path: Path,
+        base_manifest: Dict[str, Any],
+        manifest: Dict[str, Any],
+        prefix_digests: Optional[Dict[str, str]] = None
+    ) -> Path:
+        """
+        生成增量包：只包含相对基准版本新增或变化（大小、mtime 或 sha256 不同）的文件，
+        以及记录基准版本和已删除路径的 __delta__.json
+        
+        纯追加的文件（旧长度前缀的哈希与基准版本一致）只以 __append__/ 成员
+        携带尾部字节，并在 __delta__.json 的 appends 中记录偏移和前缀哈希；
+        被改写的文件仍携带完整内容
+        
+        成员内容从刚写好的完整包中读取，而不是重新读取数据目录：打包之后数据目录
+        即使又发生变化，增量包也与完整包和清单描述的是同一份内容
+        
+        Args:
+            dataset_name: 数据集名称
+            zip_path: 新版本的完整包
+            base_manifest: 基准版本清单
+            manifest: 新版本清单
+            prefix_digests: 新版本文件前 {基准长度} 字节的 sha256
+            
+        Returns:
+            增量包路径
+        """
+        base_files = base_manifest.get('files', {})
+        files = manifest['files']
+        prefix_digests = prefix_digests or {}
+        
+        changed = [
+            name for name, info in files.items()
+            if name not in base_files
+            or base_files[name].get('size') != info['size']
+            or base_files[name].get('mtime') != info['mtime']
+            or base_files[name].get('sha256', info.get('sha256')) != info.get('sha256')
+        ]
+        deleted = sorted(name for name in base_files if name not in files)
+        
+        appends: Dict[str, Dict[str, Any]] = {}
+        for name in changed:
+            base_digest = base_files.get(name, {}).get('sha256')
+            if base_digest is not None and prefix_digests.get(name) == base_digest:
+                appends[name] = {
+                    'offset': base_files[name]['size'],
+                    'prefix_sha256': base_digest,
+                    'sha256': files[name]['sha256']
+                }
+        
+        path = delta_path(self.cache_dir, dataset_name, base_manifest['version'], manifest['version'])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + '.tmp')
+        
+        with zipfile.ZipFile(zip_path) as source, \
+                zipfile.ZipFile(temp_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            for name in changed:
+                if name in appends:
+                    self._write_tail(zf, source, name, APPEND_PREFIX + name, appends[name]['offset'])
+                else:
+                    self._write_tail(zf, source, name, name, 0)
+            zf.writestr(DELTA_INFO_NAME, json.dumps({
+                'dataset': dataset_name,
+                'base_version': base_manifest['version'],
+                'version': manifest['version'],
+                'deleted': deleted,
+                'appends': appends
+            }, ensure_ascii=False))
+        os.replace(temp_path, path)
+        
+        logger.info(
+            f"Delta package completed: {path.name}, "
+            f"changed={len(changed)}, appended={len(appends)}, deleted={len(deleted)}, "
+            f"size={path.stat().st_size} bytes"
+        )
+        return path
+    
+    @staticmethod
+    def _write_tail(
+        zf: zipfile.ZipFile,
+        source: zipfile.ZipFile,
+        name: str,
+        arcname: str,
+        offset: int
+    ) -> None:
+        """把完整包中成员 name 从 offset 开始的字节写入增量包的 arcname 成员"""
+        info = source.getinfo(name)
+        zinfo = zipfile.ZipInfo(arcname, info.date_time)
+        zinfo.compress_type = zf.compression
+        zinfo.external_attr = info.external_attr
+        zinfo.file_size = info.file_size - offset
+        
+        with source.open(info) as src, zf.open(zinfo, 'w') as dest:
+            if offset:
+                src.seek(offset)
+            shutil.copyfileobj(src, dest, COPY_CHUNK_SIZE)
+    
+    def materialize(self, dataset_name: str, version: str) -> Optional[str]:
+        """
+        按清单从 blob 库重建指定版本的完整 zip（blob 模式下旧版本只保留清单）
+        
+        Args:
+            dataset_name: 数据集名称
+            version: 版本号
+            
+        Returns:
+            zip 文件路径，清单或 blob 缺失时返回 None
+        """
+        if not VERSION_PATTERN.match(version):
+            return None
+        
+        zip_path = self.cache_dir / f"{dataset_name}_{version}.zip"
+        if zip_path.exists():
+            return str(zip_path)
+        
+        manifest = self.load_manifest(str(zip_path))
+        if manifest is None:
+            return None
+        
+        # 可能有多个下载请求同时重建同一版本，各自写自己的临时文件
+        temp_path = zip_path.with_name(f"{zip_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(temp_path, 'wb') as raw, \
+                    zipfile.ZipFile(_HashingWriter(raw), 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+                for arcname, info in manifest['files'].items():
+                    zinfo = zipfile.ZipInfo(arcname, time.localtime(info['mtime'])[:6])
+                    zinfo.compress_type = zipfile.ZIP_DEFLATED
+                    zinfo.external_attr = info.get('mode', 0o100644) << 16
+                    zinfo.file_size = info['size']
+                    zinfo.compress_size = info['compress_size']
+                    zinfo.CRC = info['crc32']
+                    with open(blob_path(self.cache_dir, info['sha256']), 'rb') as blob:
+                        self._write_compressed(zf, zinfo, blob)
+                package_writer = zf.fp
+        except (OSError, KeyError) as e:
+            logger.error(f"Failed to materialize {dataset_name} {version}: {e}")
+            temp_path.unlink(missing_ok=True)
+            return None
+        
+        if package_writer.hexdigest() != manifest.get('package_sha256'):
+            logger.warning(f"Materialized package digest differs from manifest: {zip_path.name}")
+        
+        os.replace(temp_path, zip_path)
+        
+        # 保持 mtime 早于最新版本，避免重建的旧版本被当作最新包
+        manifest_mtime = manifest_path(zip_path).stat().st_mtime
+        os.utime(zip_path, (manifest_mtime, manifest_mtime))
+        
+        logger.info(f"Materialized package from blobs: {zip_path.name}")
+        return str(zip_path)
+    
+    def _collect_garbage_blobs(self) -> int:
+        """
+        删除不被缓存目录中任何清单引用的 blob（所有数据集共享同一个 blob 库）
+        
+        Returns:
+            删除的 blob 数量
+        """
+        blobs_dir = self.cache_dir / 'blobs'
+        if not blobs_dir.exists():
+            return 0
+        
+        referenced = set()
+        for path in self.cache_dir.glob('*.manifest.json'):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    referenced.update(info['sha256'] for info in json.load(f).get('files', {}).values())
+            except (OSError, json.JSONDecodeError, KeyError) as e:
+                # 清单损坏时无法确定引用关系，本次不回收
+                logger.warning(f"Skipping blob GC, failed to read {path}: {e}")
+                return 0
+        
+        deleted = 0
+        cutoff = time.time() - BLOB_GC_GRACE_SECONDS
+        for path in blobs_dir.glob('*/*'):
+            if path.name in referenced:
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    deleted += 1
+            except OSError as e:
+                logger.warning(f"Failed to delete blob {path}: {e}")
+        
+        if deleted:
+            logger.info(f"Blob GC completed: deleted={deleted}")
+        return deleted
+    
+    def get_delta_package(self, dataset_name: str, base_version: str) -> Optional[str]:
+        """
+        获取从 base_version 到最新版本的增量包路径
+        
+        Args:
+            dataset_name: 数据集名称
+            base_version: 客户端当前持有的版本号
+            
+        Returns:
+            增量包路径，不存在时返回 None
+        """
+        latest = self.get_latest_package(dataset_name)
+        version = package_version(dataset_name, latest) if latest else None
+        if version is None or not VERSION_PATTERN.match(base_version):
+            return None
+        path = delta_path(self.cache_dir, dataset_name, base_version, version)
+        return str(path) if path.exists() else None
+    
     def _cleanup_old_versions(self, dataset_name: str) -> int:
         """
         清理旧版本，只保留最新的 keep_versions 个
@@ -159,8 +1002,11 @@ class Packager:
         
         deleted_count = 0
         
+        if self.blob_store:
+            deleted_count = self._cleanup_blob_versions(dataset_name, zip_files)
+        
         # 删除超出保留数量的旧版本
-        if len(zip_files) > self.keep_versions:
+        elif len(zip_files) > self.keep_versions:
             files_to_delete = zip_files[self.keep_versions:]
             
             for file_path in files_to_delete:
@@ -170,6 +1016,14 @@ class Packager:
                     logger.info(f"Deleted old version: {file_path.name}")
                 except OSError as e:
                     logger.warning(f"Failed to delete {file_path}: {e}")
+                
+                try:
+                    manifest_path(file_path).unlink(missing_ok=True)
+                except OSError as e:
+                    logger.warning(f"Failed to delete manifest of {file_path}: {e}")
+        
+        # 只保留指向最新版本的增量包
+        self._cleanup_old_deltas(dataset_name, zip_files[0] if zip_files else None)
         
         if deleted_count > 0:
             logger.info(
@@ -179,6 +1033,60 @@ class Packager:
         
         return deleted_count
     
+    def _cleanup_blob_versions(self, dataset_name: str, zip_files: List[Path]) -> int:
+        """
+        blob 模式的清理：保留最新的 keep_versions 个清单，只保留最新版本的 zip，
+        然后回收不再被引用的 blob
+        
+        Args:
+            dataset_name: 数据集名称
+            zip_files: 按 mtime 从新到旧排列的 zip 文件
+            
+        Returns:
+            int: 删除的版本（清单）数量
+        """
+        manifests = sorted(
+            self.cache_dir.glob(f"{dataset_name}_*.manifest.json"),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True
+        )
+        
+        deleted_count = 0
+        for path in manifests[self.keep_versions:]:
+            try:
+                path.unlink()
+                deleted_count += 1
+                logger.info(f"Deleted old version manifest: {path.name}")
+            except OSError as e:
+                logger.warning(f"Failed to delete {path}: {e}")
+        
+        # 旧版本的 zip 可随时从 blob 重建，不再常驻
+        for file_path in zip_files[1:]:
+            try:
+                file_path.unlink()
+                logger.info(f"Deleted superseded package: {file_path.name}")
+            except OSError as e:
+                logger.warning(f"Failed to delete {file_path}: {e}")
+        
+        self._collect_garbage_blobs()
+        return deleted_count
+    
+    def _cleanup_old_deltas(self, dataset_name: str, latest_zip: Optional[Path]) -> None:
+        """删除目标版本不是最新版本的增量包"""
+        deltas_dir = self.cache_dir / 'deltas'
+        if not deltas_dir.exists():
+            return
+        
+        latest_version = package_version(dataset_name, latest_zip) if latest_zip else None
+        for path in deltas_dir.glob(f"{dataset_name}_*_to_*.zip"):
+            if latest_version and path.stem.endswith(f"_to_{latest_version}"):
+                continue
+            try:
+                path.unlink()
+                logger.info(f"Deleted old delta: {path.name}")
+            except OSError as e:
+                logger.warning(f"Failed to delete {path}: {e}")
+    
     def get_latest_package(self, dataset_name: str) -> Optional[str]:
         """
         获取最新的 zip 包路径
@@ -219,6 +1127,9 @@ class Packager:
                 - size (int): 文件大小
                 - created (str): 创建时间 (ISO 格式)
         """
+        if self.blob_store:
+            return self._list_blob_versions(dataset_name)
+        
         pattern = f"{dataset_name}_*.zip"
         zip_files = sorted(
             self.cache_dir.glob(pattern),
@@ -238,6 +1149,30 @@ class Packager:
         
         return versions
     
+    def _list_blob_versions(self, dataset_name: str) -> List[Dict[str, Any]]:
+        """blob 模式下按清单列出版本，path 指向的 zip 可能需要 materialize() 重建"""
+        manifests = sorted(
+            self.cache_dir.glob(f"{dataset_name}_*.manifest.json"),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True
+        )
+        
+        versions = []
+        for path in manifests:
+            zip_path = path.with_name(path.name[:-len('.manifest.json')] + '.zip')
+            manifest = self.load_manifest(str(zip_path))
+            if manifest is None:
+                continue
+            versions.append({
+                'path': str(zip_path),
+                'filename': zip_path.name,
+                'size': manifest.get('package_size', 0),
+                'created': datetime.fromtimestamp(path.stat().st_mtime).isoformat(),
+                'materialized': zip_path.exists()
+            })
+        
+        return versions
+    
     def delete_package(self, zip_path: str) -> bool:
         """
         删除指定的 zip 包
@@ -256,6 +1191,7 @@ class Packager:
         
         try:
             path.unlink()
+            manifest_path(path).unlink(missing_ok=True)
             logger.info(f"Deleted package: {zip_path}")
             return True
         except OSError as e:
@@ -0,0 +1,183 @@
+"""
+PollSchedule - 结合交易日历的自适应轮询间隔
+从历史打包时间（state 中的 package_history / last_packaged_at）学习每个数据集通常到达的时段，
+交易日该时段内密集轮询，其他时间按小时退避，非交易日休眠到下一个到达时段
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List, Iterable
+
+logger = logging.getLogger(__name__)
+
+# 到达时段内的轮询间隔（秒）
+FAST_INTERVAL_SECONDS = 30
+
+# 交易日到达时段之外的轮询间隔（秒）
+IDLE_INTERVAL_SECONDS = 3600
+
+# 到达时段两侧额外放宽的时间（秒）
+WINDOW_MARGIN_SECONDS = 1800
+
+# 学习到达时段至少需要的天数
+MIN_HISTORY_DAYS = 3
+
+# 每个数据集保留的历史打包时间数量
+HISTORY_LIMIT = 60
+
+# 查找下一个到达时段时最多向后看的天数
+LOOKAHEAD_DAYS = 30
+
+DAY_SECONDS = 86400
+
+
+@dataclass
+class ArrivalWindow:
+    """
+    每天的到达时段（距午夜的秒数）
+
+    end < start 表示时段跨越午夜，午夜之后的部分属于前一个交易日
+    """
+    start: float
+    end: float
+
+    @property
+    def wraps(self) -> bool:
+        return self.end < self.start
+
+    def contains(self, seconds: float) -> bool:
+        if self.wraps:
+            return seconds >= self.start or seconds <= self.end
+        return self.start <= seconds <= self.end
+
+
+def _seconds_of_day(moment: datetime) -> float:
+    return moment.hour * 3600 + moment.minute * 60 + moment.second + moment.microsecond / 1e6
+
+
+def learn_window(
+    history: Iterable[str],
+    margin: float = WINDOW_MARGIN_SECONDS,
+    min_days: int = MIN_HISTORY_DAYS
+) -> Optional[ArrivalWindow]:
+    """
+    从历史打包时间学习到达时段
+
+    每天只取最早的一次打包（之后的重新打包不代表新数据到达）；
+    时刻按 24 小时环形处理：从最大的空档处切开，使跨午夜到达的时刻连续，
+    再取最早和最晚的到达时刻并两侧各放宽 margin
+
+    Args:
+        history: ISO 格式的打包时间
+        margin: 两侧放宽的秒数
+        min_days: 至少需要的天数，不足时返回 None
+
+    Returns:
+        ArrivalWindow，历史不足时为 None
+    """
+    first_per_day: Dict[str, datetime] = {}
+    for value in history:
+        try:
+            moment = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            continue
+        day = moment.date().isoformat()
+        if day not in first_per_day or moment < first_per_day[day]:
+            first_per_day[day] = moment
+    if len(first_per_day) < min_days:
+        return None
+
+    times = sorted(_seconds_of_day(m) for m in first_per_day.values())
+    # 最大空档（含从最晚时刻绕回最早时刻的空档）之后的时刻作为起点
+    gaps = [(times[(i + 1) % len(times)] - times[i]) % DAY_SECONDS for i in range(len(times))]
+    split = max(range(len(times)), key=gaps.__getitem__)
+    first = times[(split + 1) % len(times)]
+    last = times[split]
+    span = (last - first) % DAY_SECONDS
+    if span + 2 * margin >= DAY_SECONDS:
+        return ArrivalWindow(0.0, DAY_SECONDS)
+    return ArrivalWindow((first - margin) % DAY_SECONDS, (last + margin) % DAY_SECONDS)
+
+
+class PollSchedule:
+    """
+    自适应轮询策略
+
+    - 某个数据集处于到达时段（且该时段所属的日期是交易日）时，每 fast_interval 秒轮询一次
+    - 交易日到达时段之外：等待 idle_interval 与距下一个到达时段的较小者
+    - 非交易日：直接休眠到下一个到达时段
+    - 任一数据集历史不足时无法判断，使用固定的 default_interval
+    """
+
+    def __init__(
+        self,
+        calendar_reader=None,
+        default_interval: float = 600,
+        fast_interval: float = FAST_INTERVAL_SECONDS,
+        idle_interval: float = IDLE_INTERVAL_SECONDS,
+        margin: float = WINDOW_MARGIN_SECONDS
+    ):
+        """
+        初始化轮询策略
+
+        Args:
+            calendar_reader: CalendarReader，None 或日历为空时视每天为交易日
+            default_interval: 没有学到到达时段时的轮询间隔（秒）
+            fast_interval: 到达时段内的轮询间隔（秒）
+            idle_interval: 交易日到达时段之外的轮询间隔（秒）
+            margin: 到达时段两侧放宽的秒数
+        """
+        self.calendar_reader = calendar_reader
+        self.default_interval = default_interval
+        self.fast_interval = fast_interval
+        self.idle_interval = idle_interval
+        self.margin = margin
+        self.windows: Dict[str, Optional[ArrivalWindow]] = {}
+
+    def learn(self, histories: Dict[str, List[str]]) -> None:
+        """按数据集的历史打包时间重新学习到达时段"""
+        self.windows = {name: learn_window(history, self.margin) for name, history in histories.items()}
+
+    def _is_trade_day(self, day: datetime) -> bool:
+        if self.calendar_reader is None or not self.calendar_reader.get_trade_dates():
+            return True
+        return self.calendar_reader.is_trade_date(day.strftime('%Y-%m-%d'))
+
+    def _active(self, window: ArrivalWindow, now: datetime) -> bool:
+        seconds = _seconds_of_day(now)
+        if not window.contains(seconds):
+            return False
+        # 跨午夜时段中午夜之后的部分属于前一天
+        day = now - timedelta(days=1) if window.wraps and seconds <= window.end else now
+        return self._is_trade_day(day)
+
+    def _next_start(self, window: ArrivalWindow, now: datetime) -> Optional[datetime]:
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        for offset in range(LOOKAHEAD_DAYS + 1):
+            day = midnight + timedelta(days=offset)
+            start = day + timedelta(seconds=window.start)
+            if start > now and self._is_trade_day(day):
+                return start
+        return None
+
+    def next_delay(self, now: Optional[datetime] = None) -> float:
+        """
+        距下一次轮询的秒数
+
+        Args:
+            now: 当前时间，默认 datetime.now()
+        """
+        now = now or datetime.now()
+        if not self.windows or any(window is None for window in self.windows.values()):
+            return self.default_interval
+        if any(self._active(window, now) for window in self.windows.values()):
+            return self.fast_interval
+
+        starts = [start for start in (self._next_start(w, now) for w in self.windows.values()) if start]
+        until_window = min((start - now).total_seconds() for start in starts) if starts else None
+        if self._is_trade_day(now):
+            delay = self.idle_interval if until_window is None else min(self.idle_interval, until_window)
+        else:
+            delay = until_window if until_window is not None else self.idle_interval
+        return max(self.fast_interval, delay)
@@ -3,16 +3,29 @@ Scheduler - 定时调度器
 每10分钟检查数据集新鲜度，防抖后自动打包
 """
 
+import os
 import time
 import threading
 import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from calendar_reader import CalendarReader
-from freshness_checker import FreshnessChecker
+from dataset_catalog import DatasetCatalog
+from file_catalog import FileCatalog
+from freshness_checker import FreshnessChecker, FreshnessCounter, FreshnessResult
+from job_queue import JobQueue, PRIORITY_MANUAL, PRIORITY_PERIODIC
+from fs_watcher import (
+    InotifyWatcher, WatchEvent, inotify_available,
+    IN_Q_OVERFLOW, IN_ISDIR, CHANGE_MASK, REMOVE_MASK
+)
 from packager import Packager
+from poll_schedule import PollSchedule, HISTORY_LIMIT
 from state_manager import StateManager
+from worker_pool import WorkerPool
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +42,16 @@ class Scheduler:
        - 超过阈值 → 防抖30秒
        - 稳定 → 打包 → 更新状态
     3. 后台线程运行，不阻塞HTTP服务
+    4. check.watch 为 inotify/auto 时在 Linux 上改为事件驱动：监听数据集目录，
+       增量维护新鲜度计数，达到阈值且静默 debounce_seconds 后立即打包；
+       其他平台或监听失败时回退到轮询
+    5. 检查通过 JobQueue 执行，按 (数据集, 阶段) 去重，手动触发优先；
+       check.pipelines > 1 时每个数据集的检查、防抖和打包在各自的线程中并行执行；
+       打包按数据所在设备限流（packaging.per_device），同一块盘上的打包不互相争抢 I/O
+    6. server.worker_processes > 0 时轮询检查和打包在工作进程池中执行（见 worker_pool），
+       不与同一进程中的 HTTP 服务争抢 GIL；工作进程崩溃只让当前任务失败
+    7. check.schedule 为 adaptive 时轮询间隔由 PollSchedule 决定：从历史打包时间学习每个数据集的
+       到达时段，交易日该时段内每 fast_interval_seconds 秒检查一次，其他时间按小时退避或休眠到下一个交易日
     """
     
     def __init__(
@@ -57,7 +80,18 @@ class Scheduler:
         self.cache_dir = server_config.get('cache_dir', '.cache')
         self.interval_minutes = check_config.get('interval_minutes', 10)
         self.debounce_seconds = check_config.get('debounce_seconds', 30)
+        self.trust_dir_mtime = check_config.get('trust_dir_mtime', False)
+        self.watch_mode = check_config.get('watch', 'poll')
+        # 大于 0 时轮询检查先抽样估计，置信区间跨越阈值才精确扫描
+        self.sample_size = check_config.get('sample_size', 0)
+        self.pipelines = max(1, int(check_config.get('pipelines', 1)))
+        self.schedule_mode = check_config.get('schedule', 'fixed')
+        self.worker_processes = int(server_config.get('worker_processes', 0))
         self.keep_versions = packaging_config.get('keep_versions', 5)
+        self.packaging_workers = packaging_config.get('workers', 1)
+        self.packaging_block_threshold = packaging_config.get('block_threshold_mb', 64) * 1024 * 1024
+        self.packaging_blob_store = packaging_config.get('blob_store', False)
+        self.packaging_per_device = max(1, int(packaging_config.get('per_device', 1)))
         
         # 初始化依赖组件
         calendar_file = calendar_config.get('period_offset_file', '')
@@ -67,8 +101,61 @@ class Scheduler:
             self.calendar_reader = CalendarReader(str(calendar_file_path))
         else:
             self.calendar_reader = CalendarReader('')
-        self.freshness_checker = FreshnessChecker(self.data_root, datasets_config)
-        self.packager = Packager(self.cache_dir, self.keep_versions)
+        # 自适应轮询策略（仅轮询模式）
+        self.poll_schedule: Optional[PollSchedule] = None
+        if self.schedule_mode == 'adaptive':
+            self.poll_schedule = PollSchedule(
+                self.calendar_reader,
+                default_interval=self.interval_minutes * 60,
+                fast_interval=check_config.get('fast_interval_seconds', 30),
+                idle_interval=check_config.get('idle_interval_minutes', 60) * 60
+            )
+        # 持久化的文件目录，新鲜度检查、元数据目录和打包共享同一份文件记录
+        self.file_catalog = FileCatalog(
+            self.data_root,
+            datasets_config,
+            str(Path(self.cache_dir) / 'file_catalog'),
+            trust_dir_mtime=self.trust_dir_mtime
+        )
+        self.freshness_checker = FreshnessChecker(self.data_root, datasets_config, file_catalog=self.file_catalog)
+        # 数据集元数据目录，与 DataHubServer 共享
+        self.catalog = DatasetCatalog(config, file_catalog=self.file_catalog)
+        self.packager = Packager(
+            self.cache_dir,
+            self.keep_versions,
+            catalog=self.catalog,
+            workers=self.packaging_workers,
+            block_threshold=self.packaging_block_threshold,
+            blob_store=self.packaging_blob_store,
+            file_catalog=self.file_catalog
+        )
+        
+        # 工作进程池：进程内按同样的配置重建 FreshnessChecker/Packager
+        self.worker_pool: Optional[WorkerPool] = None
+        if self.worker_processes > 0:
+            self.worker_pool = WorkerPool(
+                {
+                    'data_root': self.data_root,
+                    'datasets': datasets_config,
+                    'catalog_dir': str(Path(self.cache_dir) / 'file_catalog'),
+                    'trust_dir_mtime': self.trust_dir_mtime,
+                    'cache_dir': self.cache_dir,
+                    'keep_versions': self.keep_versions,
+                    'workers': self.packaging_workers,
+                    'block_threshold': self.packaging_block_threshold,
+                    'blob_store': self.packaging_blob_store
+                },
+                workers=self.worker_processes
+            )
+        
+        # 任务队列：定时与手动检查按 (数据集, 阶段) 去重，工作线程数即并行的流水线数
+        self.jobs = JobQueue(workers=self.pipelines)
+        
+        # 每个设备（st_dev）的打包并发槽位
+        self._io_slots: Dict[int, threading.BoundedSemaphore] = defaultdict(
+            lambda: threading.BoundedSemaphore(self.packaging_per_device)
+        )
+        self._io_slots_lock = threading.Lock()
         
         # 线程控制
         self._thread: Optional[threading.Thread] = None
@@ -77,7 +164,7 @@ class Scheduler:
         
         logger.info(
             f"Scheduler initialized: interval={self.interval_minutes}min, "
-            f"debounce={self.debounce_seconds}s"
+            f"debounce={self.debounce_seconds}s, pipelines={self.pipelines}"
         )
     
     def start(self) -> None:
@@ -91,6 +178,7 @@ class Scheduler:
             return
         
         self._stop_event.clear()
+        self.jobs.reopen()
         self._running = True
         
         self._thread = threading.Thread(target=self._run, daemon=True)
@@ -110,9 +198,14 @@ class Scheduler:
         
         logger.info("Stopping scheduler...")
         self._stop_event.set()
+        if self.worker_pool is not None:
+            self.worker_pool.cancel()
         
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=5)
+        self.jobs.close()
+        if self.worker_pool is not None:
+            self.worker_pool.shutdown(wait=False)
         
         self._running = False
         logger.info("Scheduler stopped")
@@ -121,11 +214,17 @@ class Scheduler:
         """
         主循环
         
-        每 interval_minutes 分钟执行一次检查
+        每 interval_minutes 分钟执行一次检查；事件驱动模式可用时改为监听文件变化
         """
         interval_seconds = self.interval_minutes * 60
         
-        logger.info(f"Scheduler main loop started, interval={interval_seconds}s")
+        # 先建立监听再做首次检查，首次检查期间的写入也会产生事件
+        watcher = self._open_watcher() if self.watch_mode != 'poll' else None
+        
+        logger.info(
+            f"Scheduler main loop started, interval={interval_seconds}s, "
+            f"mode={'inotify' if watcher else 'poll'}"
+        )
         
         # 首次立即执行一次
         try:
@@ -133,9 +232,17 @@ class Scheduler:
         except Exception as e:
             logger.exception("Error in initial check")
         
+        if watcher is not None:
+            try:
+                self._run_events(watcher, interval_seconds)
+            except Exception as e:
+                logger.exception("Error in event loop, falling back to polling")
+            finally:
+                watcher.close()
+        
         while not self._stop_event.is_set():
             # 等待间隔时间或停止信号
-            if self._stop_event.wait(timeout=interval_seconds):
+            if self._stop_event.wait(timeout=self._next_poll_delay(interval_seconds)):
                 break
             
             # 执行检查
@@ -146,42 +253,302 @@ class Scheduler:
         
         logger.info("Scheduler main loop ended")
     
-    def _check_all_datasets(self) -> None:
+    def _valid_datasets(self) -> List[Dict[str, Any]]:
+        """配置中有名称和路径的数据集"""
+        return [
+            d for d in self.config.get('datasets', [])
+            if d.get('name') and d.get('path')
+        ]
+    
+    def _next_poll_delay(self, interval_seconds: float) -> float:
+        """距下一次轮询的秒数：固定间隔，或由 PollSchedule 按最新的打包历史计算"""
+        if self.poll_schedule is None:
+            return interval_seconds
+        histories = {}
+        for dataset_config in self._valid_datasets():
+            state = self.state_manager.get(dataset_config['name'])
+            history = state.get('package_history') or []
+            if not history and state.get('last_packaged_at'):
+                history = [state['last_packaged_at']]
+            histories[dataset_config['name']] = history
+        self.poll_schedule.learn(histories)
+        delay = self.poll_schedule.next_delay()
+        logger.debug(f"Next poll in {delay:.0f}s")
+        return delay
+    
+    def _open_watcher(self) -> Optional[InotifyWatcher]:
         """
-        检查所有数据集的新鲜度
+        为所有数据集目录建立 inotify 监听
         
-        遍历配置中的每个数据集，检查并处理
+        Returns:
+            InotifyWatcher；平台不支持或监听失败（如超出 max_user_watches）时返回 None
         """
-        datasets_config = self.config.get('datasets', [])
+        if not inotify_available():
+            if self.watch_mode == 'inotify':
+                logger.warning("inotify is not available on this platform, falling back to polling")
+            return None
         
-        logger.info(f"Checking freshness for {len(datasets_config)} datasets")
+        watcher = None
+        try:
+            watcher = InotifyWatcher()
+            for dataset_config in self._valid_datasets():
+                watcher.add_tree(str(Path(self.data_root) / dataset_config['path']), dataset_config['name'])
+        except OSError as e:
+            logger.warning(f"Failed to set up inotify watches, falling back to polling: {e}")
+            if watcher is not None:
+                watcher.close()
+            return None
+        
+        logger.info(f"Watching {watcher.watch_count} directories with inotify")
+        return watcher
+    
+    def _run_events(self, watcher: InotifyWatcher, interval_seconds: float) -> None:
+        """
+        事件驱动主循环
         
-        # 获取上一个交易日
+        - 每个数据集维护一个 FreshnessCounter，事件只更新变化的文件
+        - 新鲜比例越过阈值时立即进入防抖；数据集静默 debounce_seconds 后
+          （不再有文件事件）视为稳定，直接打包，不再重复全量扫描
+        - 每 interval_seconds 用一次全量扫描校正计数，弥补可能丢失的事件
+        """
+        datasets = {d['name']: d for d in self._valid_datasets()}
+        counters: Dict[str, FreshnessCounter] = {
+            name: self.freshness_checker.build_counter(name) for name in datasets
+        }
+        # 有未处理变化的数据集 -> 最近一次事件的时间（monotonic）
+        pending: Dict[str, float] = {}
+        debouncing = set()
+        resync_at = time.monotonic() + interval_seconds
+        
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            deadlines = [resync_at] + [t + self._debounce_for(name) for name, t in pending.items()]
+            timeout = max(0.0, min(1.0, min(deadlines) - now))
+            
+            events = watcher.read(timeout)
+            now = time.monotonic()
+            
+            overflow = self._apply_events(events, counters, pending, now)
+            if overflow or now >= resync_at:
+                for name, counter in counters.items():
+                    if self.freshness_checker.sync_counter(name, counter) or overflow:
+                        pending[name] = now
+                resync_at = now + interval_seconds
+            
+            # 按内容判定的规则（trade_date）需要交易日才能算出比例
+            trade_date = self._last_trade_date() if pending else None
+            for name in list(pending):
+                if self._package_on_marker(name, datasets[name]['path']):
+                    del pending[name]
+                    debouncing.discard(name)
+                    self._refresh_catalog(name)
+                    continue
+                
+                threshold = self.freshness_checker.threshold_for(name)
+                fresh = self.freshness_checker.counter_ratio(counters[name], name, trade_date) >= threshold
+                if fresh and name not in debouncing:
+                    logger.info(f"Dataset {name} crossed freshness threshold, debouncing")
+                    self.state_manager.set_status(name, 'debounce')
+                    debouncing.add(name)
+                if now - pending[name] < self._debounce_for(name):
+                    continue
+                
+                del pending[name]
+                debouncing.discard(name)
+                try:
+                    self._evaluate_counter(name, datasets[name], counters[name], threshold, trade_date)
+                except Exception as e:
+                    logger.exception(f"Error checking dataset {name}")
+                self._refresh_catalog(name)
+    
+    def _refresh_catalog(self, name: str) -> None:
+        """
+        刷新数据集的元数据目录，失败只记录警告
+        
+        配置了工作进程池时由工作进程刷新文件目录并回传摘要，调度进程不再重新 stat
+        """
+        try:
+            if self.worker_pool is not None:
+                self.catalog.refresh(name, summary=self.worker_pool.catalog_summary(name))
+            else:
+                self.catalog.refresh(name)
+        except Exception as e:
+            logger.warning(f"Failed to refresh catalog for {name}: {e}")
+    
+    @staticmethod
+    def _apply_events(
+        events: List[WatchEvent],
+        counters: Dict[str, FreshnessCounter],
+        pending: Dict[str, float],
+        now: float
+    ) -> bool:
+        """
+        把一批事件应用到计数上，同一文件的多次事件只 stat 一次
+        
+        Returns:
+            是否发生了事件队列溢出（需要全量重新扫描）
+        """
+        overflow = False
+        touched: Dict[str, str] = {}
+        for event in events:
+            if event.mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            counter = counters.get(event.tag)
+            if counter is None:
+                continue
+            pending[event.tag] = now
+            
+            if event.mask & IN_ISDIR:
+                if event.mask & REMOVE_MASK:
+                    counter.remove_tree(event.path)
+                continue
+            if not os.path.normcase(event.path).endswith('.csv'):
+                continue
+            if event.mask & REMOVE_MASK:
+                counter.remove(event.path)
+                touched.pop(event.path, None)
+            elif event.mask & CHANGE_MASK:
+                touched[event.path] = event.tag
+        
+        for path, name in touched.items():
+            try:
+                counters[name].update(path, os.stat(path).st_mtime)
+            except OSError:
+                counters[name].remove(path)
+        return overflow
+    
+    def _evaluate_counter(
+        self,
+        name: str,
+        dataset_config: Dict[str, Any],
+        counter: FreshnessCounter,
+        threshold: float,
+        trade_date: Optional[str]
+    ) -> None:
+        """静默期结束后根据增量计数判断新鲜度，达到阈值则打包（trade_date 为空时跳过）"""
+        if not trade_date:
+            return
+        
+        result = self.freshness_checker.check_counter(trade_date, counter, name)
+        self.state_manager.update(
+            name,
+            freshness=result.to_dict(),
+            last_checked=time.strftime('%Y-%m-%dT%H:%M:%S')
+        )
+        
+        if not result.is_fresh(threshold):
+            logger.info(f"Dataset {name} not fresh enough, skipping")
+            self.state_manager.set_status(name, 'not_fresh')
+            return
+        
+        logger.info(f"Dataset {name} is stable (no changes for {self._debounce_for(name)}s), starting packaging")
+        self._package_dataset(name, dataset_config['path'], result)
+    
+    def _last_trade_date(self) -> Optional[str]:
+        """获取上一个交易日，失败或没有时返回 None"""
         try:
             trade_date = self.calendar_reader.get_last_trade_date()
             logger.info(f"Last trade date: {trade_date}")
         except Exception as e:
             logger.error(f"Failed to get last trade date: {e}")
-            return
+            return None
         
         if not trade_date:
             logger.warning("No trade date available, skipping check")
+            return None
+        return trade_date
+    
+    def _check_all_datasets(self, trigger: str = 'periodic') -> None:
+        """
+        检查所有数据集的新鲜度
+        
+        遍历配置中的每个数据集，提交检查任务并处理
+        
+        Args:
+            trigger: periodic 时等待本轮所有任务结束（周期内每个数据集目录只扫描一次）；
+                manual 时以高优先级提交后立即返回
+        """
+        datasets_config = self.config.get('datasets', [])
+        
+        logger.info(f"Checking freshness for {len(datasets_config)} datasets ({trigger})")
+        
+        # 获取上一个交易日
+        trade_date = self._last_trade_date()
+        if not trade_date:
             return
         
-        # 检查每个数据集
+        if trigger == 'manual':
+            self._check_datasets(datasets_config, trade_date, trigger, wait=False)
+            return
+        
+        # 检查每个数据集（本周期内每个数据集目录只扫描一次）
+        with self.freshness_checker.scan_cycle():
+            self._check_datasets(datasets_config, trade_date, trigger)
+    
+    def _check_datasets(
+        self,
+        datasets_config: List[Dict[str, Any]],
+        trade_date: str,
+        trigger: str = 'periodic',
+        wait: bool = True
+    ) -> None:
+        """
+        为每个数据集提交一条流水线任务（检查 → 防抖 → 打包 → 刷新元数据目录）
+        
+        同一数据集已有排队中的检查任务时合并，不会重复扫描；同一数据集的检查不会同时执行。
+        工作线程数为 pipelines：为 1 时依次执行，否则一个数据集的防抖等待和打包不再阻塞其他数据集
+        
+        Args:
+            wait: 是否等待提交的任务全部结束
+        """
+        priority = PRIORITY_MANUAL if trigger == 'manual' else PRIORITY_PERIODIC
+        jobs = []
         for dataset_config in datasets_config:
             name = dataset_config.get('name', '')
             path = dataset_config.get('path', '')
-            threshold = dataset_config.get('freshness_threshold', 0.85)
-            
             if not name or not path:
                 logger.warning(f"Skipping invalid dataset config: {dataset_config}")
                 continue
-            
-            try:
-                self._check_dataset(name, path, trade_date, threshold)
-            except Exception as e:
-                logger.exception(f"Error checking dataset {name}")
+            jobs.append(self.jobs.submit(
+                name, 'check', lambda d=dataset_config: self._run_pipeline(d, trade_date),
+                priority=priority, trigger=trigger
+            ))
+        
+        if wait:
+            for job in jobs:
+                job.wait()
+    
+    def _run_pipeline(self, dataset_config: Dict[str, Any], trade_date: str) -> None:
+        """单个数据集的流水线：检查、防抖、打包，最后刷新元数据目录"""
+        name = dataset_config['name']
+        path = dataset_config['path']
+        
+        threshold = self.freshness_checker.threshold_for(name)
+        try:
+            self._check_dataset(name, path, trade_date, threshold)
+        except Exception as e:
+            logger.exception(f"Error checking dataset {name}")
+        
+        # 每轮检查后刷新一次元数据目录，HTTP 请求直接读取内存结果
+        self._refresh_catalog(name)
+    
+    @contextmanager
+    def _io_slot(self, data_dir: Path):
+        """占用数据目录所在设备的一个打包槽位，槽位用完时等待"""
+        try:
+            device = os.stat(data_dir).st_dev
+        except OSError:
+            device = -1
+        with self._io_slots_lock:
+            slot = self._io_slots[device]
+        if not slot.acquire(blocking=False):
+            logger.info(f"Waiting for a packaging slot on device {device}: {data_dir}")
+            slot.acquire()
+        try:
+            yield
+        finally:
+            slot.release()
     
     def _check_dataset(
         self,
@@ -201,11 +568,18 @@ class Scheduler:
         """
         logger.info(f"Checking dataset: {name}, trade_date={trade_date}")
         
+        # 写入完成标记优先：比上次打包时更新则直接打包
+        if self._package_on_marker(name, data_path):
+            return
+        
         # 更新状态为检查中
         self.state_manager.set_status(name, 'checking')
         
-        # 检查新鲜度
-        result = self.freshness_checker.check(trade_date)
+        # 检查新鲜度（配置了 sample_size 时先抽样）
+        if self.sample_size:
+            result = self._run_checker('check_sampled', trade_date, name, sample_size=self.sample_size)
+        else:
+            result = self._run_checker('check', trade_date, dataset=name)
         
         logger.info(
             f"Freshness check result for {name}: "
@@ -229,10 +603,12 @@ class Scheduler:
         logger.info(f"Dataset {name} is fresh, performing debounce check")
         self.state_manager.set_status(name, 'debounce')
         
-        stable_result = self.freshness_checker.check_stable(
+        stable_result = self._run_checker(
+            'check_stable',
             trade_date,
-            debounce_seconds=self.debounce_seconds,
-            stop_event=self._stop_event
+            debounce_seconds=self._debounce_for(name),
+            stop_event=self._stop_event,
+            dataset=name
         )
         
         if stable_result is None:
@@ -242,33 +618,159 @@ class Scheduler:
         
         # 数据已稳定，执行打包
         logger.info(f"Dataset {name} is stable, starting packaging")
-        self.state_manager.set_status(name, 'packaging')
+        self._package_dataset(name, data_path, stable_result)
+    
+    def _debounce_for(self, name: str) -> float:
+        """数据集的防抖静默期：数据集配置 > 规则默认值 > check.debounce_seconds"""
+        return self.freshness_checker.debounce_for(name, self.debounce_seconds)
+    
+    def _run_checker(self, method: str, *args, **kwargs):
+        """
+        执行 FreshnessChecker 的检查方法，配置了工作进程池时在工作进程中执行
+        
+        工作进程中的防抖等待使用进程池自己的停止信号（stop() 时由 WorkerPool.cancel 设置）
+        """
+        if self.worker_pool is None:
+            return getattr(self.freshness_checker, method)(*args, **kwargs)
+        kwargs.pop('stop_event', None)
+        return self.worker_pool.checker(method, *args, **kwargs)
+    
+    def _marker_baseline(self, name: str) -> float:
+        """
+        写入完成标记的比较基准：上次处理过的标记 mtime
+        
+        没有处理记录（首次部署、状态重置）时用上次打包时间或最新包的 mtime，
+        避免上游早已留下的旧标记被当作新标记
+        """
+        state = self.state_manager.get(name)
+        if state.get('completion_marker_mtime') is not None:
+            return state['completion_marker_mtime']
+        if state.get('last_packaged_at'):
+            try:
+                return time.mktime(time.strptime(state['last_packaged_at'], '%Y-%m-%dT%H:%M:%S'))
+            except ValueError:
+                logger.warning(f"Invalid last_packaged_at for {name}: {state['last_packaged_at']}")
+        mtimes = []
+        for path in Path(self.cache_dir).glob(f"{name}_*.zip"):
+            try:
+                mtimes.append(path.stat().st_mtime)
+            except OSError:
+                continue
+        return max(mtimes, default=0.0)
+    
+    def _package_on_marker(self, name: str, data_path: str) -> bool:
+        """
+        数据集的写入完成标记比上次打包时更新时，立即打包（不防抖、不做新鲜度扫描）
+        
+        标记声明的文件数与实际不符时不处理，交给新鲜度检查
         
+        Returns:
+            是否已按标记处理
+        """
+        marker = self.freshness_checker.read_completion_marker(name, newer_than=self._marker_baseline(name))
+        if marker is None:
+            return False
+        if not marker.is_complete:
+            logger.warning(
+                f"Completion marker for {name} expects {marker.expected_count} files, "
+                f"found {marker.actual_count}; falling back to freshness check"
+            )
+            return False
+        
+        logger.info(f"Dataset {name} has a new completion marker, packaging without debounce")
+        file_count = marker.actual_count or 0
+        result = FreshnessResult(
+            total_count=file_count,
+            fresh_count=file_count,
+            fresh_ratio=1.0,
+            last_updated=datetime.fromtimestamp(marker.mtime).isoformat(),
+            rule='completion_marker',
+            threshold=0.0
+        )
+        self.state_manager.update(
+            name,
+            freshness=result.to_dict(),
+            last_checked=time.strftime('%Y-%m-%dT%H:%M:%S')
+        )
+        if self._package_dataset(name, data_path, result):
+            self.state_manager.update(name, completion_marker_mtime=marker.mtime)
+        return True
+    
+    def _package_dataset(self, name: str, data_path: str, stable_result: FreshnessResult) -> bool:
+        """
+        打包数据集并更新状态
+        
+        Args:
+            name: 数据集名称
+            data_path: 数据路径（相对 data_root）
+            stable_result: 稳定后的新鲜度检测结果
+            
+        Returns:
+            是否打包成功
+        """
         data_dir = Path(self.data_root) / data_path
-        package_result = self.packager.package(name, str(data_dir))
+        # 同一数据集不会同时打包两次（轮询、事件驱动和写入完成标记都经过这里）
+        with self.jobs.run_exclusive(name, 'package'), self._io_slot(data_dir):
+            self.state_manager.set_status(name, 'packaging')
+            if self.worker_pool is None:
+                package_result = self.packager.package(name, str(data_dir))
+            else:
+                package_result = self.worker_pool.package(name, str(data_dir))
+                if package_result['success']:
+                    # 工作进程中的 Packager 没有元数据目录，在这里记录新数据包
+                    self.catalog.record_package(
+                        name,
+                        package_result['zip_path'],
+                        package_result['zip_size'],
+                        file_count=package_result['file_count'],
+                        total_size=package_result.get('total_size'),
+                        last_updated=package_result.get('last_updated')
+                    )
+        
+        if package_result['success'] and package_result.get('skipped'):
+            # 内容指纹与已发布版本一致：不产生新版本，重新发布已有的包
+            logger.info(f"Dataset {name} content unchanged, re-announcing {package_result['zip_path']}")
+            self.state_manager.update(
+                name,
+                status='ready',
+                last_verified_at=time.strftime('%Y-%m-%dT%H:%M:%S'),
+                package_path=package_result['zip_path'],
+                package_size=package_result['zip_size'],
+                version=package_result.get('version'),
+                file_count=package_result['file_count'],
+                fingerprint=package_result.get('fingerprint')
+            )
+            return True
         
         if package_result['success']:
             logger.info(
                 f"Dataset {name} packaged successfully: "
                 f"{package_result['zip_path']}"
             )
-            # 更新状态
+            # 更新状态；打包时间同时记入历史，供自适应轮询学习到达时段
+            packaged_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+            history = self.state_manager.get(name).get('package_history') or []
             self.state_manager.update(
                 name,
                 status='ready',
-                last_packaged_at=time.strftime('%Y-%m-%dT%H:%M:%S'),
+                last_packaged_at=packaged_at,
+                package_history=(history + [packaged_at])[-HISTORY_LIMIT:],
                 package_path=package_result['zip_path'],
                 package_size=package_result['zip_size'],
+                version=package_result.get('version'),
                 file_count=package_result['file_count'],
+                fingerprint=package_result.get('fingerprint'),
                 last_updated=stable_result.last_updated
             )
-        else:
-            logger.error(f"Failed to package dataset {name}: {package_result['error']}")
-            self.state_manager.update(
-                name,
-                status='error',
-                error=package_result['error']
-            )
+            return True
+        
+        logger.error(f"Failed to package dataset {name}: {package_result['error']}")
+        self.state_manager.update(
+            name,
+            status='error',
+            error=package_result['error']
+        )
+        return False
     
     def is_running(self) -> bool:
         """
@@ -283,7 +785,8 @@ class Scheduler:
         """
         强制立即执行一次检查
         
-        用于手动触发检查，不影响正常调度
+        以高优先级提交到任务队列后立即返回：与排队中的定时检查合并，
+        与正在执行的同一数据集检查不会并行
         """
         logger.info("Force checking all datasets")
-        threading.Thread(target=self._check_all_datasets, daemon=True).start()
+        self._check_all_datasets(trigger='manual')
@@ -0,0 +1,141 @@
+"""
+StabilityTracker - 按文件跟踪写入稳定性
+记住最近修改过的文件的 (大小, mtime)，只对这些文件快速重新 stat，
+所有跟踪的文件在静默期内都没有变化时即认为数据集稳定
+"""
+
+import os
+import time
+import logging
+from typing import Optional, Dict, Tuple
+
+from fs_scanner import ScanResult
+
+logger = logging.getLogger(__name__)
+
+# mtime 在该时间（秒）内的文件视为"最近修改"，需要跟踪；更早的文件认为已经写完
+STABILITY_HORIZON_SECONDS = 600
+
+# 重新 stat 的间隔（秒）
+STABILITY_POLL_INTERVAL = 1.0
+
+
+class StabilityTracker:
+    """
+    按文件跟踪写入稳定性
+
+    - track() 从一次扫描结果中挑出最近修改过的文件，最后一次变化时间取它们中最新的 mtime，
+      因此写入早已结束的数据集无需等待
+    - poll() 只重新 stat 跟踪的文件，大小或 mtime 有变化（包括被删除）即刷新最后一次变化时间，
+      正在追加写入的文件会一直被发现
+    - wait() 轮询直到静默 quiet_seconds，或超过最长等待时间
+    """
+
+    def __init__(
+        self,
+        quiet_seconds: float,
+        horizon: float = STABILITY_HORIZON_SECONDS,
+        poll_interval: float = STABILITY_POLL_INTERVAL
+    ):
+        """
+        初始化跟踪器
+
+        Args:
+            quiet_seconds: 跟踪的文件全部无变化多久后视为稳定
+            horizon: mtime 在该时间内的文件才会被跟踪
+            poll_interval: 重新 stat 的间隔
+        """
+        self.quiet_seconds = quiet_seconds
+        self.horizon = max(horizon, quiet_seconds)
+        self.poll_interval = poll_interval
+        self._files: Dict[str, Tuple[int, int]] = {}
+        self.last_change: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def track(self, scan: ScanResult, now: Optional[float] = None) -> int:
+        """
+        从扫描结果（需要包含路径）中挑出最近修改过的文件开始跟踪
+
+        Returns:
+            跟踪的文件数
+        """
+        now = time.time() if now is None else now
+        cutoff = now - self.horizon
+        for path, mtime in zip(scan.paths or [], scan.mtimes):
+            if mtime <= cutoff:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            self._files[path] = (stat.st_size, stat.st_mtime_ns)
+            latest = stat.st_mtime
+            if self.last_change is None or latest > self.last_change:
+                self.last_change = latest
+        return len(self._files)
+
+    def poll(self, now: Optional[float] = None) -> int:
+        """
+        重新 stat 跟踪的文件
+
+        Returns:
+            发生变化的文件数
+        """
+        now = time.time() if now is None else now
+        changed = 0
+        for path, previous in list(self._files.items()):
+            try:
+                stat = os.stat(path)
+                current = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                current = None
+            if current == previous:
+                continue
+            changed += 1
+            if current is None:
+                del self._files[path]
+            else:
+                self._files[path] = current
+        if changed:
+            self.last_change = now
+        return changed
+
+    def quiet_for(self, now: Optional[float] = None) -> float:
+        """距离最后一次变化的秒数，没有跟踪任何文件时为无穷大"""
+        if self.last_change is None:
+            return float('inf')
+        return (time.time() if now is None else now) - self.last_change
+
+    def wait(self, stop_event=None, max_wait: Optional[float] = None) -> bool:
+        """
+        等待跟踪的文件静默 quiet_seconds
+
+        Args:
+            stop_event: threading.Event，设置后立即返回 False
+            max_wait: 最长等待秒数，None 表示不限制
+
+        Returns:
+            是否已稳定（超时或收到停止信号时返回 False）
+        """
+        start = time.monotonic()
+        while True:
+            quiet = self.quiet_for()
+            if quiet >= self.quiet_seconds:
+                return True
+            if stop_event is not None and stop_event.is_set():
+                logger.info("收到停止信号，中断稳定性等待")
+                return False
+            if max_wait is not None and time.monotonic() - start >= max_wait:
+                logger.info(f"等待 {max_wait} 秒后仍有文件在变化")
+                return False
+
+            delay = min(self.poll_interval, self.quiet_seconds - quiet)
+            if stop_event is not None:
+                stop_event.wait(delay)
+            else:
+                time.sleep(delay)
+            changed = self.poll()
+            if changed:
+                logger.debug(f"{changed} 个文件仍在变化")
@@ -6,6 +6,7 @@
 import os
 import json
 import time
+import hashlib
 import shutil
 import zipfile
 import logging
@@ -16,6 +17,16 @@ from datetime import datetime, timezone
 from urllib.parse import urlparse
 
 
+# 增量包中记录基准版本和删除列表的成员名（与 hub 端 packager.DELTA_INFO_NAME 一致）
+DELTA_INFO_NAME = '__delta__.json'
+
+# 增量包中追加补丁的成员名前缀（与 hub 端 packager.APPEND_PREFIX 一致）
+APPEND_PREFIX = '__append__/'
+
+# 同步状态中记录各数据集已同步版本号的键
+VERSIONS_KEY = '_versions'
+
+
 class SyncResult:
     """同步结果"""
     
@@ -168,6 +179,20 @@ class DataSyncClient:
     
     def _download_package(self, dataset_name: str, output_path: Path) -> bool:
         """下载数据包"""
+        return self._download(f'/package/{dataset_name}.zip', dataset_name, output_path)
+    
+    def _download_delta(self, dataset_name: str, base_version: str, output_path: Path) -> bool:
+        """下载相对 base_version 的增量包（服务端没有对应增量包时返回 False）"""
+        return self._download(
+            f'/delta/{dataset_name}/{base_version}.zip', dataset_name, output_path, missing_ok=True
+        )
+    
+    def _download(self, package_url: str, dataset_name: str, output_path: Path, missing_ok: bool = False) -> bool:
+        """
+        下载 package_url 到 output_path
+        
+        missing_ok 为 True 时 404 是预期结果（例如没有对应的增量包），只记录 info 日志
+        """
         try:
             if self.hub_scheme == 'https':
                 conn = http.client.HTTPSConnection(self.hub_host, self.hub_port, timeout=self.timeout)
@@ -175,13 +200,15 @@ class DataSyncClient:
                 conn = http.client.HTTPConnection(self.hub_host, self.hub_port, timeout=self.timeout)
             
             try:
-                package_url = f'/package/{dataset_name}.zip'
                 self.logger.info(f"Downloading {package_url} to {output_path}")
                 
                 conn.request('GET', package_url)
                 response = conn.getresponse()
                 
                 self.logger.debug(f"Response status: {response.status}, type: {type(response.status)}")
+                if response.status == 404 and missing_ok:
+                    self.logger.info(f"Not available on server: {package_url}")
+                    return False
                 if response.status != 200:
                     self.logger.error(f"Download failed: HTTP {response.status}")
                     return False
@@ -226,6 +253,136 @@ class DataSyncClient:
             self.logger.error(f"Failed to extract {package_path}: {e}")
             return False
     
+    @staticmethod
+    def _hash_prefix(path: Path, size: int) -> Optional[Any]:
+        """计算文件前 size 字节的 sha256，文件长度不等于 size 时返回 None"""
+        if not path.is_file() or path.stat().st_size != size:
+            return None
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(1024 * 1024)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+        return hasher
+    
+    @staticmethod
+    def _link_or_copy(src: str, dst: str) -> None:
+        """暂存目录中的文件优先用硬链接，不支持时复制"""
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+    
+    @staticmethod
+    def _detach(path: Path) -> None:
+        """替换暂存目录中与数据目录共享（硬链接）的文件为独立副本，之后可以就地修改"""
+        temp_path = path.with_name(path.name + '.detach')
+        shutil.copy2(path, temp_path)
+        os.replace(temp_path, path)
+    
+    def _apply_delta(self, package_path: Path, target_dir: Path) -> bool:
+        """
+        应用增量包：解压新增/变化的文件，按追加补丁在原文件尾部追加新字节，
+        删除 __delta__.json 中列出的已删除路径
+        
+        所有修改先在暂存目录（数据目录的硬链接副本）中进行，全部成功后再与数据目录交换；
+        任何一步失败（包括追加补丁的基准长度或前缀哈希不匹配）都不改动数据目录，
+        由调用方回退到完整包
+        """
+        staging_dir = target_dir.with_name(f".{target_dir.name}.staging")
+        try:
+            self.logger.info(f"Applying delta {package_path} to {target_dir}")
+            if staging_dir.exists():
+                shutil.rmtree(staging_dir)
+            shutil.copytree(target_dir, staging_dir, copy_function=self._link_or_copy)
+            staging_root = staging_dir.resolve()
+            
+            with zipfile.ZipFile(package_path, 'r') as zf:
+                delta_info = json.loads(zf.read(DELTA_INFO_NAME).decode('utf-8'))
+                appends = delta_info.get('appends', {})
+                
+                # 先校验所有追加补丁的基准内容
+                for relative_path, append in appends.items():
+                    path = (staging_dir / relative_path).resolve()
+                    if staging_root not in path.parents:
+                        raise ValueError(f"Append target outside target dir: {relative_path}")
+                    hasher = self._hash_prefix(path, append['offset'])
+                    if hasher is None or hasher.hexdigest() != append['prefix_sha256']:
+                        raise ValueError(f"Local file does not match append base: {relative_path}")
+                    hasher.update(zf.read(APPEND_PREFIX + relative_path))
+                    if hasher.hexdigest() != append['sha256']:
+                        raise ValueError(f"Append patch checksum mismatch: {relative_path}")
+                
+                members = [
+                    m for m in zf.infolist()
+                    if m.filename != DELTA_INFO_NAME and not m.filename.startswith(APPEND_PREFIX)
+                ]
+                for member in members:
+                    # 先断开硬链接，避免覆盖写入改到数据目录中的原文件
+                    path = (staging_dir / member.filename).resolve()
+                    if staging_root in path.parents and path.is_file():
+                        path.unlink()
+                    zf.extract(member, staging_dir)
+                
+                # 在文件的独立副本尾部追加新字节
+                for relative_path, append in appends.items():
+                    path = staging_dir / relative_path
+                    self._detach(path)
+                    with open(path, 'r+b') as dest, zf.open(APPEND_PREFIX + relative_path) as src:
+                        dest.seek(append['offset'])
+                        shutil.copyfileobj(src, dest, 1024 * 1024)
+                        dest.truncate()
+            
+            for relative_path in delta_info.get('deleted', []):
+                path = (staging_dir / relative_path).resolve()
+                if staging_root not in path.parents:
+                    self.logger.warning(f"Skipping delete outside target dir: {relative_path}")
+                    continue
+                if path.is_file():
+                    path.unlink()
+            
+            self._swap_in(staging_dir, target_dir)
+            
+            self.logger.info(
+                f"Applied delta: {len(members)} files updated, {len(appends)} files appended, "
+                f"{len(delta_info.get('deleted', []))} files deleted"
+            )
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Failed to apply delta {package_path}: {e}")
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return False
+    
+    def _swap_in(self, staging_dir: Path, target_dir: Path) -> None:
+        """用暂存目录替换数据目录，第二次重命名失败时恢复原目录"""
+        old_dir = target_dir.with_name(f".{target_dir.name}.old")
+        if old_dir.exists():
+            shutil.rmtree(old_dir)
+        os.rename(target_dir, old_dir)
+        try:
+            os.rename(staging_dir, target_dir)
+        except OSError:
+            os.rename(old_dir, target_dir)
+            raise
+        shutil.rmtree(old_dir, ignore_errors=True)
+    
+    def _sync_delta(self, dataset_name: str, base_version: str, local_dir: Path, temp_dir: Path) -> bool:
+        """尝试通过增量包同步，失败时返回 False 由调用方回退到完整包"""
+        delta_path = temp_dir / f"{dataset_name}_{base_version}_delta_{int(time.time())}.zip"
+        try:
+            if not self._download_delta(dataset_name, base_version, delta_path):
+                self.logger.info(f"No delta package for {dataset_name} from {base_version}, using full package")
+                return False
+            return self._apply_delta(delta_path, local_dir)
+        finally:
+            try:
+                delta_path.unlink()
+            except OSError:
+                pass
+    
     def sync_dataset(self, dataset_name: str) -> SyncResult:
         """同步单个数据集"""
         try:
@@ -266,25 +423,36 @@ class DataSyncClient:
             temp_dir = Path.home() / '.datahub_sync' / 'temp'
             temp_dir.mkdir(parents=True, exist_ok=True)
             
-            package_path = temp_dir / f"{dataset_name}_{int(time.time())}.zip"
-            
-            if not self._download_package(dataset_name, package_path):
-                return SyncResult(dataset_name, False, 'download_failed', "Failed to download package")
+            # 本地已有上一版本时优先使用增量包
+            versions = self.sync_state.get(VERSIONS_KEY, {})
+            base_version = versions.get(dataset_name)
+            remote_version = remote_info.get('version')
+            synced = False
+            if base_version and remote_version and base_version != remote_version and local_dir.exists():
+                synced = self._sync_delta(dataset_name, base_version, local_dir, temp_dir)
             
-            # 5. 解压包
-            if not self._extract_package(package_path, local_dir):
-                return SyncResult(dataset_name, False, 'extract_failed', "Failed to extract package")
+            if not synced:
+                package_path = temp_dir / f"{dataset_name}_{int(time.time())}.zip"
+                
+                if not self._download_package(dataset_name, package_path):
+                    return SyncResult(dataset_name, False, 'download_failed', "Failed to download package")
+                
+                # 5. 解压包
+                if not self._extract_package(package_path, local_dir):
+                    return SyncResult(dataset_name, False, 'extract_failed', "Failed to extract package")
+                
+                # 清理临时文件
+                try:
+                    package_path.unlink()
+                except:
+                    pass
             
             # 6. 更新本地状态
             self.sync_state[dataset_name] = remote_info['last_updated']
+            if remote_version:
+                self.sync_state.setdefault(VERSIONS_KEY, {})[dataset_name] = remote_version
             self._save_sync_state(self.sync_state)
             
-            # 7. 清理临时文件
-            try:
-                package_path.unlink()
-            except:
-                pass
-            
             self.logger.info(f"Successfully synced dataset: {dataset_name}")
             return SyncResult(dataset_name, True, 'success')
             
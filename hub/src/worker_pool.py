@@ -0,0 +1,191 @@
+"""
+WorkerPool - 在独立进程中执行打包和新鲜度扫描
+压缩和大量 stat 不再与 HTTP 服务争抢同一个解释器的 GIL；工作进程只回传体积很小的结果，
+由调度器所在进程更新 StateManager。工作进程崩溃时重建进程池，不影响服务进程
+"""
+
+import json
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# 工作进程内按配置缓存的组件（FreshnessChecker / Packager），
+# 同一进程的后续任务复用 FileCatalog 和规则的缓存
+_components: Dict[str, Any] = {}
+
+# 进程池的停止信号（启动工作进程时传入），设置后工作进程中的防抖等待立即返回
+_stop_event = None
+
+
+class WorkerCrashed(RuntimeError):
+    """工作进程在执行任务时意外退出"""
+
+
+def _component(kind: str, spec: Dict[str, Any]):
+    """获取（必要时创建）当前工作进程中的组件"""
+    key = kind + json.dumps(spec, sort_keys=True, default=str)
+    component = _components.get(key)
+    if component is not None:
+        return component
+
+    from file_catalog import FileCatalog
+    file_catalog = None
+    if spec.get('catalog_dir'):
+        file_catalog = FileCatalog(
+            spec['data_root'],
+            spec['datasets'],
+            spec['catalog_dir'],
+            trust_dir_mtime=spec.get('trust_dir_mtime', False)
+        )
+
+    if kind == 'checker':
+        from freshness_checker import FreshnessChecker
+        component = FreshnessChecker(spec['data_root'], spec['datasets'], file_catalog=file_catalog)
+    else:
+        from packager import Packager
+        component = Packager(
+            spec['cache_dir'],
+            spec.get('keep_versions', 5),
+            workers=spec.get('workers', 1),
+            block_threshold=spec.get('block_threshold', 64 * 1024 * 1024),
+            blob_store=spec.get('blob_store', False),
+            file_catalog=file_catalog
+        )
+    _components[key] = component
+    return component
+
+
+def _init_worker(stop_event) -> None:
+    """工作进程初始化：保存进程池的停止信号"""
+    global _stop_event
+    _stop_event = stop_event
+
+
+def run_checker(spec: Dict[str, Any], method: str, *args, **kwargs):
+    """
+    在工作进程中调用 FreshnessChecker 的方法（check / check_sampled / check_stable）
+
+    每个任务是一个调度周期：防抖检查的第一次检查和文件跟踪共用同一次扫描；
+    防抖等待使用进程池的停止信号，调度器停止时可以中断
+    """
+    checker = _component('checker', spec)
+    if method == 'check_stable':
+        kwargs['stop_event'] = _stop_event
+    with checker.scan_cycle():
+        return getattr(checker, method)(*args, **kwargs)
+
+
+def run_catalog_summary(spec: Dict[str, Any], dataset_name: str) -> Dict[str, Any]:
+    """
+    在工作进程中增量刷新数据集的 FileCatalog，返回文件数量、总大小和最新修改时间
+
+    Returns:
+        传给 DatasetCatalog.refresh(summary=...) 的摘要
+    """
+    from dataset_catalog import DatasetCatalog
+    file_catalog = _component('checker', spec).file_catalog
+    root = file_catalog.dataset_root(dataset_name) if file_catalog is not None else None
+    if root is None or not root.is_dir():
+        return {'file_count': 0, 'total_size': 0, 'last_updated': None}
+    file_catalog.refresh(dataset_name)
+    return DatasetCatalog._summarize(file_catalog.scan(dataset_name, suffix=None))
+
+
+def run_package(spec: Dict[str, Any], dataset_name: str, data_dir: str) -> Dict[str, Any]:
+    """在工作进程中打包数据集，返回 Packager.package 的结果"""
+    return _component('packager', spec).package(dataset_name, data_dir)
+
+
+class WorkerPool:
+    """
+    受监督的工作进程池
+
+    - 使用 spawn 启动工作进程，不继承服务进程的线程和套接字
+    - 任务结果通过 pickle 回传：打包结果字典、FreshnessResult
+    - 进程池损坏（工作进程被杀或崩溃）时重建进程池，当前任务以 WorkerCrashed 失败
+    - 每个进程池有一个停止信号，cancel() / shutdown() 时设置，中断工作进程中的防抖等待
+    """
+
+    def __init__(self, spec: Dict[str, Any], workers: int = 1, start_method: str = 'spawn'):
+        """
+        初始化进程池
+
+        Args:
+            spec: 工作进程构建组件所需的配置（data_root, datasets, cache_dir, catalog_dir 等，需可 JSON 序列化）
+            workers: 工作进程数
+            start_method: multiprocessing 启动方式
+        """
+        self.spec = spec
+        self.workers = max(1, int(workers))
+        self._context = multiprocessing.get_context(start_method)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._stop_event = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._stop_event = self._context.Event()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=self._context,
+                    initializer=_init_worker,
+                    initargs=(self._stop_event,)
+                )
+            return self._executor
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def call(self, fn, *args, **kwargs):
+        """
+        在工作进程中执行 fn，阻塞直到返回
+
+        Raises:
+            WorkerCrashed: 工作进程意外退出（进程池已重建，可以继续提交任务）
+        """
+        executor = self._get_executor()
+        try:
+            return executor.submit(fn, *args, **kwargs).result()
+        except BrokenProcessPool as e:
+            logger.error(f"Worker process crashed while running {getattr(fn, '__name__', fn)}, restarting pool")
+            self._restart(executor)
+            raise WorkerCrashed(str(e)) from e
+
+    def checker(self, method: str, *args, **kwargs):
+        """在工作进程中执行新鲜度检查"""
+        return self.call(run_checker, self.spec, method, *args, **kwargs)
+
+    def catalog_summary(self, dataset_name: str) -> Dict[str, Any]:
+        """在工作进程中刷新文件目录，返回数据集的文件统计摘要"""
+        return self.call(run_catalog_summary, self.spec, dataset_name)
+
+    def package(self, dataset_name: str, data_dir: str) -> Dict[str, Any]:
+        """在工作进程中打包，工作进程崩溃时返回失败结果"""
+        try:
+            return self.call(run_package, self.spec, dataset_name, data_dir)
+        except WorkerCrashed:
+            return {'success': False, 'error': 'Packaging worker crashed'}
+
+    def cancel(self) -> None:
+        """中断工作进程中正在进行的防抖等待（任务以不稳定结束）"""
+        with self._lock:
+            stop_event = self._stop_event
+        if stop_event is not None:
+            stop_event.set()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭进程池：中断防抖等待，取消尚未开始的任务"""
+        self.cancel()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,68 @@
+"""
+Tests for csv_tail
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import csv_tail
+from csv_tail import normalize_date, read_last_date, read_last_dates
+
+
+class TestCsvTail(unittest.TestCase):
+    """测试从 CSV 末尾读取日期"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name: str, content: str) -> str:
+        path = self.temp_dir / name
+        path.write_text(content)
+        return str(path)
+
+    def test_normalize_date(self):
+        """测试日期格式规范化"""
+        self.assertEqual(normalize_date('20240115'), '2024-01-15')
+        self.assertEqual(normalize_date('2024/01/15'), '2024-01-15')
+        self.assertEqual(normalize_date('2024-01-15'), '2024-01-15')
+        self.assertIsNone(normalize_date('latest'))
+
+    def test_read_last_date(self):
+        """测试读取最后一行的日期（忽略结尾空行）"""
+        path = self._write('a.csv', 'date,close\n2024-01-12,10.1\n20240115,10.3\n\n')
+        self.assertEqual(read_last_date(path), '2024-01-15')
+
+    def test_long_last_line(self):
+        """测试最后一行超过默认读取长度"""
+        path = self._write('a.csv', 'date,note\n2024-01-12,x\n2024-01-15,' + 'y' * 10000 + '\n')
+        self.assertEqual(read_last_date(path), '2024-01-15')
+
+    def test_missing_date(self):
+        """测试空文件、没有日期和不存在的文件"""
+        self.assertIsNone(read_last_date(self._write('empty.csv', '')))
+        self.assertIsNone(read_last_date(self._write('header.csv', 'date,close\n')))
+        self.assertIsNone(read_last_date(str(self.temp_dir / 'missing.csv')))
+
+    def test_read_last_dates_keeps_order(self):
+        """测试批量读取时结果顺序与输入一致"""
+        paths = [
+            self._write(f'{i}.csv', f'date,close\n2024-01-{i % 28 + 1:02d},1.0\n')
+            for i in range(10)
+        ]
+        expected = [f'2024-01-{i % 28 + 1:02d}' for i in range(10)]
+        with patch.object(csv_tail, 'BATCH_SIZE', 3):
+            self.assertEqual(read_last_dates(paths, workers=4), expected)
+        self.assertEqual(read_last_dates(paths, workers=1), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
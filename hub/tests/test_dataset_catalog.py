@@ -0,0 +1,99 @@
+"""
+Tests for DatasetCatalog
+"""
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from dataset_catalog import DatasetCatalog
+from packager import Packager
+
+
+class TestDatasetCatalog(unittest.TestCase):
+    """测试 DatasetCatalog 功能"""
+
+    def setUp(self):
+        """测试前创建临时数据目录和缓存目录"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.data_root = self.temp_dir / 'data'
+        self.cache_dir = self.temp_dir / 'cache'
+        self.dataset_dir = self.data_root / 'test-dataset'
+        (self.dataset_dir / 'sub').mkdir(parents=True)
+        self.cache_dir.mkdir()
+
+        (self.dataset_dir / 'a.csv').write_text('a,b\n1,2\n')
+        (self.dataset_dir / 'sub' / 'b.csv').write_text('a,b\n3,4\n')
+
+        self.config = {
+            'server': {
+                'data_root': str(self.data_root),
+                'cache_dir': str(self.cache_dir)
+            },
+            'datasets': [
+                {'name': 'test-dataset', 'path': 'test-dataset', 'freshness_threshold': 0.85}
+            ]
+        }
+        self.catalog = DatasetCatalog(self.config)
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_refresh_scans_directory(self):
+        """测试刷新统计文件数量和大小"""
+        entry = self.catalog.refresh('test-dataset')
+
+        self.assertEqual(entry['file_count'], 2)
+        self.assertEqual(entry['total_size'], 16)
+        self.assertIsNotNone(entry['last_updated'])
+        self.assertIsNone(entry['package_path'])
+
+    def test_payload_is_cached(self):
+        """测试响应体被缓存，不会每次请求重新扫描"""
+        states = {'test-dataset': {'status': 'ready'}}
+        payload1 = self.catalog.get_payload(states)
+
+        with patch.object(DatasetCatalog, '_scan_directory') as mock_scan:
+            payload2 = self.catalog.get_payload(states)
+            mock_scan.assert_not_called()
+
+        self.assertIs(payload1, payload2)
+        data = json.loads(payload1.decode('utf-8'))
+        self.assertEqual(data['datasets'][0]['file_count'], 2)
+        self.assertEqual(data['datasets'][0]['status'], 'ready')
+
+    def test_payload_rebuilt_on_state_change(self):
+        """测试状态变化时重建响应体"""
+        states = {'test-dataset': {'status': 'checking'}}
+        self.catalog.get_payload(states)
+
+        states['test-dataset']['status'] = 'ready'
+        data = json.loads(self.catalog.get_payload(states).decode('utf-8'))
+
+        self.assertEqual(data['datasets'][0]['status'], 'ready')
+
+    def test_packager_records_package(self):
+        """测试打包完成后 Packager 更新元数据目录"""
+        self.catalog.get_payload({})
+
+        packager = Packager(str(self.cache_dir), keep_versions=2, catalog=self.catalog)
+        result = packager.package('test-dataset', str(self.dataset_dir))
+
+        entry = self.catalog.get('test-dataset')
+        self.assertEqual(entry['package_path'], result['zip_path'])
+        self.assertEqual(entry['package_size'], result['zip_size'])
+        self.assertEqual(entry['file_count'], 2)
+
+        data = json.loads(self.catalog.get_payload({}).decode('utf-8'))
+        self.assertTrue(data['datasets'][0]['package_ready'])
+
+
+if __name__ == '__main__':
+    unittest.main()
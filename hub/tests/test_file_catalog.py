@@ -0,0 +1,123 @@
+"""
+Tests for file_catalog
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from file_catalog import FileCatalog
+from freshness_checker import FreshnessChecker
+from packager import Packager
+
+
+class TestFileCatalog(unittest.TestCase):
+    """测试持久化的增量文件目录"""
+
+    def setUp(self):
+        """创建测试数据目录"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.data_root = self.temp_dir / 'data'
+        self.root = self.data_root / 'stock'
+        (self.root / 'sub').mkdir(parents=True)
+        (self.root / 'a.csv').write_text('1234')
+        (self.root / 'b.txt').write_text('ignored')
+        (self.root / 'sub' / 'c.csv').write_text('12')
+        os.utime(self.root / 'a.csv', (1700000000, 1700000000))
+        os.utime(self.root / 'sub' / 'c.csv', (1700003000, 1700003000))
+
+        self.datasets = [{'name': 'stock', 'path': 'stock'}]
+        self.catalog_dir = self.temp_dir / 'cache' / 'file_catalog'
+
+    def tearDown(self):
+        """清理测试目录"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _catalog(self, trust_dir_mtime=False):
+        return FileCatalog(str(self.data_root), self.datasets, str(self.catalog_dir), trust_dir_mtime)
+
+    def test_scan_and_entries(self):
+        """测试刷新后按后缀返回扫描结果和完整的文件列表"""
+        catalog = self._catalog()
+        self.assertEqual(catalog.refresh('stock'), 2)
+
+        scan = catalog.scan('stock', with_paths=True)
+        self.assertEqual(sorted(scan.mtimes), [1700000000.0, 1700003000.0])
+        self.assertEqual(scan.total_size, 6)
+        self.assertEqual(sorted(Path(p).name for p in scan.paths), ['a.csv', 'c.csv'])
+
+        entries = {rel: (size, mtime) for rel, size, mtime, _ in catalog.entries('stock')}
+        self.assertEqual(entries, {
+            'a.csv': (4, 1700000000.0),
+            'b.txt': (7, (self.root / 'b.txt').stat().st_mtime),
+            os.path.join('sub', 'c.csv'): (2, 1700003000.0)
+        })
+
+    def test_persisted_and_reloaded(self):
+        """测试记录落盘，新实例无需扫描即可读取"""
+        self._catalog().refresh('stock')
+        self.assertTrue((self.catalog_dir / 'stock.json').exists())
+
+        reloaded = self._catalog()
+        with patch('file_catalog.os.scandir', side_effect=AssertionError('should not scan')):
+            self.assertEqual(len(reloaded.scan('stock')), 2)
+
+    def test_unchanged_dirs_short_circuit(self):
+        """测试信任目录 mtime 时，未变化的目录不再重新列出"""
+        self._catalog(trust_dir_mtime=True).refresh('stock')
+
+        catalog = self._catalog(trust_dir_mtime=True)
+        self.assertEqual(catalog.refresh('stock'), 0)
+
+        # 新增文件改变子目录 mtime，只重新列出该目录
+        (self.root / 'sub' / 'd.csv').write_text('123')
+        self.assertEqual(catalog.refresh('stock'), 1)
+        self.assertEqual(len(catalog.scan('stock')), 3)
+
+        # full=True 忽略目录 mtime
+        self.assertEqual(catalog.refresh('stock', full=True), 2)
+
+    def test_default_relists_and_sees_appends(self):
+        """测试默认每次重新列出，原地追加（目录 mtime 不变）也能被发现"""
+        catalog = self._catalog()
+        catalog.refresh('stock')
+
+        with open(self.root / 'a.csv', 'a') as f:
+            f.write('5678')
+        self.assertEqual(catalog.refresh('stock'), 2)
+        self.assertEqual(catalog.scan('stock').total_size, 10)
+
+    def test_removed_directory_dropped(self):
+        """测试删除的子目录从记录中移除"""
+        catalog = self._catalog(trust_dir_mtime=True)
+        catalog.refresh('stock')
+
+        shutil.rmtree(self.root / 'sub')
+        catalog.refresh('stock')
+        self.assertEqual(len(catalog.scan('stock')), 1)
+        self.assertEqual(len(self._catalog().scan('stock')), 1)
+
+    def test_shared_with_checker_and_packager(self):
+        """测试新鲜度检查和打包通过同一份目录读取文件"""
+        catalog = self._catalog()
+        checker = FreshnessChecker(str(self.data_root), self.datasets, file_catalog=catalog)
+        self.assertEqual(checker.check('2024-01-15', dataset='stock').total_count, 2)
+
+        packager = Packager(str(self.temp_dir / 'cache'), file_catalog=catalog)
+        result = packager.package('stock', str(self.root))
+        self.assertTrue(result['success'])
+        with zipfile.ZipFile(result['zip_path']) as zf:
+            self.assertEqual(sorted(zf.namelist()), ['a.csv', 'b.txt', 'sub/c.csv'])
+        manifest = packager.load_manifest(result['zip_path'])
+        self.assertEqual(manifest['files']['sub/c.csv']['mtime'], 1700003000.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
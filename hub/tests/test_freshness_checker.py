@@ -9,11 +9,13 @@ import shutil
 import unittest
 from datetime import datetime, timedelta
 from pathlib import Path
+from unittest.mock import patch
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
-from freshness_checker import FreshnessChecker, FreshnessResult
+from freshness_checker import FreshnessChecker, FreshnessCounter, FreshnessResult
+from fs_scanner import scan_trees
 
 
 class TestFreshnessResult(unittest.TestCase):
@@ -225,6 +227,97 @@ class TestFreshnessChecker(unittest.TestCase):
         self.assertGreaterEqual(files_older_or_equal, 84)  # 至少84个文件<=分位点
         self.assertLessEqual(files_older_or_equal, 90)     # 但不超过90个
     
+    def test_check_reports_multiple_percentiles(self):
+        """测试一次检查同时给出多个分位数，85%分位数与 last_updated 一致"""
+        trade_date = "2024-01-15"
+        base_time = int(time.time())
+        for i in range(20):
+            file_path = self.dataset1_path / f"{trade_date}_data_{i}.csv"
+            self._create_test_file(file_path)
+            os.utime(file_path, (base_time - i * 60, base_time - i * 60))
+        
+        result = self.checker.check(trade_date)
+        
+        self.assertEqual(sorted(result.percentiles), ['p50', 'p85', 'p95'])
+        self.assertEqual(result.percentiles['p85'], result.last_updated)
+        self.assertEqual(
+            datetime.fromisoformat(result.percentiles['p50']).timestamp(),
+            base_time - 9 * 60
+        )
+        self.assertEqual(result.to_dict()['percentiles'], result.percentiles)
+    
+    def test_majority_minute_rule_per_dataset(self):
+        """测试按数据集选择多数分钟规则，阈值默认取规则的 0.30，直方图被保留"""
+        config = [
+            {'name': 'stock-trading-data-pro', 'path': 'stock-trading-data-pro', 'freshness_rule': 'majority_minute'},
+            {'name': 'stock-fin-data-xbx', 'path': 'stock-fin-data-xbx', 'freshness_threshold': 0.85}
+        ]
+        checker = FreshnessChecker(data_root=str(self.data_root), datasets_config=config)
+        
+        minute = (int(time.time()) // 60 - 5) * 60
+        for i in range(10):
+            path = self._create_test_file(self.dataset1_path / f"sh60000{i}.csv")
+            # 4 个文件在同一分钟，其余分散在更早的分钟
+            mtime = minute + i if i < 4 else minute - 600 * i
+            os.utime(path, (mtime, mtime))
+        
+        result = checker.check("2024-01-15", dataset='stock-trading-data-pro')
+        
+        self.assertEqual(result.rule, 'majority_minute')
+        self.assertEqual(checker.threshold_for('stock-trading-data-pro'), 0.30)
+        self.assertEqual(result.fresh_count, 4)
+        self.assertAlmostEqual(result.fresh_ratio, 0.4)
+        self.assertTrue(result.is_fresh())
+        self.assertEqual(result.majority_minute, datetime.fromtimestamp(minute).isoformat())
+        self.assertEqual(checker.last_histogram('stock-trading-data-pro')[minute], 4)
+        
+        # 另一个数据集仍使用默认规则
+        self.assertEqual(checker.rule_for('stock-fin-data-xbx').name, 'recent_window')
+        
+        with self.assertRaises(ValueError):
+            FreshnessChecker(str(self.data_root), [{'name': 'x', 'path': 'x', 'freshness_rule': 'bogus'}])
+    
+    def test_debounce_for(self):
+        """测试防抖静默期：数据集配置优先，其次规则默认值（多数分钟 60 秒），最后是全局值"""
+        config = [
+            {'name': 'majority', 'path': 'majority', 'freshness_rule': 'majority_minute'},
+            {'name': 'override', 'path': 'override', 'freshness_rule': 'majority_minute', 'debounce_seconds': 5},
+            {'name': 'plain', 'path': 'plain'}
+        ]
+        checker = FreshnessChecker(data_root=str(self.data_root), datasets_config=config)
+        
+        self.assertEqual(checker.debounce_for('majority', 30), 60)
+        self.assertEqual(checker.debounce_for('override', 30), 5)
+        self.assertEqual(checker.debounce_for('plain', 30), 30)
+    
+    def test_read_completion_marker(self):
+        """测试读取写入完成标记：哨兵文件、声明文件数以及 newer_than 过滤"""
+        config = [dict(self.datasets_config[0], completion_marker='_SUCCESS')]
+        checker = FreshnessChecker(data_root=str(self.data_root), datasets_config=config)
+        name = config[0]['name']
+        for i in range(3):
+            self._create_test_file(self.dataset1_path / 'sub' / f"data_{i}.csv")
+        
+        self.assertIsNone(checker.read_completion_marker(name))
+        
+        marker_path = self.dataset1_path / '_SUCCESS'
+        marker_path.write_text('')
+        marker = checker.read_completion_marker(name)
+        self.assertTrue(marker.is_complete)
+        self.assertIsNone(marker.expected_count)
+        self.assertIsNone(checker.read_completion_marker(name, newer_than=marker.mtime))
+        
+        marker_path.write_text('{"file_count": 4}')
+        marker = checker.read_completion_marker(name)
+        self.assertEqual(marker.actual_count, 3)
+        self.assertFalse(marker.is_complete)
+        
+        marker_path.write_text('{"file_count": 3}')
+        self.assertTrue(checker.read_completion_marker(name).is_complete)
+        
+        # 未配置标记的数据集
+        self.assertIsNone(self.checker.read_completion_marker(name))
+    
     def test_check_date_format_variations(self):
         """测试不同日期格式的处理"""
         trade_date_dash = "2024-01-15"
@@ -260,6 +353,75 @@ class TestFreshnessChecker(unittest.TestCase):
         self.assertEqual(result.total_count, 8)
         self.assertEqual(result.fresh_count, 8)
     
+    def test_check_single_dataset(self):
+        """测试按数据集检查只统计该数据集的文件"""
+        trade_date = "2024-01-15"
+        
+        for i in range(5):
+            self._create_test_file(self.dataset1_path / f"data_{i}.csv")
+        for i in range(3):
+            path = self._create_test_file(self.dataset2_path / f"fin_{i}.csv")
+            self._set_file_mtime(path, days_ago=5)
+        
+        result1 = self.checker.check(trade_date, dataset='stock-trading-data-pro')
+        result2 = self.checker.check(trade_date, dataset='stock-fin-data-xbx')
+        
+        self.assertEqual((result1.total_count, result1.fresh_count), (5, 5))
+        self.assertEqual((result2.total_count, result2.fresh_count), (3, 0))
+        self.assertEqual(self.checker.check(trade_date, dataset='unknown').total_count, 0)
+    
+    def test_scan_cycle_reuses_scan(self):
+        """测试调度周期内同一数据集只扫描一次，防抖的第二次检查重新扫描"""
+        trade_date = "2024-01-15"
+        for i in range(4):
+            self._create_test_file(self.dataset1_path / f"data_{i}.csv")
+        
+        with patch('freshness_checker.scan_trees', wraps=scan_trees) as mock_scan:
+            with self.checker.scan_cycle():
+                self.checker.check(trade_date, dataset='stock-trading-data-pro')
+                self._create_test_file(self.dataset1_path / "late.csv")
+                result = self.checker.check_stable(
+                    trade_date, debounce_seconds=0, dataset='stock-trading-data-pro'
+                )
+                cached = self.checker.check(trade_date, dataset='stock-trading-data-pro')
+            
+            # 周期外不使用缓存
+            self.checker.check(trade_date, dataset='stock-trading-data-pro')
+        
+        # 第一次检查 + 防抖第二次检查 + 周期外检查
+        self.assertEqual(mock_scan.call_count, 3)
+        self.assertEqual(result.total_count, 5)
+        self.assertEqual(cached.total_count, 5)
+    
+    def test_check_sampled(self):
+        """测试抽样检查：区间在阈值一侧时返回估计结果，跨越阈值时精确扫描"""
+        import random
+        trade_date = "2024-01-15"
+        for sub in ('a', 'b'):
+            for i in range(100):
+                path = self._create_test_file(self.dataset1_path / sub / f"data_{i}.csv")
+                self._set_file_mtime(path, days_ago=5)
+        
+        with patch.object(self.checker, 'check', wraps=self.checker.check) as exact:
+            result = self.checker.check_sampled(
+                trade_date, 'stock-trading-data-pro', sample_size=50, rng=random.Random(1)
+            )
+            exact.assert_not_called()
+        self.assertEqual((result.total_count, result.fresh_count, result.sample_size), (200, 0, 50))
+        low, high = result.ratio_interval
+        self.assertEqual(low, 0.0)
+        self.assertLess(high, 0.85)
+        
+        # 一半文件新鲜：区间跨越阈值 0.5，改为精确检查
+        for i in range(100):
+            self._create_test_file(self.dataset1_path / 'a' / f"data_{i}.csv")
+        self.checker.datasets_config[0]['freshness_threshold'] = 0.5
+        result = self.checker.check_sampled(
+            trade_date, 'stock-trading-data-pro', sample_size=50, rng=random.Random(1)
+        )
+        self.assertIsNone(result.sample_size)
+        self.assertEqual((result.total_count, result.fresh_count), (200, 100))
+    
     def test_check_stable_with_stable_data(self):
         """测试防抖检查 - 数据稳定的情况"""
         trade_date = "2024-01-15"
@@ -391,6 +553,42 @@ class TestFreshnessChecker(unittest.TestCase):
         self.assertEqual(result.fresh_ratio, 0.0)
 
 
+class TestFreshnessCounter(unittest.TestCase):
+    """测试增量新鲜度计数"""
+    
+    def test_update_remove_and_expire(self):
+        """测试更新、删除以及随时间过期"""
+        counter = FreshnessCounter(window=100)
+        counter.update('a.csv', 1000, now=1050)
+        counter.update('b.csv', 900, now=1050)
+        self.assertEqual(counter.fresh_ratio(now=1050), 0.5)
+        
+        # 旧文件被重写后计入新鲜
+        counter.update('b.csv', 1040, now=1050)
+        self.assertEqual(counter.fresh_ratio(now=1050), 1.0)
+        
+        # a.csv 先过期；b.csv 的旧堆条目不影响计数
+        self.assertEqual(counter.fresh_ratio(now=1120), 0.5)
+        
+        counter.remove('b.csv')
+        self.assertEqual(len(counter), 1)
+        self.assertEqual(counter.fresh_ratio(now=1120), 0.0)
+    
+    def test_reset_and_remove_tree(self):
+        """测试由扫描结果重建计数以及按目录删除"""
+        counter = FreshnessCounter()
+        scan = scan_trees([], with_paths=True)
+        scan.paths.extend([os.path.join('root', 'a.csv'), os.path.join('root', 'sub', 'b.csv')])
+        scan.mtimes.extend([time.time(), time.time()])
+        
+        self.assertTrue(counter.reset(scan))
+        self.assertFalse(counter.reset(scan))
+        self.assertEqual(len(counter.to_scan()), 2)
+        
+        counter.remove_tree(os.path.join('root', 'sub'))
+        self.assertEqual(len(counter), 1)
+
+
 class TestFreshnessCheckerIntegration(unittest.TestCase):
     """集成测试 - 测试真实场景"""
     
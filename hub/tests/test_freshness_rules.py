@@ -0,0 +1,119 @@
+"""
+Tests for freshness_rules
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from array import array
+from pathlib import Path
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import freshness_rules
+from freshness_rules import MajorityMinuteRule, RecentWindowRule, TradeDateRule, get_rule
+from freshness_checker import FreshnessResult
+from fs_scanner import ScanResult, scan_tree
+
+
+class TestFreshnessRules(unittest.TestCase):
+    """测试新鲜度判定规则"""
+
+    def test_recent_window(self):
+        """测试最近窗口规则"""
+        rule = RecentWindowRule(window=100)
+        outcome = rule.evaluate(array('d', [950.0, 1000.0, 800.0]), now=1020.0)
+        self.assertEqual(outcome.matched_count, 2)
+        self.assertIsNone(outcome.histogram)
+
+    def test_majority_minute_prefers_latest_on_tie(self):
+        """测试多数分钟：文件最多的分钟，并列时取最新的分钟"""
+        rule = MajorityMinuteRule()
+        mtimes = array('d', [60.0, 61.0, 62.0, 125.0, 130.0, 190.0, 191.0, 192.0])
+        outcome = rule.evaluate(mtimes, now=200.0)
+        self.assertEqual(outcome.majority_minute, 180.0)
+        self.assertEqual(outcome.matched_count, 3)
+        self.assertEqual(outcome.histogram, {60: 3, 120: 2, 180: 3})
+
+    def test_majority_minute_stability_compares_histograms(self):
+        """测试多数分钟规则的防抖判定"""
+        rule = MajorityMinuteRule()
+
+        def result(histogram, minute, ratio):
+            return FreshnessResult(
+                total_count=10, fresh_count=int(ratio * 10), fresh_ratio=ratio,
+                last_updated='', majority_minute=minute, histogram=histogram
+            )
+
+        before = result({60: 5, 120: 5}, '120', 0.5)
+        self.assertTrue(rule.is_stable(before, result({60: 5, 120: 5}, '120', 0.5)))
+        # 多数分钟变了，即使比例相同也不稳定
+        self.assertFalse(rule.is_stable(before, result({60: 5, 180: 5}, '180', 0.5)))
+
+    def test_trade_date_reads_only_changed_files(self):
+        """测试交易日规则：按最后一行日期计数，未变化的文件不重复读取"""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        for name, last_row in [('a', '2024-01-15'), ('b', '20240116'), ('c', '2024-01-12')]:
+            with open(os.path.join(temp_dir, f'{name}.csv'), 'w') as f:
+                f.write(f'date,close\n2024-01-11,1.0\n{last_row},2.0\n')
+
+        rule = TradeDateRule(workers=1)
+        scan = scan_tree(temp_dir, with_paths=True)
+        outcome = rule.evaluate(scan.mtime_vector, now=0.0, scan=scan, trade_date='20240115')
+        # 只有最后一行日期等于交易日的文件视为新鲜
+        self.assertEqual(outcome.matched_count, 1)
+        self.assertEqual(rule.evaluate(scan.mtime_vector, now=0.0, scan=scan).matched_count, 0)
+
+        with patch.object(freshness_rules, 'read_last_dates', wraps=freshness_rules.read_last_dates) as reader:
+            rule.evaluate(scan.mtime_vector, now=0.0, scan=scan, trade_date='2024-01-15')
+            reader.assert_called_once_with([], 1)
+
+    def test_trade_date_sampled_scan_keeps_cache(self):
+        """测试抽样扫描不淘汰未被抽到的文件的缓存，完整扫描才裁剪"""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        for i in range(4):
+            with open(os.path.join(temp_dir, f'{i}.csv'), 'w') as f:
+                f.write('date,close\n2024-01-15,1.0\n')
+
+        rule = TradeDateRule(workers=1)
+        scan = scan_tree(temp_dir, with_paths=True)
+        rule.evaluate(scan.mtime_vector, now=0.0, scan=scan, trade_date='2024-01-15')
+
+        sample = ScanResult(
+            mtimes=scan.mtimes[:1], sizes=scan.sizes[:1], paths=scan.paths[:1], sampled=True
+        )
+        self.assertEqual(rule.evaluate(sample.mtime_vector, now=0.0, scan=sample, trade_date='2024-01-15').matched_count, 1)
+
+        with patch.object(freshness_rules, 'read_last_dates', wraps=freshness_rules.read_last_dates) as reader:
+            rule.evaluate(scan.mtime_vector, now=0.0, scan=scan, trade_date='2024-01-15')
+            reader.assert_called_once_with([], 1)
+
+        # 完整扫描只剩一个文件时缓存随之裁剪
+        partial = ScanResult(mtimes=scan.mtimes[:1], sizes=scan.sizes[:1], paths=scan.paths[:1])
+        rule.evaluate(partial.mtime_vector, now=0.0, scan=partial, trade_date='2024-01-15')
+        self.assertEqual(list(rule._cache), scan.paths[:1])
+
+    def test_get_rule(self):
+        """测试按名称创建规则"""
+        self.assertIsInstance(get_rule(None), RecentWindowRule)
+        self.assertIsInstance(get_rule('majority_minute'), MajorityMinuteRule)
+        self.assertTrue(get_rule('trade_date').needs_paths)
+        with self.assertRaises(ValueError):
+            get_rule('unknown')
+
+    def test_rule_without_evaluate_cannot_be_created(self):
+        """测试没有实现 evaluate 的规则在创建时就报错"""
+        class IncompleteRule(freshness_rules.FreshnessRule):
+            name = 'incomplete'
+
+        with self.assertRaises(TypeError):
+            IncompleteRule()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Tests for freshness_sampling
+"""
+
+import random
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from freshness_sampling import SampleEstimate, stratified_sample, wilson_interval
+
+
+class TestFreshnessSampling(unittest.TestCase):
+    """测试分层抽样与置信区间"""
+
+    def test_stratified_sample_is_proportional(self):
+        """测试各层样本量与层大小成正比"""
+        strata = {
+            'a': [f'a{i}' for i in range(600)],
+            'b': [f'b{i}' for i in range(300)],
+            'c': [f'c{i}' for i in range(100)],
+        }
+        sample = stratified_sample(strata, 50, random.Random(0))
+        self.assertEqual(len(sample), 50)
+        self.assertEqual(len(set(sample)), 50)
+        self.assertEqual([sum(p.startswith(k) for p in sample) for k in 'abc'], [30, 15, 5])
+        # 样本量不小于总数时返回全部文件
+        self.assertEqual(len(stratified_sample(strata, 5000)), 1000)
+
+    def test_wilson_interval(self):
+        """测试置信区间：包含估计值，全部命中或全不命中时仍有宽度，全量抽样时收缩"""
+        low, high = wilson_interval(50, 100, 100000)
+        self.assertLess(low, 0.5)
+        self.assertGreater(high, 0.5)
+
+        low, high = wilson_interval(0, 200, 100000)
+        self.assertEqual(low, 0.0)
+        self.assertGreater(high, 0.0)
+        self.assertLess(high, 0.1)
+
+        self.assertEqual(wilson_interval(30, 100, 100), (0.3, 0.3))
+        self.assertEqual(wilson_interval(0, 0, 100), (0.0, 1.0))
+
+    def test_straddles(self):
+        """测试区间是否跨越阈值"""
+        estimate = SampleEstimate(population=1000, sample_size=100, matched=80, low=0.7, high=0.88)
+        self.assertAlmostEqual(estimate.ratio, 0.8)
+        self.assertTrue(estimate.straddles(0.85))
+        self.assertFalse(estimate.straddles(0.6))
+        self.assertFalse(estimate.straddles(0.9))
+
+
+if __name__ == '__main__':
+    unittest.main()
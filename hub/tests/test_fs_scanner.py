@@ -0,0 +1,78 @@
+"""
+Tests for fs_scanner
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from fs_scanner import scan_tree, scan_trees
+
+
+class TestScanTree(unittest.TestCase):
+    """测试基于 os.scandir 的目录扫描"""
+
+    def setUp(self):
+        """创建嵌套的测试目录"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.root = self.temp_dir / 'data'
+        (self.root / 'sub' / 'deep').mkdir(parents=True)
+
+        (self.root / 'a.csv').write_text('1234')
+        (self.root / 'b.txt').write_text('ignored')
+        (self.root / 'sub' / 'c.csv').write_text('12')
+        (self.root / 'sub' / 'deep' / 'd.csv').write_text('123456')
+        os.utime(self.root / 'a.csv', (1000, 1000))
+        os.utime(self.root / 'sub' / 'c.csv', (3000, 3000))
+        os.utime(self.root / 'sub' / 'deep' / 'd.csv', (2000, 2000))
+
+    def tearDown(self):
+        """清理测试目录"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_collects_matching_files(self):
+        """测试只收集 CSV 文件的 mtime 和大小"""
+        result = scan_tree(str(self.root))
+
+        self.assertEqual(len(result), 3)
+        self.assertIsNone(result.paths)
+        self.assertEqual(sorted(result.mtimes), [1000.0, 2000.0, 3000.0])
+        self.assertEqual(result.total_size, 12)
+        self.assertEqual(result.latest_mtime, 3000.0)
+
+    def test_with_paths_and_no_suffix(self):
+        """测试收集路径以及不过滤后缀"""
+        result = scan_tree(str(self.root), suffix=None, with_paths=True)
+
+        self.assertEqual(len(result), 4)
+        names = sorted(Path(p).name for p in result.paths)
+        self.assertEqual(names, ['a.csv', 'b.txt', 'c.csv', 'd.csv'])
+
+        # 路径与 mtime/size 一一对应
+        for path, mtime, size in zip(result.paths, result.mtimes, result.sizes):
+            stat = os.stat(path)
+            self.assertEqual(mtime, stat.st_mtime)
+            self.assertEqual(size, stat.st_size)
+
+    @unittest.skipIf(not hasattr(os, 'symlink') or os.name == 'nt', '需要符号链接支持')
+    def test_does_not_follow_directory_symlinks(self):
+        """测试不进入符号链接指向的目录"""
+        os.symlink(self.root / 'sub', self.root / 'link')
+
+        self.assertEqual(len(scan_tree(str(self.root))), 3)
+
+    def test_scan_trees_merges_and_skips_missing(self):
+        """测试合并多个根目录，不存在的目录被跳过"""
+        result = scan_trees([str(self.root / 'sub'), str(self.temp_dir / 'missing'), str(self.root / 'sub' / 'deep')])
+
+        self.assertEqual(len(result), 3)
+        self.assertEqual(result.total_size, 2 + 6 + 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Tests for fs_watcher
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from fs_watcher import (
+    InotifyWatcher, inotify_available,
+    IN_CLOSE_WRITE, IN_DELETE, IN_ISDIR, CHANGE_MASK
+)
+
+
+@unittest.skipIf(not inotify_available(), '需要 Linux inotify 支持')
+class TestInotifyWatcher(unittest.TestCase):
+    """测试基于 inotify 的目录树监听"""
+
+    def setUp(self):
+        """创建测试目录并开始监听"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.root = self.temp_dir / 'data'
+        (self.root / 'sub').mkdir(parents=True)
+        (self.root / 'old.csv').write_text('1')
+
+        self.watcher = InotifyWatcher()
+        self.existing = self.watcher.add_tree(str(self.root), 'stock')
+
+    def tearDown(self):
+        """停止监听并清理目录"""
+        self.watcher.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _collect(self, seconds=1.0):
+        """读取事件直到超时"""
+        events = []
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            batch = self.watcher.read(timeout=0.1)
+            if not batch and events:
+                break
+            events.extend(batch)
+        return events
+
+    def test_add_tree_lists_files_and_watches_dirs(self):
+        """测试递归监听并返回已有文件"""
+        self.assertEqual(self.existing, [str(self.root / 'old.csv')])
+        self.assertEqual(self.watcher.watch_count, 2)
+
+    def test_file_events_in_subdirectory(self):
+        """测试子目录中的写入和删除产生带标签的事件"""
+        path = self.root / 'sub' / 'a.csv'
+        path.write_text('date,close\n')
+        os.remove(self.root / 'old.csv')
+
+        events = self._collect()
+        self.assertTrue(all(e.tag == 'stock' for e in events))
+        self.assertTrue(any(e.path == str(path) and e.mask & IN_CLOSE_WRITE for e in events))
+        self.assertTrue(any(e.path == str(self.root / 'old.csv') and e.mask & IN_DELETE for e in events))
+
+    def test_new_directory_is_watched(self):
+        """测试新建的目录自动加入监听，其中已有的文件补发事件"""
+        new_dir = self.root / 'new'
+        new_dir.mkdir()
+        (new_dir / 'early.csv').write_text('1')
+
+        events = self._collect()
+        self.assertTrue(any(e.path == str(new_dir) and e.mask & IN_ISDIR for e in events))
+        self.assertTrue(any(e.path == str(new_dir / 'early.csv') and e.mask & CHANGE_MASK for e in events))
+        self.assertEqual(self.watcher.watch_count, 3)
+
+        (new_dir / 'late.csv').write_text('2')
+        events = self._collect()
+        self.assertTrue(any(e.path == str(new_dir / 'late.csv') for e in events))
+
+    def test_read_timeout(self):
+        """测试没有事件时按超时返回"""
+        self.assertEqual(self.watcher.read(timeout=0.05), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
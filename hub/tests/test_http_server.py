@@ -2,14 +2,19 @@
 测试 HTTP 服务器
 """
 
+import io
 import os
 import json
 import time
+import zlib
+import hashlib
 import shutil
+import socket
 import zipfile
 import unittest
 import threading
 import http.client
+from unittest.mock import patch
 from pathlib import Path
 from urllib.request import urlopen, Request
 from urllib.error import HTTPError
@@ -17,7 +22,9 @@ from urllib.error import HTTPError
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
-from http_server import DataHubServer, DataHubHandler
+from http_server import DataHubServer, DataHubHandler, locate_package_version
+from packager import Packager
+from job_queue import JobQueue
 
 
 class TestDataHubServer(unittest.TestCase):
@@ -194,6 +201,33 @@ class TestDataHubHandler(TestDataHubServer):
         finally:
             server.stop()
     
+    def test_jobs_endpoint(self):
+        """测试任务列表端点"""
+        jobs = JobQueue(workers=1)
+        jobs.submit('test-dataset-1', 'check', lambda: None).wait(5)
+        server = DataHubServer(self.config, self.dataset_states, jobs=jobs)
+        
+        try:
+            server_thread = threading.Thread(target=server.start)
+            server_thread.daemon = True
+            server_thread.start()
+            time.sleep(0.5)
+            
+            conn = http.client.HTTPConnection('127.0.0.1', 18080)
+            conn.request('GET', '/api/jobs')
+            response = conn.getresponse()
+            
+            self.assertEqual(response.status, 200)
+            data = json.loads(response.read().decode('utf-8'))
+            self.assertEqual(len(data['jobs']), 1)
+            self.assertEqual(data['jobs'][0]['dataset'], 'test-dataset-1')
+            self.assertEqual(data['jobs'][0]['state'], 'finished')
+            
+            conn.close()
+        finally:
+            server.stop()
+            jobs.close()
+    
     def test_package_endpoint_not_found(self):
         """测试包下载端点（包不存在）"""
         DataHubHandler.config = self.config
@@ -411,6 +445,151 @@ class TestDataHubHandler(TestDataHubServer):
         finally:
             server.stop()
     
+    def test_manifest_endpoint(self):
+        """测试清单端点返回最新包的文件清单"""
+        dataset_dir = self._create_test_data('test-dataset-1')
+        result = Packager(str(self.cache_dir)).package('test-dataset-1', str(dataset_dir))
+        
+        DataHubHandler.config = self.config
+        DataHubHandler.dataset_states = self.dataset_states
+        
+        server = DataHubServer(self.config, self.dataset_states)
+        
+        try:
+            server_thread = threading.Thread(target=server.start)
+            server_thread.daemon = True
+            server_thread.start()
+            time.sleep(0.5)
+            
+            conn = http.client.HTTPConnection('127.0.0.1', 18080)
+            conn.request('GET', '/api/datasets/test-dataset-1/manifest')
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            manifest = json.loads(response.read().decode('utf-8'))
+            
+            self.assertEqual(manifest['version'], result['version'])
+            self.assertEqual(manifest['file_count'], 3)
+            self.assertEqual(manifest['package_size'], result['zip_size'])
+            self.assertEqual(
+                manifest['package_sha256'],
+                hashlib.sha256(Path(result['zip_path']).read_bytes()).hexdigest()
+            )
+            file_info = manifest['files']['file_0.txt']
+            self.assertEqual(file_info['size'], len('Content 0'))
+            self.assertEqual(file_info['crc32'], zlib.crc32(b'Content 0'))
+            self.assertEqual(file_info['sha256'], hashlib.sha256(b'Content 0').hexdigest())
+            
+            # 没有包的数据集
+            conn.request('GET', '/api/datasets/test-dataset-2/manifest')
+            response = conn.getresponse()
+            self.assertEqual(response.status, 404)
+            response.read()
+            
+            conn.close()
+        finally:
+            server.stop()
+    
+    def test_delta_endpoint(self):
+        """测试增量包下载端点"""
+        with zipfile.ZipFile(self.cache_dir / 'test-dataset-1_20240102_150000.zip', 'w') as zf:
+            zf.writestr('a.csv', 'full')
+        deltas_dir = self.cache_dir / 'deltas'
+        deltas_dir.mkdir()
+        delta_file = deltas_dir / 'test-dataset-1_20240101_150000_to_20240102_150000.zip'
+        with zipfile.ZipFile(delta_file, 'w') as zf:
+            zf.writestr('a.csv', 'delta')
+        
+        DataHubHandler.config = self.config
+        DataHubHandler.dataset_states = self.dataset_states
+        
+        server = DataHubServer(self.config, self.dataset_states)
+        
+        try:
+            server_thread = threading.Thread(target=server.start)
+            server_thread.daemon = True
+            server_thread.start()
+            time.sleep(0.5)
+            
+            conn = http.client.HTTPConnection('127.0.0.1', 18080)
+            conn.request('GET', '/delta/test-dataset-1/20240101_150000.zip')
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.read(), delta_file.read_bytes())
+            
+            # 没有对应基准版本的增量包
+            conn.request('GET', '/delta/test-dataset-1/20231231_150000.zip')
+            response = conn.getresponse()
+            self.assertEqual(response.status, 404)
+            response.read()
+            
+            # 非法版本号
+            conn.request('GET', '/delta/test-dataset-1/..%2F..%2Fx.zip')
+            response = conn.getresponse()
+            self.assertEqual(response.status, 400)
+            response.read()
+            
+            # /api/datasets 返回当前版本号
+            conn.request('GET', '/api/datasets')
+            data = json.loads(conn.getresponse().read().decode('utf-8'))
+            dataset1 = next(d for d in data['datasets'] if d['name'] == 'test-dataset-1')
+            self.assertEqual(dataset1['version'], '20240102_150000')
+            
+            conn.close()
+        finally:
+            server.stop()
+    
+    def test_package_version_endpoint(self):
+        """测试下载指定版本的数据包（blob 模式下旧版本按需从 blob 重建）"""
+        dataset_dir = self._create_test_data('test-dataset-1', file_count=2)
+        packager = Packager(str(self.cache_dir), keep_versions=2, blob_store=True)
+        first = packager.package('test-dataset-1', str(dataset_dir))
+        time.sleep(1.1)
+        (dataset_dir / 'file_0.txt').write_text('Changed')
+        second = packager.package('test-dataset-1', str(dataset_dir))
+        self.assertFalse(Path(first['zip_path']).exists())
+        
+        # 没有开启 blob 库的 Packager 时不重建旧版本
+        status, _, _ = locate_package_version(self.config, 'test-dataset-1', first['version'])
+        self.assertEqual(status, 404)
+        
+        config = dict(self.config, packaging={'blob_store': True, 'keep_versions': 2})
+        server = DataHubServer(config, self.dataset_states, packager=packager)
+        self.assertIs(DataHubHandler.packager, packager)
+        
+        try:
+            server_thread = threading.Thread(target=server.start)
+            server_thread.daemon = True
+            server_thread.start()
+            time.sleep(0.5)
+            
+            conn = http.client.HTTPConnection('127.0.0.1', 18080)
+            conn.request('GET', f"/package/test-dataset-1/{first['version']}.zip")
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            body = response.read()
+            with zipfile.ZipFile(io.BytesIO(body)) as zf:
+                self.assertEqual(zf.read('file_0.txt'), b'Content 0')
+            
+            # 最新版本直接返回现有的 zip
+            conn.request('GET', f"/package/test-dataset-1/{second['version']}.zip")
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.read(), Path(second['zip_path']).read_bytes())
+            
+            conn.request('GET', '/package/test-dataset-1/20000101_000000.zip')
+            response = conn.getresponse()
+            self.assertEqual(response.status, 404)
+            response.read()
+            
+            conn.request('GET', '/package/test-dataset-1/latest.zip')
+            response = conn.getresponse()
+            self.assertEqual(response.status, 400)
+            response.read()
+            
+            conn.close()
+        finally:
+            server.stop()
+    
     def test_datasets_with_states(self):
         """测试数据集端点（带状态信息）"""
         # 设置数据集状态
@@ -454,6 +633,163 @@ class TestDataHubHandler(TestDataHubServer):
             server.stop()
 
 
+class TestSendfile(TestDataHubServer):
+    """测试 sendfile 快速路径与分块复制回退路径"""
+    
+    def _download(self, headers=None):
+        """启动服务器并下载 test-dataset-1 的数据包"""
+        server = DataHubServer(self.config, self.dataset_states)
+        try:
+            server_thread = threading.Thread(target=server.start)
+            server_thread.daemon = True
+            server_thread.start()
+            time.sleep(0.5)
+            
+            conn = http.client.HTTPConnection('127.0.0.1', 18080)
+            conn.request('GET', '/package/test-dataset-1.zip', headers=headers or {})
+            response = conn.getresponse()
+            status, content = response.status, response.read()
+            conn.close()
+            return status, content
+        finally:
+            server.stop()
+            self.config['server'].pop('sendfile', None)
+    
+    def test_full_and_range_match_file(self):
+        """测试两种发送方式的完整下载和 Range 下载内容一致"""
+        zip_path = self._create_test_package('test-dataset-1', os.urandom(300 * 1024))
+        expected = zip_path.read_bytes()
+        
+        for use_sendfile in (True, False):
+            self.config['server']['sendfile'] = use_sendfile
+            status, content = self._download()
+            self.assertEqual(status, 200)
+            self.assertEqual(content, expected)
+            
+            self.config['server']['sendfile'] = use_sendfile
+            status, content = self._download({'Range': 'bytes=1000-200000'})
+            self.assertEqual(status, 206)
+            self.assertEqual(content, expected[1000:200001])
+    
+    def test_sendfile_disabled_by_config(self):
+        """测试配置关闭 sendfile"""
+        self.config['server']['sendfile'] = False
+        try:
+            DataHubServer(self.config, self.dataset_states).server.server_close()
+            self.assertFalse(DataHubHandler.use_sendfile)
+        finally:
+            self.config['server'].pop('sendfile', None)
+            DataHubHandler.use_sendfile = True
+
+
+class TestConcurrentServing(TestDataHubServer):
+    """负载测试：多个下载进行中时 API 请求仍然快速响应"""
+    
+    # 被测的并发服务模式
+    mode = 'threaded'
+    
+    def _create_large_package(self, dataset_name: str, size_mb: int) -> Path:
+        """创建足够大的包，保证慢速客户端会让服务端发送阻塞"""
+        zip_path = self.cache_dir / f"{dataset_name}_{time.strftime('%Y%m%d_%H%M%S')}.zip"
+        with open(zip_path, 'wb') as f:
+            f.write(os.urandom(1024 * 1024) * size_mb)
+        return zip_path
+    
+    def _start_server(self, **server_options):
+        """按指定选项启动服务器"""
+        config = dict(self.config, server=dict(self.config['server'], **server_options))
+        server = DataHubServer(config, self.dataset_states)
+        server_thread = threading.Thread(target=server.start)
+        server_thread.daemon = True
+        server_thread.start()
+        time.sleep(0.5)
+        return server
+    
+    def _start_slow_download(self, release: threading.Event) -> threading.Thread:
+        """开始一个只读取少量数据就暂停的下载"""
+        def download():
+            conn = http.client.HTTPConnection('127.0.0.1', 18080, timeout=30)
+            try:
+                conn.request('GET', '/package/test-dataset-1.zip')
+                response = conn.getresponse()
+                response.read(64 * 1024)
+                release.wait(30)
+                while response.read(1024 * 1024):
+                    pass
+            finally:
+                conn.close()
+        
+        thread = threading.Thread(target=download, daemon=True)
+        thread.start()
+        return thread
+    
+    def test_datasets_latency_during_downloads(self):
+        """测试 4 个慢速下载进行中时 /api/datasets 的 p99 延迟"""
+        self._create_test_data('test-dataset-1', file_count=5)
+        self._create_large_package('test-dataset-1', size_mb=64)
+        
+        server = self._start_server(mode=self.mode, max_workers=8, max_connections=16)
+        release = threading.Event()
+        downloads = []
+        try:
+            downloads = [self._start_slow_download(release) for _ in range(4)]
+            time.sleep(0.5)
+            
+            latencies = []
+            for _ in range(50):
+                start = time.perf_counter()
+                conn = http.client.HTTPConnection('127.0.0.1', 18080, timeout=10)
+                conn.request('GET', '/api/datasets')
+                response = conn.getresponse()
+                self.assertEqual(response.status, 200)
+                response.read()
+                conn.close()
+                latencies.append(time.perf_counter() - start)
+            
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99) - 1]
+            self.assertLess(p99, 0.5)
+        finally:
+            release.set()
+            for thread in downloads:
+                thread.join(30)
+            server.stop()
+    
+    def test_max_connections_rejects_with_503(self):
+        """测试超过最大连接数时返回 503"""
+        self._create_large_package('test-dataset-1', size_mb=64)
+        
+        server = self._start_server(mode=self.mode, max_workers=1, max_connections=1)
+        release = threading.Event()
+        download = None
+        try:
+            download = self._start_slow_download(release)
+            time.sleep(0.5)
+            
+            conn = http.client.HTTPConnection('127.0.0.1', 18080, timeout=10)
+            conn.request('GET', '/health')
+            response = conn.getresponse()
+            self.assertEqual(response.status, 503)
+            self.assertIn('error', json.loads(response.read().decode('utf-8')))
+            conn.close()
+        finally:
+            release.set()
+            if download:
+                download.join(30)
+            server.stop()
+    
+    def test_single_mode(self):
+        """测试单线程模式仍可用"""
+        server = self._start_server(mode='single')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', 18080, timeout=10)
+            conn.request('GET', '/health')
+            self.assertEqual(conn.getresponse().status, 200)
+            conn.close()
+        finally:
+            server.stop()
+
+
 class TestDataHubServerClass(unittest.TestCase):
     """测试 DataHubServer 类"""
     
@@ -480,6 +816,8 @@ class TestDataHubServerClass(unittest.TestCase):
         # 验证处理器配置已设置
         self.assertEqual(DataHubHandler.config, config)
         self.assertEqual(DataHubHandler.dataset_states, dataset_states)
+        # 未开启 blob 库时不创建 Packager
+        self.assertIsNone(DataHubHandler.packager)
     
     def test_server_default_values(self):
         """测试服务器默认值"""
@@ -495,5 +833,115 @@ class TestDataHubServerClass(unittest.TestCase):
         self.assertEqual(server.port, 8080)
 
 
+class TestDataHubHandlerAsyncio(TestDataHubHandler):
+    """使用 asyncio 引擎运行同一组处理器测试"""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.config['server']['mode'] = 'asyncio'
+
+
+class TestSendfileAsyncio(TestSendfile):
+    """使用 asyncio 引擎运行 sendfile 测试"""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.config['server']['mode'] = 'asyncio'
+
+
+
+class TestConcurrentServingAsyncio(TestConcurrentServing):
+    """使用 asyncio 引擎运行负载测试"""
+    
+    mode = 'asyncio'
+
+
+class TestAsyncEngineConnections(TestDataHubServer):
+    """测试 asyncio 引擎的 keep-alive 和空闲超时"""
+    
+    def test_keep_alive_and_idle_timeout(self):
+        """测试同一连接处理多个请求，空闲超时后服务端关闭连接"""
+        config = dict(self.config, server=dict(self.config['server'], mode='asyncio', idle_timeout=0.5))
+        server = DataHubServer(config, self.dataset_states)
+        server_thread = threading.Thread(target=server.start)
+        server_thread.daemon = True
+        server_thread.start()
+        time.sleep(0.3)
+        
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', 18080, timeout=5)
+            for _ in range(3):
+                conn.request('GET', '/health')
+                response = conn.getresponse()
+                self.assertEqual(response.status, 200)
+                self.assertEqual(response.getheader('Connection'), 'keep-alive')
+                response.read()
+            sock = conn.sock
+            
+            time.sleep(1.0)
+            self.assertEqual(sock.recv(1), b'')  # 服务端已关闭连接
+            conn.close()
+        finally:
+            server.stop()
+
+    
+    def test_datasets_payload_built_off_event_loop(self):
+        """测试 /api/datasets 的响应体在线程池中生成，不阻塞事件循环"""
+        config = dict(self.config, server=dict(self.config['server'], mode='asyncio'))
+        server = DataHubServer(config, self.dataset_states)
+        threads = []
+        get_payload = server.catalog.get_payload
+        
+        def record_thread(states):
+            threads.append(threading.current_thread())
+            return get_payload(states)
+        
+        server_thread = threading.Thread(target=server.start)
+        server_thread.daemon = True
+        server_thread.start()
+        time.sleep(0.3)
+        
+        try:
+            with patch.object(server.catalog, 'get_payload', side_effect=record_thread):
+                conn = http.client.HTTPConnection('127.0.0.1', 18080, timeout=5)
+                conn.request('GET', '/api/datasets')
+                self.assertEqual(conn.getresponse().status, 200)
+                conn.close()
+            self.assertEqual(len(threads), 1)
+            self.assertIsNot(threads[0], server_thread)
+        finally:
+            server.stop()
+    
+    def test_write_timeout_closes_stalled_download(self):
+        """测试客户端不读取响应时，写出超过 idle_timeout 后服务端中止连接"""
+        zip_path = self.cache_dir / 'test-dataset-1_20240101_150000.zip'
+        with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as zf:
+            zf.writestr('random.bin', os.urandom(32 * 1024 * 1024))
+        
+        config = dict(self.config, server=dict(self.config['server'], mode='asyncio', idle_timeout=0.5))
+        server = DataHubServer(config, self.dataset_states)
+        server_thread = threading.Thread(target=server.start)
+        server_thread.daemon = True
+        server_thread.start()
+        time.sleep(0.3)
+        
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            sock.connect(('127.0.0.1', 18080))
+            sock.sendall(b'GET /package/test-dataset-1.zip HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            
+            # 不读取响应：发送缓冲区写满后服务端应在 idle_timeout 后放弃这个连接
+            deadline = time.monotonic() + 10
+            while server.server._connections and time.monotonic() < deadline:
+                time.sleep(0.1)
+            self.assertEqual(server.server._connections, 0)
+            sock.close()
+        finally:
+            server.stop()
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
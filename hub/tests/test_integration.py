@@ -22,6 +22,7 @@ import threading
 import unittest
 from pathlib import Path
 from http.client import HTTPConnection
+from unittest.mock import patch
 
 # 添加 src 到路径
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
@@ -245,6 +246,19 @@ class TestServerModule(unittest.TestCase):
         finally:
             os.unlink(config_path)
     
+    def test_load_shipped_config(self):
+        """测试随仓库发布的 config/config.yaml 可以解析"""
+        config_path = Path(__file__).parent.parent / 'config' / 'config.yaml'
+        config = self.server_module.load_config(str(config_path))
+        packaging = config['packaging']
+        self.assertEqual(packaging['block_threshold_mb'], 64)
+        self.assertIs(packaging['blob_store'], False)
+        self.assertEqual(packaging['per_device'], 1)
+        self.assertNotIn('block_threshold_mb', config['hub'])
+        self.assertNotIn('blob_store', config['hub'])
+        self.assertNotIn('workers', config['hub'].get('packaging', {}))
+        self.assertEqual(config['check']['watch'], 'poll')
+
     def test_load_config_not_found(self):
         """测试配置文件不存在"""
         with self.assertRaises(FileNotFoundError):
@@ -269,6 +283,30 @@ class TestServerModule(unittest.TestCase):
         self.assertEqual(root_logger.level, logging.DEBUG)
 
 
+class TestMainModule(unittest.TestCase):
+    """测试 src/main.py 的组件装配"""
+    
+    def test_server_shares_scheduler_catalog(self):
+        """测试 HTTP 服务器使用调度器的元数据目录、任务队列和打包器，而不是自建一份启动快照"""
+        import main as main_module
+        
+        with patch.object(main_module, 'Scheduler') as scheduler_class, \
+                patch.object(main_module, 'DataHubServer') as server_class, \
+                patch.object(main_module, 'StateManager'), \
+                patch.object(main_module, 'CalendarReader'), \
+                patch.object(main_module, 'setup_logging'), \
+                patch.object(main_module.signal, 'signal'):
+            self.assertEqual(main_module.main(), 0)
+        
+        scheduler = scheduler_class.return_value
+        kwargs = server_class.call_args.kwargs
+        self.assertIs(kwargs['catalog'], scheduler.catalog)
+        self.assertIs(kwargs['jobs'], scheduler.jobs)
+        self.assertIs(kwargs['packager'], scheduler.packager)
+        scheduler.start.assert_called_once_with()
+        server_class.return_value.start.assert_called_once_with()
+
+
 def run_integration_tests():
     """运行集成测试并生成报告"""
     print("=" * 60)
@@ -282,6 +320,7 @@ def run_integration_tests():
     # 添加测试
     suite.addTests(loader.loadTestsFromTestCase(TestIntegration))
     suite.addTests(loader.loadTestsFromTestCase(TestServerModule))
+    suite.addTests(loader.loadTestsFromTestCase(TestMainModule))
     
     # 运行测试
     runner = unittest.TextTestRunner(verbosity=2)
@@ -0,0 +1,103 @@
+"""
+Tests for JobQueue
+"""
+
+import threading
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from job_queue import JobQueue, PRIORITY_MANUAL, PRIORITY_PERIODIC
+
+
+class TestJobQueue(unittest.TestCase):
+    """测试任务队列的去重、优先级和互斥"""
+
+    def setUp(self):
+        self.queue = JobQueue(workers=1)
+        self.addCleanup(self.queue.close)
+        # 先占住唯一的工作线程，后续提交的任务都在排队
+        self.release = threading.Event()
+        started = threading.Event()
+        self.blocker = self.queue.submit('blocker', 'check', lambda: (started.set(), self.release.wait(5)))
+        self.assertTrue(started.wait(5))
+
+    def test_duplicates_merged_and_priority_upgraded(self):
+        """测试重复提交合并，手动触发提升优先级后先执行"""
+        order = []
+        periodic = self.queue.submit('a', 'check', lambda: order.append('a'))
+        self.queue.submit('b', 'check', lambda: order.append('b'))
+        merged = self.queue.submit('a', 'check', lambda: order.append('a2'), PRIORITY_MANUAL, 'manual')
+        self.assertIs(merged, periodic)
+        self.assertEqual((merged.priority, merged.trigger, merged.merged), (PRIORITY_MANUAL, 'manual', 1))
+
+        queued = [(job['dataset'], job['state']) for job in self.queue.jobs()]
+        self.assertEqual(queued, [('blocker', 'running'), ('a', 'queued'), ('b', 'queued')])
+
+        self.release.set()
+        for job in (periodic, self.queue.submit('b', 'check', None)):
+            self.assertTrue(job.wait(5))
+        self.assertEqual(order, ['a', 'b'])
+
+        finished = self.queue.jobs()[0]
+        self.assertEqual(finished['state'], 'finished')
+        self.assertIsNotNone(finished['run_seconds'])
+
+    def test_same_key_never_runs_twice(self):
+        """测试同一 (数据集, 阶段) 执行期间提交的任务等它结束后再执行"""
+        queue = JobQueue(workers=2)
+        self.addCleanup(queue.close)
+        running = threading.Event()
+        release = threading.Event()
+        active = []
+
+        def work():
+            active.append(1)
+            self.assertEqual(len(active), 1)
+            running.set()
+            release.wait(5)
+            active.pop()
+
+        first = queue.submit('a', 'check', work)
+        self.assertTrue(running.wait(5))
+        second = queue.submit('a', 'check', work)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.state, 'queued')
+        release.set()
+        self.assertTrue(second.wait(5))
+        self.assertEqual((first.state, second.state), ('finished', 'finished'))
+
+    def test_reopen_after_close(self):
+        """测试关闭后丢弃排队任务，重新打开后可以继续提交"""
+        queued = self.queue.submit('a', 'check', lambda: None)
+        self.queue.close()
+        self.assertEqual(queued.state, 'cancelled')
+        with self.assertRaises(RuntimeError):
+            self.queue.submit('a', 'check', lambda: None)
+        self.release.set()
+
+        self.queue.reopen()
+        job = self.queue.submit('a', 'check', lambda: None)
+        self.assertTrue(job.wait(5))
+        self.assertEqual(job.state, 'finished')
+
+    def test_run_exclusive_and_failures(self):
+        """测试当前线程执行的阶段登记为任务，失败的任务记录错误"""
+        with self.queue.run_exclusive('a', 'package') as job:
+            running = [(j['dataset'], j['stage']) for j in self.queue.jobs() if j['state'] == 'running']
+            self.assertIn(('a', 'package'), running)
+        self.assertEqual(job.state, 'finished')
+
+        def fail():
+            raise ValueError('boom')
+
+        failed = self.queue.submit('a', 'check', fail, PRIORITY_PERIODIC)
+        self.release.set()
+        self.assertTrue(failed.wait(5))
+        self.assertEqual((failed.state, failed.error), ('failed', 'boom'))
+
+
+if __name__ == '__main__':
+    unittest.main()
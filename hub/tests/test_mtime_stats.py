@@ -0,0 +1,73 @@
+"""
+Tests for mtime_stats
+"""
+
+import unittest
+from array import array
+from pathlib import Path
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import mtime_stats
+
+
+class StatsTestMixin:
+    """两种实现（NumPy / 标准库）共用的用例"""
+
+    def setUp(self):
+        # 0, 60, 120, ... 共 100 个 mtime，顺序打乱
+        self.mtimes = array('d', [float(((i * 37) % 100) * 60) for i in range(100)])
+        self.sizes = array('q', range(100))
+
+    def test_count_and_total(self):
+        """测试计数与求和"""
+        self.assertEqual(mtime_stats.count_above(self.mtimes, 60 * 89.5), 10)
+        self.assertEqual(mtime_stats.total(self.sizes), 4950)
+        self.assertIsInstance(mtime_stats.total(self.sizes), int)
+        self.assertEqual(mtime_stats.latest(self.mtimes), 99 * 60.0)
+        self.assertIsNone(mtime_stats.latest(array('d')))
+
+    def test_percentiles_match_sorted_index(self):
+        """测试分位数与"排序后取第 int(n*p) 个"一致"""
+        ordered = sorted(self.mtimes)
+        qs = [0.0, 0.5, 0.85, 0.95, 1.0]
+        expected = [ordered[min(int(100 * q), 99)] for q in qs]
+        self.assertEqual(mtime_stats.percentiles(self.mtimes, qs), expected)
+        self.assertEqual(mtime_stats.percentiles(array('d'), qs), [None] * 5)
+
+    def test_minute_histogram(self):
+        """测试按分钟统计"""
+        values = array('d', [0.0, 30.0, 59.9, 60.0, 185.0])
+        self.assertEqual(mtime_stats.minute_histogram(values), {0: 3, 60: 1, 180: 1})
+        self.assertEqual(mtime_stats.minute_histogram(values, since=59.95), {60: 1, 180: 1})
+
+
+@unittest.skipIf(not mtime_stats.HAS_NUMPY, '需要 NumPy')
+class TestNumpyStats(StatsTestMixin, unittest.TestCase):
+    """测试 NumPy 实现"""
+
+    def test_vector_shares_buffer(self):
+        """测试 array 零拷贝包装为 ndarray"""
+        vector = mtime_stats.as_vector(self.mtimes)
+        self.assertEqual(vector.shape, (100,))
+        self.assertFalse(vector.flags.owndata)
+
+
+class TestFallbackStats(StatsTestMixin, unittest.TestCase):
+    """测试没有 NumPy 时的标准库实现"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(mtime_stats, 'np', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_vector_is_passthrough(self):
+        """测试没有 NumPy 时原样返回数组"""
+        self.assertIs(mtime_stats.as_vector(self.mtimes), self.mtimes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,18 +3,23 @@ TestPackager - 打包器单元测试
 """
 
 import os
+import json
+import hashlib
 import time
 import tempfile
 import shutil
 import zipfile
+import zlib
 import unittest
 from datetime import datetime
+from unittest.mock import patch
 from pathlib import Path
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
-from packager import Packager
+import packager as packager_module
+from packager import Packager, APPEND_PREFIX, DELTA_INFO_NAME, manifest_path
 
 
 class TestPackager(unittest.TestCase):
@@ -393,6 +398,327 @@ class TestPackagerIntegration(unittest.TestCase):
         self.assertFalse(Path(result1['zip_path']).exists())
 
 
+class TestDeltaPackages(unittest.TestCase):
+    """测试版本清单和增量包"""
+    
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.cache_dir = self.temp_dir / "cache"
+        self.data_dir = self.temp_dir / "data"
+        self.data_dir.mkdir()
+        self.packager = Packager(cache_dir=str(self.cache_dir), keep_versions=2)
+        
+        (self.data_dir / "keep.csv").write_text("date,close\n2024-01-10,1\n")
+        (self.data_dir / "grow.csv").write_text("date,close\n2024-01-10,1\n")
+        (self.data_dir / "gone.csv").write_text("date,close\n2024-01-10,1\n")
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _next_version(self):
+        """修改数据目录：追加一行、删除一个文件、新增一个文件"""
+        time.sleep(1.1)  # 确保时间戳不同（秒级）
+        with open(self.data_dir / "grow.csv", "a") as f:
+            f.write("2024-01-11,2\n")
+        (self.data_dir / "gone.csv").unlink()
+        (self.data_dir / "sub").mkdir()
+        (self.data_dir / "sub" / "new.csv").write_text("date,close\n2024-01-11,3\n")
+        return self.packager.package("ds", str(self.data_dir))
+    
+    def test_manifest_written(self):
+        """测试每个包都有清单文件"""
+        result = self.packager.package("ds", str(self.data_dir))
+        
+        manifest = self.packager.load_manifest(result['zip_path'])
+        self.assertEqual(manifest['version'], result['version'])
+        self.assertEqual(sorted(manifest['files']), ['gone.csv', 'grow.csv', 'keep.csv'])
+        self.assertIsNone(result['delta_path'])
+        
+        # 哈希与实际内容一致
+        content = (self.data_dir / "keep.csv").read_bytes()
+        self.assertEqual(manifest['files']['keep.csv']['crc32'], zlib.crc32(content))
+        self.assertEqual(manifest['files']['keep.csv']['sha256'], hashlib.sha256(content).hexdigest())
+        self.assertEqual(manifest['file_count'], 3)
+        self.assertEqual(manifest['package_size'], result['zip_size'])
+        self.assertEqual(
+            manifest['package_sha256'],
+            hashlib.sha256(Path(result['zip_path']).read_bytes()).hexdigest()
+        )
+        
+        # 流式写入的 zip 仍然可以正常读取和校验
+        with zipfile.ZipFile(result['zip_path']) as zf:
+            self.assertIsNone(zf.testzip())
+    
+    def test_delta_contains_changes_and_deletions(self):
+        """测试增量包只包含变化的文件和删除列表"""
+        result1 = self.packager.package("ds", str(self.data_dir))
+        result2 = self._next_version()
+        
+        self.assertIsNotNone(result2['delta_path'])
+        with zipfile.ZipFile(result2['delta_path']) as zf:
+            names = sorted(zf.namelist())
+            info = json.loads(zf.read(DELTA_INFO_NAME))
+        
+        self.assertEqual(names, [APPEND_PREFIX + 'grow.csv', DELTA_INFO_NAME, 'sub/new.csv'])
+        self.assertEqual(info['base_version'], result1['version'])
+        self.assertEqual(info['version'], result2['version'])
+        self.assertEqual(info['deleted'], ['gone.csv'])
+        
+        self.assertEqual(
+            self.packager.get_delta_package("ds", result1['version']),
+            result2['delta_path']
+        )
+
+    def test_delta_matches_package_when_files_change_after_packaging(self):
+        """测试完整包写好后数据目录又变化时，增量包内容仍与完整包一致"""
+        self.packager.package("ds", str(self.data_dir))
+        build_delta = self.packager._build_delta
+
+        def build_after_change(*args, **kwargs):
+            (self.data_dir / "sub" / "new.csv").write_text("rewritten after packaging\n")
+            with open(self.data_dir / "grow.csv", "a") as f:
+                f.write("2024-01-12,9\n")
+            return build_delta(*args, **kwargs)
+
+        with patch.object(self.packager, '_build_delta', side_effect=build_after_change):
+            result2 = self._next_version()
+
+        with zipfile.ZipFile(result2['zip_path']) as full, zipfile.ZipFile(result2['delta_path']) as delta:
+            self.assertEqual(delta.read('sub/new.csv'), full.read('sub/new.csv'))
+            offset = json.loads(delta.read(DELTA_INFO_NAME))['appends']['grow.csv']['offset']
+            self.assertEqual(delta.read(APPEND_PREFIX + 'grow.csv'), full.read('grow.csv')[offset:])
+        self.assertIsNone(self.packager.get_delta_package("ds", "20000101_000000"))
+    
+    def test_unchanged_content_skips_packaging(self):
+        """测试只有 mtime 变化时不生成新版本，内容变化（大小不变）时正常打包"""
+        result1 = self.packager.package("ds", str(self.data_dir))
+        self.assertFalse(result1['skipped'])
+        
+        time.sleep(1.1)  # 确保时间戳不同（秒级）
+        keep = self.data_dir / "keep.csv"
+        os.utime(keep, (1700000000, 1700000000))
+        result2 = self.packager.package("ds", str(self.data_dir))
+        self.assertTrue(result2['skipped'])
+        self.assertEqual(
+            (result2['zip_path'], result2['version'], result2['fingerprint']),
+            (result1['zip_path'], result1['version'], result1['fingerprint'])
+        )
+        self.assertEqual(len(list(self.cache_dir.glob("ds_*.zip"))), 1)
+        
+        # 已确认过的文件不再重新计算哈希
+        with patch('packager.hashlib.sha256', wraps=hashlib.sha256) as mock_sha:
+            self.assertTrue(self.packager.package("ds", str(self.data_dir))['skipped'])
+        mock_sha.assert_not_called()
+        
+        time.sleep(1.1)  # 确保时间戳不同（秒级）
+        keep.write_text("date,close\n2024-01-10,2\n")
+        result3 = self.packager.package("ds", str(self.data_dir))
+        self.assertFalse(result3['skipped'])
+        self.assertNotEqual(result3['fingerprint'], result1['fingerprint'])
+    
+    def test_append_patch_carries_only_tail(self):
+        """测试纯追加的文件只携带尾部字节，被改写的文件携带完整内容"""
+        result1 = self.packager.package("ds", str(self.data_dir))
+        base_size = (self.data_dir / "grow.csv").stat().st_size
+        base_manifest = self.packager.load_manifest(result1['zip_path'])
+        
+        # keep.csv 变长但前缀被改写，不能当作追加
+        (self.data_dir / "keep.csv").write_text("date,close\n2024-01-10,9\n2024-01-11,9\n")
+        result2 = self._next_version()
+        
+        with zipfile.ZipFile(result2['delta_path']) as zf:
+            tail = zf.read(APPEND_PREFIX + 'grow.csv')
+            keep = zf.read('keep.csv')
+            info = json.loads(zf.read(DELTA_INFO_NAME))
+        
+        self.assertEqual(tail, b"2024-01-11,2\n")
+        self.assertEqual(keep, (self.data_dir / "keep.csv").read_bytes())
+        self.assertEqual(list(info['appends']), ['grow.csv'])
+        
+        append = info['appends']['grow.csv']
+        self.assertEqual(append['offset'], base_size)
+        self.assertEqual(append['prefix_sha256'], base_manifest['files']['grow.csv']['sha256'])
+        self.assertEqual(
+            append['sha256'],
+            hashlib.sha256((self.data_dir / "grow.csv").read_bytes()).hexdigest()
+        )
+    
+    def test_cleanup_removes_stale_deltas_and_manifests(self):
+        """测试清理旧版本时同时删除清单和过期增量包"""
+        result1 = self.packager.package("ds", str(self.data_dir))
+        result2 = self._next_version()
+        time.sleep(1.1)
+        (self.data_dir / "keep.csv").write_text("changed\n")
+        result3 = self.packager.package("ds", str(self.data_dir))
+        
+        self.assertFalse(Path(result1['zip_path']).exists())
+        self.assertFalse(manifest_path(result1['zip_path']).exists())
+        self.assertFalse(Path(result2['delta_path']).exists())
+        self.assertTrue(Path(result3['delta_path']).exists())
+
+
+class TestParallelPackaging(unittest.TestCase):
+    """测试并行压缩打包"""
+    
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.data_dir = self.temp_dir / "data"
+        (self.data_dir / "sub").mkdir(parents=True)
+        
+        for i in range(12):
+            rows = "".join(f"2024-01-{d:02d},{i},{d * i}\n" for d in range(1, 29))
+            (self.data_dir / f"stock_{i}.csv").write_text("date,code,close\n" + rows * 200)
+        (self.data_dir / "sub" / "empty.csv").write_text("")
+        (self.data_dir / "sub" / "big.bin").write_bytes(os.urandom(3 * 1024 * 1024))
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_parallel_matches_serial(self):
+        """测试并行打包与逐个打包的内容和清单一致"""
+        serial = Packager(cache_dir=str(self.temp_dir / "serial"), workers=1)
+        parallel = Packager(cache_dir=str(self.temp_dir / "parallel"), workers=4)
+        
+        result1 = serial.package("ds", str(self.data_dir))
+        result2 = parallel.package("ds", str(self.data_dir))
+        self.assertTrue(result2['success'])
+        self.assertEqual(result2['file_count'], 14)
+        
+        with zipfile.ZipFile(result1['zip_path']) as zf1, zipfile.ZipFile(result2['zip_path']) as zf2:
+            self.assertIsNone(zf2.testzip())
+            self.assertEqual(zf1.namelist(), zf2.namelist())
+            for name in zf1.namelist():
+                self.assertEqual(zf1.read(name), zf2.read(name))
+                self.assertEqual(zf2.getinfo(name).compress_type, zipfile.ZIP_DEFLATED)
+        
+        manifest1 = serial.load_manifest(result1['zip_path'])
+        manifest2 = parallel.load_manifest(result2['zip_path'])
+        self.assertEqual(manifest1['files'], manifest2['files'])
+        self.assertEqual(
+            manifest2['package_sha256'],
+            hashlib.sha256(Path(result2['zip_path']).read_bytes()).hexdigest()
+        )
+    
+    def test_parallel_append_delta(self):
+        """测试并行打包时同样识别纯追加文件"""
+        packager = Packager(cache_dir=str(self.temp_dir / "cache"), workers=4)
+        packager.package("ds", str(self.data_dir))
+        
+        time.sleep(1.1)  # 确保时间戳不同（秒级）
+        with open(self.data_dir / "stock_3.csv", "a") as f:
+            f.write("2024-02-01,3,99\n")
+        result = packager.package("ds", str(self.data_dir))
+        
+        with zipfile.ZipFile(result['delta_path']) as zf:
+            info = json.loads(zf.read(DELTA_INFO_NAME))
+            self.assertEqual(zf.read(APPEND_PREFIX + "stock_3.csv"), b"2024-02-01,3,99\n")
+        self.assertEqual(list(info['appends']), ['stock_3.csv'])
+
+    
+    def test_block_parallel_large_file(self):
+        """测试超过阈值的大文件切块并行压缩后仍是合法的 deflate 流"""
+        rows = "".join(f"2024-01-{d:02d},600000,{d * 1.5:.2f}\n" for d in range(1, 29))
+        large = ("date,code,close\n" + rows * 8000).encode()
+        (self.data_dir / "large.csv").write_bytes(large)
+        
+        packager = Packager(
+            cache_dir=str(self.temp_dir / "cache"), workers=4, block_threshold=2 * 1024 * 1024
+        )
+        with patch('packager._deflate_block', wraps=packager_module._deflate_block) as mock_block:
+            result = packager.package("ds", str(self.data_dir))
+        
+        # large.csv 和 big.bin 都超过阈值
+        self.assertGreater(mock_block.call_count, 4)
+        
+        with zipfile.ZipFile(result['zip_path']) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.read("large.csv"), large)
+            self.assertEqual(zf.read("sub/big.bin"), (self.data_dir / "sub" / "big.bin").read_bytes())
+            self.assertLess(zf.getinfo("large.csv").compress_size, len(large) // 4)
+        
+        manifest = packager.load_manifest(result['zip_path'])
+        self.assertEqual(manifest['files']['large.csv']['crc32'], zlib.crc32(large))
+
+class TestBlobStore(unittest.TestCase):
+    """测试内容寻址的 blob 库"""
+    
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.cache_dir = self.temp_dir / "cache"
+        self.data_dir = self.temp_dir / "data"
+        self.data_dir.mkdir()
+        self.packager = Packager(cache_dir=str(self.cache_dir), keep_versions=2, blob_store=True)
+        
+        for i in range(5):
+            (self.data_dir / f"stock_{i}.csv").write_text(f"date,close\n2024-01-10,{i}\n" * 100)
+        (self.data_dir / "copy.csv").write_text("date,close\n2024-01-10,0\n" * 100)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _blobs(self):
+        return sorted(p.name for p in (self.cache_dir / "blobs").glob("*/*"))
+    
+    def test_unchanged_files_reuse_blobs(self):
+        """测试相同内容只存一份，未变化的文件不再读取压缩"""
+        result1 = self.packager.package("ds", str(self.data_dir))
+        # stock_0.csv 与 copy.csv 内容相同
+        self.assertEqual(len(self._blobs()), 5)
+        
+        time.sleep(1.1)  # 确保时间戳不同（秒级）
+        (self.data_dir / "stock_1.csv").write_text("date,close\n2024-01-11,1\n")
+        with patch.object(Packager, '_compress_member', wraps=self.packager._compress_member) as mock_compress:
+            result2 = self.packager.package("ds", str(self.data_dir))
+        
+        self.assertEqual(mock_compress.call_count, 1)
+        self.assertEqual(len(self._blobs()), 6)
+        
+        # 旧版本的 zip 被删除，只保留清单
+        self.assertFalse(Path(result1['zip_path']).exists())
+        self.assertTrue(manifest_path(result1['zip_path']).exists())
+        versions = self.packager.list_versions("ds")
+        self.assertEqual([v['materialized'] for v in versions], [True, False])
+        
+        with zipfile.ZipFile(result2['zip_path']) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.read("stock_1.csv"), b"date,close\n2024-01-11,1\n")
+            self.assertEqual(zf.read("stock_2.csv"), (self.data_dir / "stock_2.csv").read_bytes())
+    
+    def test_materialize_old_version(self):
+        """测试从 blob 重建旧版本的 zip，内容与原包逐字节一致"""
+        result1 = self.packager.package("ds", str(self.data_dir))
+        original = Path(result1['zip_path']).read_bytes()
+        
+        time.sleep(1.1)
+        (self.data_dir / "stock_1.csv").write_text("changed\n")
+        result2 = self.packager.package("ds", str(self.data_dir))
+        
+        path = self.packager.materialize("ds", result1['version'])
+        self.assertEqual(path, result1['zip_path'])
+        self.assertEqual(Path(path).read_bytes(), original)
+        
+        # 重建的旧版本不会成为最新包
+        self.assertEqual(self.packager.get_latest_package("ds"), result2['zip_path'])
+        self.assertIsNone(self.packager.materialize("ds", "20000101_000000"))
+    
+    def test_unreferenced_blobs_collected(self):
+        """测试版本被清理后回收不再被引用的 blob"""
+        self.packager.package("ds", str(self.data_dir))
+        old_blobs = set(self._blobs())
+        
+        for round_index in range(2):
+            time.sleep(1.1)
+            (self.data_dir / "stock_1.csv").write_text(f"round {round_index}\n")
+            with patch('packager.BLOB_GC_GRACE_SECONDS', 0):
+                self.packager.package("ds", str(self.data_dir))
+        
+        # 保留的两个版本共用 4 个 blob，各自引用一个 stock_1.csv；第一版的 stock_1.csv 被回收
+        blobs = set(self._blobs())
+        self.assertEqual(len(blobs), 6)
+        self.assertEqual(len(old_blobs - blobs), 1)
+        self.assertEqual(len(self.packager.list_versions("ds")), 2)
+
+
 def run_tests():
     """运行所有测试"""
     loader = unittest.TestLoader()
@@ -400,6 +726,9 @@ def run_tests():
     
     suite.addTests(loader.loadTestsFromTestCase(TestPackager))
     suite.addTests(loader.loadTestsFromTestCase(TestPackagerIntegration))
+    suite.addTests(loader.loadTestsFromTestCase(TestDeltaPackages))
+    suite.addTests(loader.loadTestsFromTestCase(TestParallelPackaging))
+    suite.addTests(loader.loadTestsFromTestCase(TestBlobStore))
     
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(suite)
@@ -0,0 +1,80 @@
+"""
+Tests for poll_schedule
+"""
+
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import Mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from poll_schedule import ArrivalWindow, PollSchedule, learn_window
+
+
+def _calendar(dates):
+    calendar = Mock()
+    calendar.get_trade_dates.return_value = list(dates)
+    calendar.is_trade_date.side_effect = lambda d: d in dates
+    return calendar
+
+
+class TestLearnWindow(unittest.TestCase):
+    """测试到达时段学习"""
+
+    def test_first_arrival_per_day(self):
+        """测试每天只取最早的打包时间，两侧放宽 margin"""
+        history = [
+            '2024-01-08T16:10:00', '2024-01-08T20:00:00',
+            '2024-01-09T16:30:00', '2024-01-10T16:20:00'
+        ]
+        window = learn_window(history, margin=600)
+        self.assertEqual((window.start, window.end), (16 * 3600, 16 * 3600 + 40 * 60))
+        self.assertIsNone(learn_window(history[:2]))
+
+    def test_window_across_midnight(self):
+        """测试跨午夜到达的时刻连续处理"""
+        history = ['2024-01-09T23:50:00', '2024-01-11T00:20:00', '2024-01-12T23:40:00']
+        window = learn_window(history, margin=600)
+        self.assertTrue(window.wraps)
+        self.assertEqual((window.start, window.end), (23 * 3600 + 30 * 60, 30 * 60))
+        self.assertTrue(window.contains(0))
+        self.assertFalse(window.contains(12 * 3600))
+
+
+class TestPollSchedule(unittest.TestCase):
+    """测试自适应轮询间隔"""
+
+    def setUp(self):
+        # 2024-01-12 周五，01-13/14 周末，01-15 周一
+        self.schedule = PollSchedule(
+            _calendar({'2024-01-11', '2024-01-12', '2024-01-15'}),
+            default_interval=600, fast_interval=30, idle_interval=3600
+        )
+        self.schedule.windows = {'ds': ArrivalWindow(16 * 3600, 18 * 3600)}
+
+    def test_fast_inside_window(self):
+        """测试交易日到达时段内密集轮询"""
+        self.assertEqual(self.schedule.next_delay(datetime(2024, 1, 12, 17, 0)), 30)
+
+    def test_idle_outside_window(self):
+        """测试交易日时段外按小时退避，临近时段时提前醒来"""
+        self.assertEqual(self.schedule.next_delay(datetime(2024, 1, 12, 10, 0)), 3600)
+        self.assertEqual(self.schedule.next_delay(datetime(2024, 1, 12, 15, 40)), 1200)
+
+    def test_sleep_until_next_trade_day(self):
+        """测试非交易日休眠到下一个交易日的到达时段"""
+        delay = self.schedule.next_delay(datetime(2024, 1, 13, 9, 0))
+        self.assertEqual(delay, (datetime(2024, 1, 15, 16, 0) - datetime(2024, 1, 13, 9, 0)).total_seconds())
+        # 非交易日的到达时段不密集轮询
+        self.assertGreater(self.schedule.next_delay(datetime(2024, 1, 13, 17, 0)), 30)
+
+    def test_default_without_history(self):
+        """测试任一数据集历史不足时使用固定间隔"""
+        self.schedule.learn({'ds': ['2024-01-12T16:30:00'], 'other': []})
+        self.assertEqual(self.schedule.next_delay(datetime(2024, 1, 13, 9, 0)), 600)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,6 +15,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 from scheduler import Scheduler
 from state_manager import StateManager
+from fs_watcher import inotify_available
 
 
 class TestScheduler(unittest.TestCase):
@@ -111,7 +112,23 @@ class TestScheduler(unittest.TestCase):
         # 再次停止应该被忽略
         scheduler.stop()
         self.assertFalse(scheduler.is_running())
-    
+
+    def test_restart_after_stop(self):
+        """测试停止后可以再次启动，任务队列重新接受任务"""
+        scheduler = Scheduler(self.config, self.state_manager)
+        scheduler.start()
+        scheduler.stop()
+
+        scheduler.start()
+        self.assertTrue(scheduler.is_running())
+        with patch.object(scheduler, '_run_pipeline') as mock_pipeline:
+            scheduler._check_datasets(self.config['datasets'], '2024-01-01', trigger='manual')
+        # 重启后的定时检查也可能已经执行过一次
+        self.assertGreaterEqual(mock_pipeline.call_count, len(self.config['datasets']))
+
+        scheduler.stop()
+        self.assertFalse(scheduler.is_running())
+
     @patch('freshness_checker.FreshnessChecker.check_stable')
     @patch('freshness_checker.FreshnessChecker.check')
     def test_check_dataset_not_fresh(self, mock_check, mock_check_stable):
@@ -272,6 +289,256 @@ class TestScheduler(unittest.TestCase):
         # 验证 _check_dataset 被调用
         scheduler._check_dataset.assert_called_once()
     
+    def test_pipelines_run_datasets_concurrently(self):
+        """测试 pipelines > 1 时各数据集的流水线并行执行，同一设备上的打包互斥"""
+        import threading
+        (self.data_root / 'other-dataset').mkdir()
+        self.config['datasets'].append({'name': 'other-dataset', 'path': 'other-dataset'})
+        self.config['check']['pipelines'] = 2
+        scheduler = Scheduler(self.config, self.state_manager)
+        
+        # 两条流水线都进入检查后才能通过，依次执行时会超时
+        barrier = threading.Barrier(2, timeout=5)
+        active = []
+        overlaps = []
+        
+        def package(name, data_dir):
+            active.append(name)
+            overlaps.append(len(active))
+            time.sleep(0.05)
+            active.remove(name)
+            return {'success': False, 'error': 'skipped'}
+        
+        def check_dataset(name, data_path, trade_date, threshold):
+            barrier.wait()
+            scheduler._package_dataset(name, data_path, None)
+        
+        scheduler._check_dataset = check_dataset
+        scheduler.packager.package = package
+        scheduler._check_all_datasets()
+        
+        self.assertFalse(barrier.broken)
+        self.assertEqual(overlaps, [1, 1])
+        self.assertEqual(self.state_manager.get('other-dataset')['status'], 'error')
+    
+    def test_adaptive_schedule_uses_package_history(self):
+        """测试打包时间记入历史，自适应轮询按历史学习到达时段"""
+        self.config['check']['schedule'] = 'adaptive'
+        scheduler = Scheduler(self.config, self.state_manager)
+        scheduler.packager.package = Mock(return_value={
+            'success': True, 'zip_path': '/cache/test-dataset_20240112_150000.zip',
+            'zip_size': 10, 'file_count': 1, 'version': '20240112_150000'
+        })
+        result = Mock(last_updated='2024-01-12T15:00:00')
+        
+        scheduler._package_dataset('test-dataset', 'test-dataset', result)
+        history = self.state_manager.get('test-dataset')['package_history']
+        self.assertEqual(len(history), 1)
+        # 历史不足时使用固定间隔
+        self.assertEqual(scheduler._next_poll_delay(6), 6)
+        
+        self.state_manager.update('test-dataset', package_history=[
+            '2024-01-08T16:10:00', '2024-01-09T16:30:00', '2024-01-10T16:20:00'
+        ])
+        scheduler._next_poll_delay(6)
+        self.assertIsNotNone(scheduler.poll_schedule.windows['test-dataset'])
+    
+    def test_unchanged_package_is_reannounced(self):
+        """测试内容未变化时重新发布已有的包，不记录新的打包时间"""
+        scheduler = Scheduler(self.config, self.state_manager)
+        scheduler.packager.package = Mock(return_value={
+            'success': True, 'skipped': True, 'zip_path': '/cache/test-dataset_20240112_150000.zip',
+            'zip_size': 10, 'file_count': 1, 'version': '20240112_150000', 'fingerprint': 'abc'
+        })
+        
+        self.assertTrue(scheduler._package_dataset('test-dataset', 'test-dataset', None))
+        state = self.state_manager.get('test-dataset')
+        self.assertEqual((state['status'], state['version'], state['fingerprint']), ('ready', '20240112_150000', 'abc'))
+        self.assertNotIn('last_packaged_at', state)
+        self.assertIn('last_verified_at', state)
+    
+    def test_package_in_worker_process(self):
+        """测试配置了工作进程时在工作进程中打包，结果回写状态和元数据目录"""
+        from freshness_checker import FreshnessResult
+        
+        self.config['server']['worker_processes'] = 1
+        scheduler = Scheduler(self.config, self.state_manager)
+        self.addCleanup(scheduler.worker_pool.shutdown)
+        result = FreshnessResult(total_count=1, fresh_count=1, fresh_ratio=1.0, last_updated='2024-01-12T15:30:00')
+        
+        self.assertTrue(scheduler._package_dataset('test-dataset', 'test-dataset', result))
+        state = self.state_manager.get('test-dataset')
+        self.assertEqual(state['status'], 'ready')
+        entry = scheduler.catalog.get('test-dataset')
+        self.assertEqual(entry['package_path'], state['package_path'])
+        self.assertEqual(entry['total_size'], len('test,data\n1,2\n'))
+        self.assertIsNotNone(entry['last_updated'])
+        
+        # 元数据目录的文件统计由工作进程算好回传，调度进程不再扫描
+        with patch.object(scheduler.file_catalog, 'refresh') as mock_refresh:
+            scheduler._refresh_catalog('test-dataset')
+        mock_refresh.assert_not_called()
+        self.assertEqual(scheduler.catalog.get('test-dataset')['file_count'], 1)
+    
+    @patch('freshness_checker.FreshnessChecker.check_stable')
+    @patch('freshness_checker.FreshnessChecker.check')
+    def test_majority_minute_uses_rule_debounce(self, mock_check, mock_check_stable):
+        """测试多数分钟规则的数据集使用规则的 60 秒防抖，而不是全局的 debounce_seconds"""
+        from freshness_checker import FreshnessResult
+        
+        self.config['datasets'][0]['freshness_rule'] = 'majority_minute'
+        mock_check.return_value = FreshnessResult(
+            total_count=10, fresh_count=5, fresh_ratio=0.5, last_updated='2024-01-12T15:30:00'
+        )
+        mock_check_stable.return_value = None
+        
+        scheduler = Scheduler(self.config, self.state_manager)
+        scheduler._check_dataset('test-dataset', 'test-dataset', '20240112', 0.30)
+        self.assertEqual(mock_check_stable.call_args[1]['debounce_seconds'], 60)
+    
+    @patch('freshness_checker.FreshnessChecker.check_stable')
+    @patch('freshness_checker.FreshnessChecker.check')
+    def test_check_dataset_scoped_to_dataset(self, mock_check, mock_check_stable):
+        """测试新鲜度检查只针对当前数据集"""
+        from freshness_checker import FreshnessResult
+        
+        mock_check.return_value = FreshnessResult(
+            total_count=100,
+            fresh_count=95,
+            fresh_ratio=0.95,
+            last_updated='2024-01-12T15:30:00'
+        )
+        mock_check_stable.return_value = None
+        
+        scheduler = Scheduler(self.config, self.state_manager)
+        scheduler._check_dataset('test-dataset', 'test-dataset', '20240112', 0.85)
+        
+        self.assertEqual(mock_check.call_args[1]['dataset'], 'test-dataset')
+        self.assertEqual(mock_check_stable.call_args[1]['dataset'], 'test-dataset')
+    
+    @patch('packager.Packager.package')
+    @patch('freshness_checker.FreshnessChecker.check_stable')
+    @patch('freshness_checker.FreshnessChecker.check')
+    def test_completion_marker_skips_debounce(self, mock_check, mock_check_stable, mock_package):
+        """测试写入完成标记比上次打包新时直接打包，不做新鲜度检查和防抖"""
+        from freshness_checker import FreshnessResult
+        
+        self.config['datasets'][0]['completion_marker'] = '_SUCCESS'
+        marker = self.data_root / 'test-dataset' / '_SUCCESS'
+        marker.write_text('{"file_count": 1}')
+        mock_package.return_value = {
+            'success': True,
+            'zip_path': '/tmp/test.zip',
+            'zip_size': 1024,
+            'file_count': 2,
+            'version': '20240112_150000'
+        }
+        
+        scheduler = Scheduler(self.config, self.state_manager)
+        scheduler._check_dataset('test-dataset', 'test-dataset', '20240112', 0.85)
+        
+        mock_package.assert_called_once()
+        mock_check.assert_not_called()
+        mock_check_stable.assert_not_called()
+        state = self.state_manager.get('test-dataset')
+        self.assertEqual(state['status'], 'ready')
+        self.assertEqual(state['freshness']['rule'], 'completion_marker')
+        self.assertEqual(state['completion_marker_mtime'], marker.stat().st_mtime)
+        
+        # 标记已处理过，回退到新鲜度检查
+        mock_check.return_value = FreshnessResult(
+            total_count=1, fresh_count=0, fresh_ratio=0.0, last_updated='2024-01-12T15:30:00'
+        )
+        scheduler._check_dataset('test-dataset', 'test-dataset', '20240112', 0.85)
+        mock_check.assert_called_once()
+        self.assertEqual(mock_package.call_count, 1)
+    
+    @patch('packager.Packager.package')
+    @patch('freshness_checker.FreshnessChecker.check_stable')
+    @patch('freshness_checker.FreshnessChecker.check')
+    def test_old_completion_marker_ignored_without_state(self, mock_check, mock_check_stable, mock_package):
+        """测试没有标记处理记录时，早于已有最新包的旧标记不触发立即打包"""
+        from freshness_checker import FreshnessResult
+        
+        self.config['datasets'][0]['completion_marker'] = '_SUCCESS'
+        marker = self.data_root / 'test-dataset' / '_SUCCESS'
+        marker.write_text('{"file_count": 1}')
+        old = time.time() - 86400
+        os.utime(marker, (old, old))
+        package = self.cache_dir / 'test-dataset_20240111_150000.zip'
+        package.write_bytes(b'zip')
+        mock_check.return_value = FreshnessResult(
+            total_count=1, fresh_count=0, fresh_ratio=0.0, last_updated='2024-01-12T15:30:00'
+        )
+        
+        scheduler = Scheduler(self.config, self.state_manager)
+        scheduler._check_dataset('test-dataset', 'test-dataset', '20240112', 0.85)
+        
+        mock_package.assert_not_called()
+        mock_check.assert_called_once()
+        self.assertIsNone(self.state_manager.get('test-dataset').get('completion_marker_mtime'))
+        
+        # 状态里记录的打包时间同样作为基准
+        os.unlink(package)
+        self.state_manager.update('test-dataset', last_packaged_at=time.strftime('%Y-%m-%dT%H:%M:%S'))
+        scheduler._check_dataset('test-dataset', 'test-dataset', '20240112', 0.85)
+        mock_package.assert_not_called()
+    
+    def test_event_loop_trade_date_rule_enters_debounce(self):
+        """测试事件驱动循环按交易日计算 trade_date 规则的比例，越过阈值后进入防抖"""
+        from fs_watcher import WatchEvent, IN_CLOSE_WRITE
+        
+        self.config['datasets'][0]['freshness_rule'] = 'trade_date'
+        self.config['check']['debounce_seconds'] = 60
+        data_file = self.data_root / 'test-dataset' / 'data_20240112.csv'
+        data_file.write_text('date,close\n2024-01-11,1.0\n2024-01-12,2.0\n')
+        scheduler = Scheduler(self.config, self.state_manager)
+        
+        class FakeWatcher:
+            """第一次读取返回一个写入事件，第二次读取时停止调度循环"""
+            def __init__(self):
+                self.reads = 0
+            
+            def read(self, timeout):
+                self.reads += 1
+                if self.reads == 1:
+                    return [WatchEvent('test-dataset', str(data_file), IN_CLOSE_WRITE)]
+                scheduler._stop_event.set()
+                return []
+        
+        with patch.object(scheduler, '_last_trade_date', return_value='2024-01-12'):
+            scheduler._run_events(FakeWatcher(), 3600)
+        
+        self.assertEqual(self.state_manager.get('test-dataset')['status'], 'debounce')
+    
+    @unittest.skipIf(not inotify_available(), '需要 Linux inotify 支持')
+    def test_event_mode_packages_after_quiet_period(self):
+        """测试事件驱动模式：新写入的文件在静默期后触发打包，无需等待轮询间隔"""
+        self.config['check'] = {'interval_minutes': 10, 'debounce_seconds': 0.5, 'watch': 'inotify'}
+        scheduler = Scheduler(self.config, self.state_manager)
+        
+        with patch.object(scheduler.packager, 'package', wraps=scheduler.packager.package) as mock_package:
+            scheduler.start()
+            try:
+                # 等待首次检查完成
+                deadline = time.time() + 10
+                while mock_package.call_count < 1 and time.time() < deadline:
+                    time.sleep(0.1)
+                self.assertEqual(mock_package.call_count, 1)
+                
+                (self.data_root / 'test-dataset' / 'data_20240113.csv').write_text('test,data\n3,4\n')
+                
+                deadline = time.time() + 10
+                while mock_package.call_count < 2 and time.time() < deadline:
+                    time.sleep(0.1)
+                self.assertEqual(mock_package.call_count, 2)
+            finally:
+                scheduler.stop()
+        
+        state = self.state_manager.get('test-dataset')
+        self.assertEqual(state['status'], 'ready')
+        self.assertEqual(state['file_count'], 2)
+    
     def test_force_check(self):
         """测试强制检查"""
         scheduler = Scheduler(self.config, self.state_manager)
@@ -0,0 +1,91 @@
+"""
+Tests for stability_tracker
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from fs_scanner import scan_tree
+from stability_tracker import StabilityTracker
+
+
+class TestStabilityTracker(unittest.TestCase):
+    """测试按文件的写入稳定性跟踪"""
+
+    def setUp(self):
+        """创建测试目录：一个早已写完的文件和一个刚写入的文件"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.old = self.temp_dir / 'old.csv'
+        self.old.write_text('1')
+        os.utime(self.old, (time.time() - 3600, time.time() - 3600))
+        self.new = self.temp_dir / 'new.csv'
+        self.new.write_text('2')
+
+    def tearDown(self):
+        """清理测试目录"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _tracker(self, quiet, **kwargs):
+        tracker = StabilityTracker(quiet, poll_interval=0.05, **kwargs)
+        tracker.track(scan_tree(str(self.temp_dir), with_paths=True))
+        return tracker
+
+    def test_only_recent_files_tracked(self):
+        """测试只跟踪最近修改过的文件"""
+        tracker = self._tracker(0.2)
+        self.assertEqual(len(tracker), 1)
+
+    def test_finished_writes_need_no_wait(self):
+        """测试写入早已结束时立即稳定"""
+        os.utime(self.new, (time.time() - 60, time.time() - 60))
+        tracker = self._tracker(5)
+
+        start = time.monotonic()
+        self.assertTrue(tracker.wait())
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_appending_file_delays_stability(self):
+        """测试正在追加的文件推迟稳定判定，直到静默期结束"""
+        def append():
+            for _ in range(6):
+                time.sleep(0.1)
+                with open(self.new, 'a') as f:
+                    f.write('more\n')
+
+        writer = threading.Thread(target=append)
+        tracker = self._tracker(0.3)
+        start = time.monotonic()
+        writer.start()
+        self.assertTrue(tracker.wait(max_wait=5))
+        writer.join()
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.6)
+        self.assertEqual(tracker.poll(), 0)
+
+    def test_max_wait_and_stop_event(self):
+        """测试超过最长等待时间或收到停止信号时返回 False"""
+        tracker = self._tracker(10)
+        self.assertFalse(tracker.wait(max_wait=0.1))
+
+        stop_event = threading.Event()
+        stop_event.set()
+        self.assertFalse(tracker.wait(stop_event))
+
+    def test_deleted_file_counts_as_change(self):
+        """测试跟踪的文件被删除也算变化"""
+        tracker = self._tracker(1)
+        os.remove(self.new)
+        self.assertEqual(tracker.poll(), 1)
+        self.assertEqual(len(tracker), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Tests for WorkerPool
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from worker_pool import WorkerPool, WorkerCrashed
+
+
+class TestWorkerPool(unittest.TestCase):
+    """测试工作进程池中的检查与打包"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.data_root = self.temp_dir / 'data'
+        self.cache_dir = self.temp_dir / 'cache'
+        (self.data_root / 'ds').mkdir(parents=True)
+        self.cache_dir.mkdir()
+        now = time.time()
+        for i in range(3):
+            path = self.data_root / 'ds' / f'{i}.csv'
+            path.write_text('date,close\n2024-01-15,1.0\n')
+            os.utime(path, (now, now))
+
+        self.pool = WorkerPool(
+            {
+                'data_root': str(self.data_root),
+                'datasets': [{'name': 'ds', 'path': 'ds'}],
+                'catalog_dir': str(self.cache_dir / 'file_catalog'),
+                'cache_dir': str(self.cache_dir),
+                'keep_versions': 2
+            },
+            workers=1
+        )
+
+    def tearDown(self):
+        self.pool.shutdown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_check_and_package(self):
+        """测试在工作进程中检查和打包，结果回传到当前进程"""
+        result = self.pool.checker('check', '2024-01-15', dataset='ds')
+        self.assertEqual((result.total_count, result.fresh_count), (3, 3))
+
+        package_result = self.pool.package('ds', str(self.data_root / 'ds'))
+        self.assertTrue(package_result['success'])
+        self.assertEqual(package_result['file_count'], 3)
+        self.assertTrue(Path(package_result['zip_path']).exists())
+
+    def test_catalog_summary(self):
+        """测试工作进程刷新文件目录后回传文件统计"""
+        summary = self.pool.catalog_summary('ds')
+        self.assertEqual(summary['file_count'], 3)
+        self.assertEqual(summary['total_size'], 3 * len('date,close\n2024-01-15,1.0\n'))
+        self.assertIsNotNone(summary['last_updated'])
+
+    def test_cancel_interrupts_debounce(self):
+        """测试 cancel() 中断工作进程中的防抖等待"""
+        self.pool.checker('check', '2024-01-15', dataset='ds')  # 预热：启动工作进程
+        results = []
+        thread = threading.Thread(target=lambda: results.append(
+            self.pool.checker('check_stable', '2024-01-15', debounce_seconds=60, dataset='ds')
+        ))
+        start = time.monotonic()
+        thread.start()
+        time.sleep(1.0)
+        self.pool.cancel()
+        thread.join(30)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [None])
+        self.assertLess(time.monotonic() - start, 30)
+
+    def test_crash_restarts_pool(self):
+        """测试工作进程崩溃后当前任务失败，进程池自动重建"""
+        with self.assertRaises(WorkerCrashed):
+            self.pool.call(os._exit, 1)
+        result = self.pool.checker('check', '2024-01-15', dataset='ds')
+        self.assertEqual(result.total_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()